@@ -3,17 +3,17 @@ logger = logging.getLogger("secondmotorsubsystemlogger")
 
 import commands2
 import wpilib
-from wpilib import PS5Controller
 from constants import OP, SW
 from subsystems.SecondMotorSubsystem import SecondMotorSubsystemClass
+from util.InputShaping import DriverInput
 
 
 class TriggerSpin(commands2.Command):
 
-    def __init__(self, secondmotorsubsystem: SecondMotorSubsystemClass, controller: PS5Controller) -> None:
+    def __init__(self, secondmotorsubsystem: SecondMotorSubsystemClass, inputs: DriverInput) -> None:
         super().__init__()
         self.secondmotorsub = secondmotorsubsystem
-        self.controller = controller
+        self.inputs = inputs
         self.addRequirements(self.secondmotorsub)
         
 
@@ -21,9 +21,7 @@ class TriggerSpin(commands2.Command):
         logger.info("TriggerSpin Command Initialized")
 
     def execute(self):
-        right = self.controller.getR2Axis()  # 0.0 → 1.0
-        left = self.controller.getL2Axis()   # 0.0 → 1.0
-        speed = right - left                  # -1.0 → +1.0
+        speed = self.inputs.trigger  # R2 - L2, shaped: -1.0 → +1.0
         self.secondmotorsub.run(speed)
 
     def end(self, interrupted: bool):
@@ -42,10 +40,7 @@ class DisplayEncoderValue(commands2.Command):
         self.addRequirements(self.secondmotorsub)
 
     def initialize(self):
-        wrapped_degrees = self.secondmotorsub.get_encoder_position()
-        raw_rotations = self.secondmotorsub.second_motor.get_rotor_position().value
-        wpilib.SmartDashboard.putNumber("Encoder Degrees (Wrapped)", wrapped_degrees)
-        wpilib.SmartDashboard.putNumber("Encoder Rotations (Raw)", raw_rotations)
+        self.secondmotorsub.publish_encoder()
 
     def isFinished(self):
         return True
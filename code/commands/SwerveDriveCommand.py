@@ -1,19 +1,18 @@
 import logging
 logger = logging.getLogger("swervedrivesubsystemlogger")
 import commands2
-from wpilib import SmartDashboard
 from constants import OP, SW
 import math
 
 class SwerveDriveCommand(commands2.Command):
     """
     Default command for the swerve drive.
-    Reads the PS5 controller and drives the robot.
+    Reads the shaped PS5 inputs and drives the robot.
     """
-    def __init__(self, swerve_subsystem, controller):
+    def __init__(self, swerve_subsystem, inputs):
         super().__init__()
         self.swervesub = swerve_subsystem
-        self.controller = controller
+        self.inputs = inputs
         self.addRequirements(swerve_subsystem)
 
     def initialize(self):
@@ -21,21 +20,16 @@ class SwerveDriveCommand(commands2.Command):
 
     def execute(self):
 
-        #Forward/back (invert if necessary)
-        x_speed = -self.controller.getLeftY() * SW.swerve_max_speed_mps
+        #Forward/back (already inverted by the input pipeline)
+        x_speed = self.inputs.forward * SW.swerve_max_speed_mps
         #Strafe
-        y_speed = self.controller.getLeftX() * SW.swerve_max_speed_mps
+        y_speed = self.inputs.strafe * SW.swerve_max_speed_mps
         #Rotating
-        rot_speed = self.controller.getRightX() * SW.swerve_max_angular_speed_rps
+        rot_speed = self.inputs.rotation * SW.swerve_max_angular_speed_rps
 
-        #Drive the swerve subsystem
+        #Drive the swerve subsystem (also publishes the commanded speeds)
         self.swervesub.drive(x_speed, y_speed, rot_speed, field_relative=True)
 
-        #Shows movement speed
-        SmartDashboard.putNumber("Swerve X Speed", x_speed)
-        SmartDashboard.putNumber("Swerve Y Speed", y_speed)
-        SmartDashboard.putNumber("Swerve Rotation Speed", rot_speed)
-
     def end(self, interrupted: bool):
         logger.info("Swerve Drive Ended")
 
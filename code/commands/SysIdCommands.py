@@ -0,0 +1,77 @@
+import logging
+logger = logging.getLogger("sysidlogger")
+
+import commands2
+import wpilib
+
+from constants import SW
+
+# Test codes written to the log, and understood by tools/sysid_analyze.py
+QUASISTATIC_FORWARD = 1
+QUASISTATIC_REVERSE = 2
+DYNAMIC_FORWARD = 3
+DYNAMIC_REVERSE = 4
+
+TEST_NAMES = {
+    QUASISTATIC_FORWARD: "Quasistatic Forward",
+    QUASISTATIC_REVERSE: "Quasistatic Reverse",
+    DYNAMIC_FORWARD: "Dynamic Forward",
+    DYNAMIC_REVERSE: "Dynamic Reverse",
+}
+
+
+class SysIdMechanism:
+    """
+    What a characterization test needs from one mechanism: a way to apply an
+    open-loop voltage and a (position, velocity) reading in the units its
+    Talon's closed loop uses, so fitted gains can be used as they are.
+    """
+
+    def __init__(self, name, subsystem, set_voltage, get_state):
+        self.name = name
+        self.subsystem = subsystem
+        self.set_voltage = set_voltage
+        self.get_state = get_state
+
+
+class SysIdTest(commands2.Command):
+    """
+    One SysId-style characterization test.
+
+    Quasistatic tests ramp the voltage at SW.sysid_ramp_rate_v_per_s, dynamic
+    tests apply SW.sysid_step_voltage at once. Every loop appends
+    (test, voltage, position, velocity) to the mechanism's /SysId entry in
+    the data log. The test stops after SW.sysid_timeout_s, or when cancelled.
+    """
+
+    def __init__(self, mechanism, test, log_entry) -> None:
+        super().__init__()
+        self.mechanism = mechanism
+        self.test = test
+        self.log_entry = log_entry
+        self.sign = 1.0 if test in (QUASISTATIC_FORWARD, DYNAMIC_FORWARD) else -1.0
+        self.quasistatic = test in (QUASISTATIC_FORWARD, QUASISTATIC_REVERSE)
+        self.timer = wpilib.Timer()
+        self.setName(f"SysId {mechanism.name} {TEST_NAMES[test]}")
+        self.addRequirements(mechanism.subsystem)
+
+    def initialize(self):
+        self.timer.restart()
+        logger.info(f"{self.getName()} started")
+
+    def execute(self):
+        if self.quasistatic:
+            voltage = self.sign * SW.sysid_ramp_rate_v_per_s * self.timer.get()
+        else:
+            voltage = self.sign * SW.sysid_step_voltage
+        self.mechanism.set_voltage(voltage)
+
+        position, velocity = self.mechanism.get_state()
+        self.log_entry.append((self.test, voltage, position, velocity))
+
+    def isFinished(self):
+        return self.timer.hasElapsed(SW.sysid_timeout_s)
+
+    def end(self, interrupted: bool):
+        self.mechanism.set_voltage(0.0)
+        logger.info(f"{self.getName()} ended")
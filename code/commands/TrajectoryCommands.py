@@ -0,0 +1,78 @@
+import logging
+logger = logging.getLogger("trajectorylogger")
+
+import math
+
+import commands2
+import wpilib
+from wpimath.controller import PIDController
+
+from constants import SW
+
+
+class FollowTrajectory(commands2.Command):
+    """
+    Drives along a precomputed holonomic trajectory.
+
+    Each loop samples the trajectory at the elapsed time and drives its
+    field-relative velocities as feedforward, plus P feedback on the X, Y
+    and heading error against the estimated pose. The sum is rotated into
+    the robot frame with the estimated heading and driven robot-relative,
+    so feedback and the frame change use the same heading.
+    """
+
+    def __init__(self, swerve_subsystem, trajectory) -> None:
+        super().__init__()
+        self.swervesub = swerve_subsystem
+        self.trajectory = trajectory
+        self.timer = wpilib.Timer()
+
+        self.x_controller = PIDController(SW.auto_translation_kp, 0.0, 0.0)
+        self.y_controller = PIDController(SW.auto_translation_kp, 0.0, 0.0)
+        self.heading_controller = PIDController(SW.auto_heading_kp, 0.0, 0.0)
+        self.heading_controller.enableContinuousInput(-math.pi, math.pi)
+
+        self.setName(f"FollowTrajectory({trajectory.name})")
+        self.addRequirements(self.swervesub)
+
+    def initialize(self):
+        self.timer.restart()
+        self.x_controller.reset()
+        self.y_controller.reset()
+        self.heading_controller.reset()
+        logger.info(f"Following {self.trajectory.name}")
+
+    def execute(self):
+        x, y, heading, vx, vy, omega = self.trajectory.sample(self.timer.get())
+        pose = self.swervesub.get_pose()
+        current_heading = pose.rotation().radians()
+
+        # Field-relative feedforward plus feedback
+        vx += self.x_controller.calculate(pose.X(), x)
+        vy += self.y_controller.calculate(pose.Y(), y)
+        omega += self.heading_controller.calculate(current_heading, heading)
+
+        cos, sin = math.cos(current_heading), math.sin(current_heading)
+        self.swervesub.drive(vx * cos + vy * sin, vy * cos - vx * sin, omega, field_relative=False)
+
+    def end(self, interrupted: bool):
+        self.swervesub.drive(0.0, 0.0, 0.0, field_relative=False)
+        logger.info(f"Finished {self.trajectory.name}, interrupted={interrupted}")
+
+    def isFinished(self):
+        return self.timer.hasElapsed(self.trajectory.duration)
+
+
+class ResetPose(commands2.Command):
+    """Resets odometry to the start of a trajectory."""
+
+    def __init__(self, swerve_subsystem, trajectory) -> None:
+        super().__init__()
+        self.swervesub = swerve_subsystem
+        self.trajectory = trajectory
+
+    def initialize(self):
+        self.swervesub.reset_pose(self.trajectory.initial_pose())
+
+    def isFinished(self):
+        return True
@@ -6,113 +6,438 @@ This file defines constants related to your robot. These constants include:
  * Electrical constants (CAN IDs, current limits)
  * Operation constants (joystick ports)
  * Software constants (PID values, swerve max speeds)
+ * Derived constants (conversion factors computed from the ones above)
+
+Each group is a frozen, slotted dataclass whose defaults are the values
+below. A robot profile (deploy/profiles/<name>.toml) can override any field
+per group, e.g. for the practice robot:
+
+    [SW]
+    swerve_max_speed_mps = 2.0
+
+The profile is named by the ROBOT_PROFILE environment variable, or else by
+the contents of /home/lvuser/robot_profile on the roboRIO; with neither,
+the defaults are used on the robot and the "simulation" profile off it. Every group is type- and range-checked at import,
+so a bad value stops the robot code from starting instead of misbehaving
+on the field. CAN ID collisions only raise a ConstantsWarning: which
+device really sits at an ID is a wiring question the code cannot answer.
 """
 
-from collections import namedtuple
+import dataclasses
+import math
+import os
+import tomllib
+import warnings
+from dataclasses import dataclass
+import wpilib
 from wpimath.geometry import Translation2d
-from wpimath.kinematics import SwerveDrive2Kinematics, SwerveModuleState
+from wpimath.kinematics import SwerveDrive4Kinematics, SwerveModuleState
 import phoenix6
 
+PROFILE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "deploy", "profiles")
+PROFILE_SELECTOR_PATH = "/home/lvuser/robot_profile"
+
+# Highest device ID Phoenix accepts on a CAN bus
+MAX_CAN_ID = 62
+
+
+class ConstantsWarning(UserWarning):
+    """A constant that is valid but probably wrong, e.g. a shared CAN ID."""
+
+
+class _Group:
+    """Type checking shared by every constants group."""
+
+    __slots__ = ()
+
+    def __post_init__(self):
+        problems = []
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name)
+            expected = field.type
+            # Whole numbers are fine wherever a float is expected (TOML writes 2 for 2.0)
+            if expected is float and isinstance(value, int) and not isinstance(value, bool):
+                object.__setattr__(self, field.name, float(value))
+            elif expected is tuple and isinstance(value, list):
+                object.__setattr__(self, field.name, tuple(value))
+            elif not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+                problems.append(f"{field.name} must be {expected.__name__}, got {value!r}")
+        if not problems:
+            problems = list(self.problems())
+        if problems:
+            raise ValueError(f"{type(self).__name__}: " + "; ".join(problems))
+        for caution in self.cautions():
+            warnings.warn(f"{type(self).__name__}: {caution}", ConstantsWarning, stacklevel=3)
+
+    def problems(self):
+        """Yields a description of every out-of-range value."""
+        return ()
+
+    def cautions(self):
+        """Yields a description of every suspicious but allowed value."""
+        return ()
+
+
+def _positive(group, *names):
+    for name in names:
+        if not getattr(group, name) > 0:
+            yield f"{name} must be positive, got {getattr(group, name)!r}"
+
+
+def _between(group, name, low, high):
+    value = getattr(group, name)
+    if not low <= value <= high:
+        yield f"{name} must be in [{low}, {high}], got {value!r}"
+
+
 # -----------------------------
 # Physical constants
 # -----------------------------
-phys_data = {
-    "wheelbase_meters": 0.58,
-    "trackwidth_meters": 0.58,
-    "wheel_diameter_meters": 0.1016,  # 4-inch wheels
-}
+@dataclass(frozen=True, slots=True)
+class Physical(_Group):
+    wheelbase_meters: float = 0.58
+    trackwidth_meters: float = 0.58
+    wheel_diameter_meters: float = 0.1016  # 4-inch wheels
+
+    def problems(self):
+        yield from _positive(self, "wheelbase_meters", "trackwidth_meters", "wheel_diameter_meters")
 
-PHYS = namedtuple("Data", phys_data.keys())(**phys_data)
 
 # -----------------------------
 # Mechanical constants
 # -----------------------------
-mech_data = {
-    "swerve_module_driving_gearing_ratio": 6.75,  # SDS Mk4i L2  6.75 rotation on motor per 1 rotatio on drivetrain
-    "swerve_module_steering_gearing_ratio": 150 / 7,  # SDS Mk4i
-    "first_motor_inverted": False,
-    "second_motor_inverted": True,
+SWERVE_STEERING_GEARING_RATIO = 150 / 7  # SDS Mk4i
+
+
+@dataclass(frozen=True, slots=True)
+class Mechanical(_Group):
+    swerve_module_driving_gearing_ratio: float = 6.75  # SDS Mk4i L2  6.75 rotation on motor per 1 rotatio on drivetrain
+    swerve_module_steering_gearing_ratio: float = SWERVE_STEERING_GEARING_RATIO
+    first_motor_inverted: bool = False
+    second_motor_inverted: bool = True
     # Add more gearing or inversion constants here
-}
 
-MECH = namedtuple("Data", mech_data.keys())(**mech_data)
+    def problems(self):
+        yield from _positive(self, "swerve_module_driving_gearing_ratio", "swerve_module_steering_gearing_ratio")
+
 
 # -----------------------------
 # Electrical constants
 # -----------------------------
-elec_data = {
-    "first_motor_CAN_ID": 3,
-    "first_motor_forward": 0.5,
-    "first_motor_reverse": -0.5,
-    "first_motor_stop": 0.0,
-
-    "second_motor_CAN_ID": 2,
-    "second_motor_forward": 1.0,
-    "second_motor_reverse": -1.0,
-    "second_motor_stop": 0.0,
-
-    "limit_switch_port": 0,
-
-    "RF_drive_CAN_ID": 3,
-    "RF_steer_CAN_ID": 20,
-    "RF_encoder_DIO": 8,
-    "RB_steer_CAN_ID": 12,
-    "RB_drive_CAN_ID": 1,
-    "RB_encoder_DIO": 7,
-    "LB_steer_CAN_ID": 8,
-    "LB_drive_CAN_ID": 7,
-    "LB_encoder_DIO": 9,
-    "LF_steer_CAN_ID": 11,
-    "LF_drive_CAN_ID": 5,
-    "LF_encoder_DIO": 0,  
-    "driveMotor_neutral": phoenix6.signals.NeutralModeValue(1),
-    "steerMotor_neutral": phoenix6.signals.NeutralModeValue(1),
-}
-
-ELEC = namedtuple("Data", elec_data.keys())(**elec_data)
+@dataclass(frozen=True, slots=True)
+class Electrical(_Group):
+    first_motor_CAN_ID: int = 3  # same ID as RF_drive_CAN_ID; check the wiring
+    first_motor_forward: float = 0.5
+    first_motor_reverse: float = -0.5
+    first_motor_stop: float = 0.0
+
+    second_motor_CAN_ID: int = 2
+    second_motor_forward: float = 1.0
+    second_motor_reverse: float = -1.0
+    second_motor_stop: float = 0.0
+
+    limit_switch_port: int = 0
+
+    # The *_encoder_DIO values are the modules' CANcoder IDs
+    RF_drive_CAN_ID: int = 3
+    RF_steer_CAN_ID: int = 20
+    RF_encoder_DIO: int = 8
+    RB_steer_CAN_ID: int = 12
+    RB_drive_CAN_ID: int = 1
+    RB_encoder_DIO: int = 7
+    LB_steer_CAN_ID: int = 8
+    LB_drive_CAN_ID: int = 7
+    LB_encoder_DIO: int = 9
+    LF_steer_CAN_ID: int = 11
+    LF_drive_CAN_ID: int = 5
+    LF_encoder_DIO: int = 0
+    driveMotor_neutral: phoenix6.signals.NeutralModeValue = phoenix6.signals.NeutralModeValue(1)
+    steerMotor_neutral: phoenix6.signals.NeutralModeValue = phoenix6.signals.NeutralModeValue(1)
+
+    def talon_ids(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name.endswith("_CAN_ID")}
+
+    def cancoder_ids(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name.endswith("_encoder_DIO")}
+
+    def problems(self):
+        for ids in (self.talon_ids(), self.cancoder_ids()):
+            for name in ids:
+                yield from _between(self, name, 0, MAX_CAN_ID)
+        yield from _between(self, "limit_switch_port", 0, 9)
+        for name in ("first_motor_forward", "first_motor_reverse", "first_motor_stop",
+                     "second_motor_forward", "second_motor_reverse", "second_motor_stop"):
+            yield from _between(self, name, -1.0, 1.0)
+
+    def cautions(self):
+        # Phoenix IDs only have to be unique per device type
+        for ids in (self.talon_ids(), self.cancoder_ids()):
+            owners = {}
+            for name, device_id in ids.items():
+                owners.setdefault(device_id, []).append(name)
+            for device_id, names in owners.items():
+                if len(names) > 1:
+                    yield f"CAN ID {device_id} is used by {' and '.join(names)}"
+
 
 # -----------------------------
 # Operation constants
 # -----------------------------
-op_data = {
-    "joystick_port": 0,
-}
+@dataclass(frozen=True, slots=True)
+class Operation(_Group):
+    joystick_port: int = 0
+
+    def problems(self):
+        yield from _between(self, "joystick_port", 0, 5)
 
-OP = namedtuple("Data", op_data.keys())(**op_data)
 
 # -----------------------------
 # Software constants (PID, feedforward, swerve speeds)
 # -----------------------------
-sw_data = {
+@dataclass(frozen=True, slots=True)
+class Software(_Group):
     # First motor PID
-    "First_ks": 0.2,
-    "First_kv": 0.12,
-    "First_ka": 0.0,
-    "First_kp": 3.0,
-    "First_ki": 0.5,
-    "First_kd": 0.1,
+    First_ks: float = 0.2
+    First_kv: float = 0.12
+    First_ka: float = 0.0
+    First_kp: float = 3.0
+    First_ki: float = 0.5
+    First_kd: float = 0.1
 
     # Motion Magic
-    "First_Cruise_Velocity": 40,
-    "First_Acceleration": 80,
-    "First_Jerk": 0,
-    "First_Gear_Ratio": 1.0,
-    "FirstMotorSetpoint": 10.0,
+    First_Cruise_Velocity: float = 40
+    First_Acceleration: float = 80
+    First_Jerk: float = 0
+    First_Gear_Ratio: float = 1.0
+    FirstMotorSetpoint: float = 10.0
+
+    # Swerve steering (closed loop on the steer Talon, per wheel rotation)
+    steer_kp: float = 2.5 * SWERVE_STEERING_GEARING_RATIO  # 2.5 V per motor rotation of error
+    steer_kd: float = 0.1 * SWERVE_STEERING_GEARING_RATIO
+    steer_fused_cancoder: bool = False        # FusedCANcoder: opt in per profile, steer Talons need Phoenix Pro
+
+    # Swerve drive velocity loop (per motor rotation)
+    drive_ks: float = 0.0
+    drive_kv: float = 0.0
+    drive_kp: float = 0.1
+
+    # System identification (commands under SysId/ on the dashboard, analyzed by tools/sysid_analyze.py)
+    sysid_ramp_rate_v_per_s: float = 1.0      # quasistatic voltage ramp
+    sysid_step_voltage: float = 7.0           # dynamic test voltage
+    sysid_timeout_s: float = 10.0             # every test stops after this long
 
     # Swerve-specific speeds
-    "swerve_max_speed_mps": 3.0,          # max linear speed (meters/sec)
-    "swerve_max_angular_speed_rps": 4.0,  # max rotational speed (rad/sec)
-}
+    swerve_max_speed_mps: float = 3.0         # max linear speed (meters/sec)
+    swerve_max_angular_speed_rps: float = 4.0 # max rotational speed (rad/sec)
+    swerve_max_module_speed_mps: float = 4.5  # desaturation limit for any single wheel
+    odometry_frequency_hz: float = 250        # drive/steer signal rate for the odometry thread
+
+    # Second motor forward limit switch
+    second_motor_limit_mode: str = "dio"      # "dio": switch on the roboRIO, "talon": wired to the Talon's forward limit input
+    second_motor_zero_on_limit: bool = False  # re-zero the position when the switch closes
+    second_motor_limit_position: float = 0.0  # position (rotations) the switch re-zeros to
+
+    # Control request deduplication (repeats skip the set_control() call; CAN traffic is unchanged)
+    control_dedup: bool = True
+    control_keep_alive_s: float = 0.1         # an unchanged request is still passed to set_control() this often
+    control_tolerance: float = 1e-4           # float fields closer than this (V, rotations, rps) are unchanged
+
+    # CAN bus budget (every status signal a consumer doesn't read is turned off)
+    remote_sensor_frequency_hz: float = 100.0 # CANcoder frames the steer Talons fuse
+    can_bus_budget: float = 0.8               # warn at startup when the (upper-bound) estimated load is over this share
+    can_status_period_s: float = 1.0          # how often the measured bus load is published
+
+    # Pose estimation
+    pose_history_s: float = 1.5               # odometry history kept for late vision measurements
+    odometry_std_devs: tuple = (0.1, 0.1, 0.1)  # x (m), y (m), heading (rad) trust in odometry
+    vision_std_devs: tuple = (0.5, 0.5, 0.9)    # default trust in a vision pose
+
+    # Driver input shaping (values are normalized stick units, 0..1)
+    drive_deadband: float = 0.08              # radial, on the left stick
+    drive_expo: float = 0.4                   # 0 = linear, 1 = cubic
+    drive_slew_rate: float = 3.0              # max change per second
+    rotation_deadband: float = 0.08
+    rotation_expo: float = 0.5
+    rotation_slew_rate: float = 4.0
+    trigger_deadband: float = 0.05
+    trigger_expo: float = 0.0
+    trigger_slew_rate: float = 4.0
+    input_lut_size: int = 1025                # entries per response-curve lookup table
+
+    # Autonomous trajectories (limits used when generating them offline)
+    auto_max_speed_mps: float = 2.0
+    auto_max_acceleration_mps2: float = 2.0
+    auto_translation_kp: float = 2.0          # m/s of correction per meter of X/Y error while following
+    auto_heading_kp: float = 3.0              # rad/s of correction per radian of heading error
+
+    # Live tuning (gains edited under /Tuning on NetworkTables, applied in the background)
+    live_tuning: bool = True
+    tuning_debounce_s: float = 0.25           # a group is applied once its entries stop changing this long
+
+    # Startup
+    device_config_cache_path: str = "/home/lvuser/device_config_cache.json"  # fingerprints of applied configs
+
+    # Loop timing
+    loop_period_s: float = 0.02               # robot loop budget; longer loops are reported as overruns
+    benchmark_loop_budget_share: float = 0.25 # tests fail if scheduler p99 exceeds this share of the loop
+    benchmark_regression_factor: float = 2.0  # benchmarks warn when p99 grows this much over the baseline
+
+    # Telemetry
+    telemetry_level: str = "debug"            # "competition" drops debug topics
+    telemetry_epsilon: float = 1e-3           # publish only when a value moves more than this
+    telemetry_period_s: float = 0.02          # fastest publish rate for normal topics
+    telemetry_debug_period_s: float = 0.1     # fastest publish rate for debug topics
+
+    # Data logging
+    datalog_usb_directory: str = "/u/logs"    # preferred location on the roboRIO (USB stick)
+    datalog_fallback_directory: str = "/home/lvuser/logs"
+    datalog_in_simulation: bool = False       # also write logs when running in the simulator
+
+    # Debugging
+    debug_count_allocations: bool = False     # tracemalloc per-loop allocation counter (slow, never in matches)
+
+    def problems(self):
+        yield from _positive(
+            self, "First_Cruise_Velocity", "First_Acceleration", "First_Gear_Ratio",
+            "swerve_max_speed_mps", "swerve_max_angular_speed_rps", "swerve_max_module_speed_mps",
+            "odometry_frequency_hz", "pose_history_s", "drive_slew_rate", "rotation_slew_rate",
+            "trigger_slew_rate", "auto_max_speed_mps", "auto_max_acceleration_mps2", "loop_period_s",
+            "telemetry_period_s", "telemetry_debug_period_s", "sysid_ramp_rate_v_per_s", "sysid_timeout_s",
+            "tuning_debounce_s", "remote_sensor_frequency_hz", "can_status_period_s", "control_keep_alive_s",
+        )
+        for name in ("First_ks", "First_kv", "First_ka", "First_kp", "First_ki", "First_kd", "First_Jerk",
+                     "steer_kp", "steer_kd", "drive_ks", "drive_kv", "drive_kp", "telemetry_epsilon",
+                     "control_tolerance", "auto_translation_kp", "auto_heading_kp"):
+            if getattr(self, name) < 0:
+                yield f"{name} must not be negative, got {getattr(self, name)!r}"
+        for name in ("drive_deadband", "rotation_deadband", "trigger_deadband"):
+            yield from _between(self, name, 0.0, 0.5)
+        for name in ("drive_expo", "rotation_expo", "trigger_expo", "benchmark_loop_budget_share", "can_bus_budget"):
+            yield from _between(self, name, 0.0, 1.0)
+        yield from _between(self, "sysid_step_voltage", 0.0, 12.0)
+        yield from _between(self, "odometry_frequency_hz", 1, 1000)
+        if self.input_lut_size < 2:
+            yield f"input_lut_size must be at least 2, got {self.input_lut_size}"
+        if self.swerve_max_module_speed_mps < self.swerve_max_speed_mps:
+            yield "swerve_max_module_speed_mps must be at least swerve_max_speed_mps"
+        for name in ("odometry_std_devs", "vision_std_devs"):
+            values = getattr(self, name)
+            if len(values) != 3 or not all(value > 0 for value in values):
+                yield f"{name} must be three positive numbers (x, y, heading), got {values!r}"
+        if self.second_motor_limit_mode not in ("dio", "talon"):
+            yield f"second_motor_limit_mode must be 'dio' or 'talon', got {self.second_motor_limit_mode!r}"
+        if self.telemetry_level not in ("debug", "competition"):
+            yield f"telemetry_level must be 'debug' or 'competition', got {self.telemetry_level!r}"
 
-SW = namedtuple("Data", sw_data.keys())(**sw_data)
 
 # -----------------------------
-# Swerve module positions (front-left & front-right only)
+# Derived constants (conversion factors, computed once from PHYS and MECH)
 # -----------------------------
-front_left_location  = Translation2d(float(PHYS.wheelbase_meters) / 2,  float(PHYS.trackwidth_meters) / 2)
-front_right_location = Translation2d(float(PHYS.wheelbase_meters) / 2, -float(PHYS.trackwidth_meters) / 2)
+@dataclass(frozen=True, slots=True)
+class Derived:
+    wheel_circumference_meters: float
+    drive_rotations_per_meter: float      # drive motor rotations per meter of travel
+    drive_meters_per_rotation: float
+    steer_rotations_per_radian: float     # steer Talon positions are wheel rotations
+    steer_radians_per_rotation: float
+
+    @classmethod
+    def compute(cls, phys, mech):
+        circumference = math.pi * phys.wheel_diameter_meters
+        drive_rotations_per_meter = mech.swerve_module_driving_gearing_ratio / circumference
+        return cls(
+            wheel_circumference_meters=circumference,
+            drive_rotations_per_meter=drive_rotations_per_meter,
+            drive_meters_per_rotation=1.0 / drive_rotations_per_meter,
+            steer_rotations_per_radian=1.0 / (2 * math.pi),
+            steer_radians_per_rotation=2 * math.pi,
+        )
+
 
 # -----------------------------
-# Swerve drive kinematics object
+# Profiles
 # -----------------------------
-SWERVE_KINEMATICS = SwerveDrive2Kinematics(front_left_location, front_right_location)
+GROUPS = {"PHYS": Physical, "MECH": Mechanical, "ELEC": Electrical, "OP": Operation, "SW": Software}
+
+
+def selected_profile():
+    """
+    The profile named by ROBOT_PROFILE or the roboRIO selector file, else
+    "simulation" off the robot, or None for the defaults.
+    """
+    name = os.environ.get("ROBOT_PROFILE")
+    if name is None and os.path.exists(PROFILE_SELECTOR_PATH):
+        with open(PROFILE_SELECTOR_PATH) as f:
+            name = f.read().strip()
+    if name is None and not wpilib.RobotBase.isReal():
+        name = "simulation"
+    return name or None
+
+
+def load_profile(name, directory=PROFILE_DIRECTORY):
+    """Reads deploy/profiles/<name>.toml into {group: {field: value}}."""
+    path = os.path.join(directory, f"{name}.toml")
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"robot profile {name!r} not found at {path}") from None
+
+
+def build(overrides=None):
+    """
+    Builds every group from its defaults plus `overrides` ({group: {field:
+    value}}, as in a profile), validated. Returns {group: instance}.
+    """
+    overrides = overrides or {}
+    unknown = set(overrides) - set(GROUPS)
+    if unknown:
+        raise ValueError(f"unknown constants groups {sorted(unknown)}, expected {sorted(GROUPS)}")
+
+    groups = {}
+    for group, cls in GROUPS.items():
+        fields = overrides.get(group, {})
+        unknown = set(fields) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"{group} has no fields {sorted(unknown)}")
+        groups[group] = cls(**fields)
+    return groups
+
+
+def apply(overrides):
+    """
+    Rebuilds this module's constants with more overrides on top of the
+    current profile. Only useful before any other module has done
+    `from constants import ...` (tools/sweep.py does this in each run).
+    """
+    merged = {group: dict(fields) for group, fields in _overrides.items()}
+    for group, fields in overrides.items():
+        merged.setdefault(group, {}).update(fields)
+    _publish(merged)
+
+
+def _publish(overrides):
+    global _overrides, PHYS, MECH, ELEC, OP, SW, DERIVED, SWERVE_MODULE_LOCATIONS, SWERVE_KINEMATICS
+    groups = build(overrides)
+    _overrides = overrides
+    PHYS, MECH, ELEC, OP, SW = (groups[group] for group in ("PHYS", "MECH", "ELEC", "OP", "SW"))
+    DERIVED = Derived.compute(PHYS, MECH)
+
+    # -----------------------------
+    # Swerve module positions (front-left, front-right, back-left, back-right)
+    # -----------------------------
+    SWERVE_MODULE_LOCATIONS = (
+        ( PHYS.wheelbase_meters / 2,  PHYS.trackwidth_meters / 2),  # Front Left
+        ( PHYS.wheelbase_meters / 2, -PHYS.trackwidth_meters / 2),  # Front Right
+        (-PHYS.wheelbase_meters / 2,  PHYS.trackwidth_meters / 2),  # Back Left
+        (-PHYS.wheelbase_meters / 2, -PHYS.trackwidth_meters / 2),  # Back Right
+    )
+
+    # -----------------------------
+    # Swerve drive kinematics object
+    # -----------------------------
+    SWERVE_KINEMATICS = SwerveDrive4Kinematics(*(Translation2d(x, y) for x, y in SWERVE_MODULE_LOCATIONS))
+
+
+PROFILE = selected_profile()
+_publish(load_profile(PROFILE) if PROFILE else {})
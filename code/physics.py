@@ -0,0 +1,178 @@
+"""
+Simulated robot physics, loaded by pyfrc when the robot runs in the simulator
+or under `robotpy test`.
+
+Every TalonFX is driven through its Phoenix 6 sim state: the voltage the
+motor is commanding goes into a WPILib DC motor model, and the resulting
+rotor position and velocity are written back. The swerve modules also feed
+their CANcoders and the gyro, the first motor is a single Motion Magic axis,
+and the second motor's travel closes the limit switch. A simulated camera
+sees the true pose and feeds the vision subsystem late, noisy frames.
+
+Nothing here waits on the wall clock: each update_sim() advances the models by
+exactly tm_diff, so pyfrc's stepped timing runs a whole match in seconds. That
+is not lockstep simulation, though. The closed loops that run on the Talons
+(steer PositionVoltage, drive VelocityVoltage, the first motor's Motion Magic)
+are computed by Phoenix's simulated devices on their own wall-clock thread, and
+Phoenix has no way to step them. Unpaced runs therefore give those loops less
+(and varying) real time per simulated second, so closed-loop results differ
+from run to run; only open-loop outputs (VoltageOut, DutyCycleOut) are
+deterministic. Anything that needs closed-loop behavior to match the robot
+should pace simulated time to real time, as tools/sweep.py does by default
+and the closed-loop checks in tests/physics_test.py do.
+"""
+
+import math
+
+import wpilib
+import wpilib.simulation
+from phoenix6 import unmanaged
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.kinematics import SwerveModuleState
+from wpimath.system.plant import DCMotor, LinearSystemId
+
+from constants import MECH, PHYS, SW, SWERVE_KINEMATICS
+from util.SimulatedVision import SimulatedVision
+
+# Moments of inertia seen at each mechanism's output (kg*m^2)
+DRIVE_MOI = 0.025
+STEER_MOI = 0.004
+FIRST_MOTOR_MOI = 0.001
+SECOND_MOTOR_MOI = 0.001
+
+WHEEL_RADIUS_METERS = PHYS.wheel_diameter_meters / 2
+
+# The second motor closes its limit switch this far from where it starts
+SECOND_MOTOR_LIMIT_ROTATIONS = 5.0
+
+
+class TalonFXSim:
+    """One TalonFX and the DC motor model behind it."""
+
+    def __init__(self, talon, motor, moi, gearing):
+        self.talon = talon
+        self.sim_state = talon.sim_state
+        self.gearing = gearing
+        self.model = wpilib.simulation.DCMotorSim(
+            LinearSystemId.DCMotorSystem(motor, moi, gearing), motor
+        )
+
+    def update(self, battery_voltage, tm_diff):
+        self.sim_state.set_supply_voltage(battery_voltage)
+        self.model.setInputVoltage(self.sim_state.motor_voltage)
+        self.model.update(tm_diff)
+
+        # Phoenix reports rotor rotations; the model tracks the mechanism
+        self.sim_state.set_raw_rotor_position(self.model.getAngularPositionRotations() * self.gearing)
+        self.sim_state.set_rotor_velocity(self.model.getAngularVelocity() / (2 * math.pi) * self.gearing)
+
+    @property
+    def position_rotations(self):
+        """Mechanism position in rotations."""
+        return self.model.getAngularPositionRotations()
+
+    @property
+    def velocity_rad_per_s(self):
+        """Mechanism velocity in radians per second."""
+        return self.model.getAngularVelocity()
+
+
+class SwerveModuleSim:
+    """Drive and steer motors of one swerve module, plus its CANcoder."""
+
+    def __init__(self, module):
+        self.module = module
+        self.drive = TalonFXSim(
+            module.drive_motor, DCMotor.falcon500(1), DRIVE_MOI, MECH.swerve_module_driving_gearing_ratio
+        )
+        self.steer = TalonFXSim(
+            module.steer_motor, DCMotor.falcon500(1), STEER_MOI, MECH.swerve_module_steering_gearing_ratio
+        )
+        self.encoder_state = module.abs_encoder.sim_state
+
+    def update(self, battery_voltage, tm_diff):
+        self.drive.update(battery_voltage, tm_diff)
+        self.steer.update(battery_voltage, tm_diff)
+
+        # The CANcoder sits on the steering axis, offset by the module's mounting angle;
+        # the steer Talon fuses it with the rotor itself
+        self.encoder_state.set_supply_voltage(battery_voltage)
+        self.encoder_state.set_raw_position((self.angle + self.module.angle_offset) / (2 * math.pi))
+        self.encoder_state.set_velocity(self.steer.velocity_rad_per_s / (2 * math.pi))
+
+    @property
+    def angle(self):
+        """Wheel angle in radians."""
+        return self.steer.position_rotations * 2 * math.pi
+
+    @property
+    def state(self):
+        speed = self.drive.velocity_rad_per_s * WHEEL_RADIUS_METERS
+        return SwerveModuleState(speed, Rotation2d(self.angle))
+
+
+class PhysicsEngine:
+    """
+    pyfrc physics model for the whole robot.
+
+    The swerve chassis motion is integrated from the simulated module states
+    through the drive kinematics, so the true pose (shown on the sim Field2d)
+    and the gyro follow whatever the modules actually do, including any
+    scrub from badly aimed wheels.
+    """
+
+    def __init__(self, physics_controller, robot):
+        self.physics_controller = physics_controller
+        container = robot.container
+
+        swerve = container.swervedrivesub
+        self.modules = [SwerveModuleSim(module) for module in swerve.modules]
+        self.gyro = wpilib.simulation.ADIS16470_IMUSim(swerve.gyro)
+        self.pose = Pose2d()
+
+        self.first_motor = TalonFXSim(
+            container.firstmotorsub.first_motor, DCMotor.falcon500(1), FIRST_MOTOR_MOI, SW.First_Gear_Ratio
+        )
+
+        self.second_motor = TalonFXSim(
+            container.secondmotorsub.second_motor, DCMotor.falcon500(1), SECOND_MOTOR_MOI, 1.0
+        )
+        self.limit_switch = wpilib.simulation.DIOSim(container.secondmotorsub.limit_switch)
+
+        self.vision = SimulatedVision()
+        container.visionsub.source = self.vision
+
+    def update_sim(self, now, tm_diff):
+        # Phoenix only drives simulated motors while it is being fed an enable
+        if wpilib.DriverStation.isEnabled():
+            unmanaged.feed_enable(0.1)
+
+        battery_voltage = wpilib.RobotController.getBatteryVoltage()
+
+        for module in self.modules:
+            module.update(battery_voltage, tm_diff)
+        self.first_motor.update(battery_voltage, tm_diff)
+        self.second_motor.update(battery_voltage, tm_diff)
+
+        # Normally-open switch with a pull-up: reads False while pressed
+        pressed = self.second_motor.position_rotations >= SECOND_MOTOR_LIMIT_ROTATIONS
+        self.limit_switch.setValue(not pressed)
+        # Same switch on the Talon's forward limit input (used when SW.second_motor_limit_mode is "talon")
+        self.second_motor.sim_state.set_forward_limit(pressed)
+
+        # Chassis motion from the measured module states
+        speeds = SWERVE_KINEMATICS.toChassisSpeeds(tuple(module.state for module in self.modules))
+        heading = self.pose.rotation().radians()
+        cos, sin = math.cos(heading), math.sin(heading)
+        heading += speeds.omega * tm_diff
+        self.pose = Pose2d(
+            self.pose.X() + (speeds.vx * cos - speeds.vy * sin) * tm_diff,
+            self.pose.Y() + (speeds.vx * sin + speeds.vy * cos) * tm_diff,
+            Rotation2d(heading),
+        )
+        self.physics_controller.field.setRobotPose(self.pose)
+
+        self.gyro.setGyroAngleZ(math.degrees(heading))
+        self.gyro.setGyroRateZ(math.degrees(speeds.omega))
+
+        self.vision.capture(wpilib.Timer.getFPGATimestamp(), self.pose)
@@ -7,11 +7,15 @@
 
 import logging
 log = logging.Logger('P212-robot')
+import time
 
 import wpilib
 import commands2
 
 import robotcontainer
+import constants
+from constants import SW
+from util.AllocationCounter import AllocationCounter
 
 
 class Robot(commands2.TimedCommandRobot):
@@ -26,18 +30,81 @@ class Robot(commands2.TimedCommandRobot):
         used for any initialization code.
         """
         self.autonomousCommand = None
+        log.info(f"constants profile: {constants.PROFILE or 'defaults'}")
 
         # Instantiate our RobotContainer.  This will perform all our button
         # bindings, and put our autonomous chooser on the dashboard.
+        start = time.perf_counter()
         self.container = robotcontainer.RobotContainer()
+        log.info(
+            f"RobotContainer built in {(time.perf_counter() - start) * 1000:.0f} ms "
+            f"(device configs {self.container.configs.total_seconds * 1000:.0f} ms)"
+        )
+
+        # Debug mode: count objects allocated per loop to catch GC pressure
+        self.allocation_counter = AllocationCounter(SW.debug_count_allocations)
+
+        # Timed entry points for the per-loop work done here in Robot
+        timing = self.container.timing
+        self._refresh_signals = timing.timed("SignalRegistry.refresh", self.container.signals.refresh)
+        self._update_inputs = timing.timed("DriverInput.update", self.container.driver_input.update)
+        self._poll_tuning = timing.timed("LiveTuner.poll", self.container.tuner.poll)
+        self._flush_telemetry = timing.timed("TelemetrySubsystem.flush", self.container.telemetrysub.flush)
+
+        # Subsystem mode hooks, resolved once so each loop just walks a list
+        registry = self.container.registry
+        self._dispatch_robot_periodic = timing.timed("Robot.robotPeriodic", registry.dispatcher("robotPeriodic"))
+        self._dispatch_disabled_periodic = timing.timed("Robot.disabledPeriodic", registry.dispatcher("disabledPeriodic"))
+        self._dispatch_autonomous_periodic = timing.timed("Robot.autonomousPeriodic", registry.dispatcher("autonomousPeriodic"))
+        self._dispatch_teleop_periodic = timing.timed("Robot.teleopPeriodic", registry.dispatcher("teleopPeriodic"))
+        self._dispatch_test_periodic = timing.timed("Robot.testPeriodic", registry.dispatcher("testPeriodic"))
+
+        # The command scheduler runs in its own periodic callback kSchedulerOffset
+        # after robotPeriodic; close the loop's measurements right after it. The
+        # main callback's timing section ends with each mode's periodic.
+        self.addPeriodic(self._end_loop, self.getPeriod(), self.kSchedulerOffset + 0.0005)
 
         log.info('robot initialized')
 
+    def robotPeriodic(self) -> None:
+        """
+        Refreshes every status signal in one batch, snapshots the controller
+        and picks up gain edits, before the command scheduler runs.
+        """
+        self.container.timing.begin_loop()
+        self._refresh_signals()
+        self._update_inputs()
+        self._poll_tuning()
+        self._dispatch_robot_periodic()
+
+    def _end_loop(self) -> None:
+        """
+        Publishes this loop's telemetry, closes its timing and allocation
+        counts and logs the loop. Loop timing stats set by end_loop() go out
+        with the next flush.
+        """
+        self._flush_telemetry()
+        self.container.timing.end_loop()
+        self.container.log_loop()
+        self.allocation_counter.mark_loop()
+
+    def disabledInit(self) -> None:
+        self.container.rotate_input_recording()
+        self._run_hooks("disabledInit")
+
+    def disabledPeriodic(self) -> None:
+        self._dispatch_disabled_periodic()
+        self.container.timing.pause_loop()
+
+    def disabledExit(self) -> None:
+        self._run_hooks("disabledExit")
+
     def autonomousInit(self) -> None:
         """
         This method runs the autonomous command selected by your
         RobotContainer class.
         """
+        self._run_hooks("autonomousInit")
         self.autonomousCommand = self.container.get_autonomous_command()
 
         # schedule the autonomous command, if any
@@ -46,26 +113,44 @@ class Robot(commands2.TimedCommandRobot):
         else:
             log.warning("No autonomous command")
 
+    def autonomousPeriodic(self) -> None:
+        self._dispatch_autonomous_periodic()
+        self.container.timing.pause_loop()
+
+    def autonomousExit(self) -> None:
+        self._run_hooks("autonomousExit")
+
     def teleopInit(self) -> None:
         # Cancel the running autonomous command, if any
         if self.autonomousCommand is not None:
             self.autonomousCommand.cancel()
 
-        # If any subsystem has a teleopInit() method, run that
-        for ss in self.container.all_subsystems():
-            if hasattr(ss, "teleopInit"):
-                ss.teleopInit()
+        self._run_hooks("teleopInit")
 
     def teleopPeriodic(self) -> None:
         """This function is called periodically during operator control"""
-        # If any subsystem has a teleopPeriodic() method, run that
-        for ss in self.container.all_subsystems():
-            if hasattr(ss, "teleopPeriodic"):
-                ss.teleopPeriodic()
+        self._dispatch_teleop_periodic()
+        self.container.timing.pause_loop()
+
+    def teleopExit(self) -> None:
+        self._run_hooks("teleopExit")
 
     def testInit(self) -> None:
         # Cancels all running commands at the start of test mode
         commands2.CommandScheduler.getInstance().cancelAll()
+        self._run_hooks("testInit")
+
+    def testPeriodic(self) -> None:
+        self._dispatch_test_periodic()
+        self.container.timing.pause_loop()
+
+    def testExit(self) -> None:
+        self._run_hooks("testExit")
+
+    def _run_hooks(self, name) -> None:
+        """Runs one mode transition hook on every subsystem that defines it."""
+        for hook in self.container.registry.hooks(name):
+            hook()
 
 
 if __name__ == "__main__":
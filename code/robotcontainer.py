@@ -6,6 +6,8 @@
 
 import logging
 log = logging.Logger('P212-robot')
+import os
+import time
 import wpilib
 import commands2
 from commands2.button import Trigger
@@ -13,18 +15,33 @@ from constants import OP
 #from wpilib import XboxController
 from wpilib import PS5Controller
 from constants import ELEC, SW, MECH
+from util.SignalRegistry import SignalRegistry
+from util.OutputRegistry import OutputRegistry
+from util.LoopTiming import LoopTiming
+from util.DataLogger import DataLogger
+from util.DeviceConfigService import ConfigWorker, DeviceConfigService
+from util.SubsystemRegistry import SubsystemRegistry
+from util.InputShaping import DriverInput
+from util.InputRecording import InputRecorder
+from util.LiveTuning import LiveTuner
 
 # Subsystems
 import subsystems.FirstMotorSubsystem
 import subsystems.SecondMotorSubsystem
 import subsystems.SmartDashboardSubsystem
 import subsystems.SwerveDriveSubsystem
+import subsystems.TelemetrySubsystem
+import subsystems.AutonomousSubsystem
+import subsystems.VisionSubsystem
+import subsystems.CANBusSubsystem
 
 # Commands
 from commands.FirstMotorCommands import ForwardSpin, ReverseSpin, StopSpin, MoveToPosition
 from commands.SecondMotorCommands import TriggerSpin, DisplayEncoderValue
 from commands.SmartDashboardCommands import IncrementNumber
 from commands.SwerveDriveCommand import SwerveDriveCommand
+from commands.TrajectoryCommands import FollowTrajectory, ResetPose
+from commands.SysIdCommands import SysIdMechanism, SysIdTest, TEST_NAMES
 
 
 class RobotContainer:
@@ -33,26 +50,92 @@ class RobotContainer:
         # Controllers
         #self.Xbox = commands2.button.CommandXboxController(OP.joystick_port)
         self.PS5 = PS5Controller(OP.joystick_port)
-        
+
+        # Shaped stick inputs, read once per loop by Robot and shared by every command
+        self.driver_input = DriverInput(self.PS5)
+
+        # Every status signal is registered here and refreshed once per loop
+        self.signals = SignalRegistry()
+
+        # Every control request is sent through here, which drops repeats
+        self.outputs = OutputRegistry(SW.control_keep_alive_s, SW.control_tolerance, SW.control_dedup)
+
+        # Every subsystem is registered here, along with its mode hooks
+        self.registry = SubsystemRegistry()
+
+        # Every dashboard publisher is created through the telemetry subsystem
+        self.telemetrysub = self.registry.register(subsystems.TelemetrySubsystem.TelemetrySubsystemClass())
+
+        # Times every periodic, command and trigger poll, and attributes overruns
+        self.timing = LoopTiming(self.telemetrysub, SW.loop_period_s)
+
+        # Device configs are queued by the subsystems and applied together below
+        self.configs = DeviceConfigService(
+            SW.device_config_cache_path if wpilib.RobotBase.isReal() else None
+        )
+
         # Subsystems
-        self.firstmotorsub = subsystems.FirstMotorSubsystem.FirstMotorSubsystemClass()
-        self.secondmotorsub = subsystems.SecondMotorSubsystem.SecondMotorSubsystemClass()
-        self.smartdashboardsub = subsystems.SmartDashboardSubsystem.SmartDashboardSubsystemClass()
-        self.swervedrivesub = subsystems.SwerveDriveSubsystem.SwerveDriveSubsystemClass()
+        register = self.registry.register
+        self.firstmotorsub = register(subsystems.FirstMotorSubsystem.FirstMotorSubsystemClass(self.signals, self.outputs, self.telemetrysub, self.configs))
+        self.secondmotorsub = register(subsystems.SecondMotorSubsystem.SecondMotorSubsystemClass(self.signals, self.outputs, self.telemetrysub, self.configs))
+        self.smartdashboardsub = register(subsystems.SmartDashboardSubsystem.SmartDashboardSubsystemClass(self.telemetrysub))
+        self.swervedrivesub = register(subsystems.SwerveDriveSubsystem.SwerveDriveSubsystemClass(self.signals, self.outputs, self.telemetrysub, self.configs))
+        self.autosub = register(subsystems.AutonomousSubsystem.AutonomousSubsystemClass())
+        self.visionsub = register(subsystems.VisionSubsystem.VisionSubsystemClass(self.swervedrivesub, self.telemetrysub))
+        self.canbussub = register(subsystems.CANBusSubsystem.CANBusSubsystemClass(self.telemetrysub, self.outputs))
+
+        # Apply all device configs concurrently, skipping unchanged ones
+        self.configs.apply_all()
+
+        # Status signals at the rates their consumers need, the rest off
+        self.configureCANBudget()
+
+        # Odometry is seeded from the configured sensors at their final rates
+        self.swervedrivesub.odometry.prime()
+        if wpilib.RobotBase.isReal():
+            self.swervedrivesub.odometry.start()
 
         #Reset Gyro to 0 when robot turns on
         #self.swervedrivesub.gryo.reset()
 
 
         # Set default command for second motor
-        #self.secondmotorsub.setDefaultCommand(TriggerSpin(self.secondmotorsub, self.PS5))
+        #self.secondmotorsub.setDefaultCommand(TriggerSpin(self.secondmotorsub, self.driver_input))
 
         # Set default command for swerve drive
-        self.swervedrivesub.setDefaultCommand(SwerveDriveCommand(self.swervedrivesub, self.PS5))
+        self.swervedrivesub.setDefaultCommand(
+            self.timing.instrument_command(SwerveDriveCommand(self.swervedrivesub, self.driver_input))
+        )
+
+        for ss in self.registry.subsystems:
+            self.timing.instrument_subsystem(ss)
 
         # Configure buttons for first motor
         self.configureButtonBindings()
 
+        # Build every auto routine now, so autonomousInit only picks one
+        self.configureAutonomous()
+
+        # Binary match log, flushed to disk from a background thread
+        self.configureDataLog()
+
+        # Characterization tests, run from the dashboard
+        self.configureSysId()
+
+        # Gains editable from the dashboard, applied without stalling the loop
+        self.configureTuning()
+
+    def configureCANBudget(self):
+        bus = self.canbussub
+        swerve = self.swervedrivesub
+        bus.require(self.signals.signals, 1.0 / SW.loop_period_s, "robot loop")
+        bus.require(swerve.odometry.signals.signals, SW.odometry_frequency_hz, "odometry")
+        for module in swerve.modules:
+            bus.require(module.remote_sensor_signals, SW.remote_sensor_frequency_hz, f"{module.name}/steer")
+            bus.add_devices(module.drive_motor, module.steer_motor, module.abs_encoder)
+        bus.add_devices(self.firstmotorsub.first_motor, self.secondmotorsub.second_motor)
+        bus.apply()
+
     def configureButtonBindings(self):
         # Xbox controller example bindings
         # self.Xbox.leftBumper().onTrue(ForwardSpin(self.motorsub))
@@ -61,39 +144,165 @@ class RobotContainer:
         # self.Xbox.rightBumper().onFalse(StopSpin(self.motorsub))
         
         # PS5 controller bindings
+        # Buttons come from the per-loop input snapshot, so a trigger poll is
+        # a bit test; polls and bound commands are wrapped in timing probes
+        timed = self.timing.timed_condition
+        condition = self.driver_input.condition
+        cmd = self.timing.instrument_command
+        Button = PS5Controller.Button
+
+        def button(name, number):
+            return Trigger(timed(name, condition(number)))
+
         # L1 button: first motor forward
-        Trigger(lambda: self.PS5.getL1Button()).onTrue(ForwardSpin(self.firstmotorsub))
-        Trigger(lambda: self.PS5.getL1Button()).onFalse(StopSpin(self.firstmotorsub))
+        l1 = button("L1", Button.kL1)
+        l1.onTrue(cmd(ForwardSpin(self.firstmotorsub)))
+        l1.onFalse(cmd(StopSpin(self.firstmotorsub)))
 
         # R1 button: first motor reverse
-        Trigger(lambda: self.PS5.getR1Button()).onTrue(ReverseSpin(self.firstmotorsub))
-        Trigger(lambda: self.PS5.getR1Button()).onFalse(StopSpin(self.firstmotorsub))
+        r1 = button("R1", Button.kR1)
+        r1.onTrue(cmd(ReverseSpin(self.firstmotorsub)))
+        r1.onFalse(cmd(StopSpin(self.firstmotorsub)))
 
         # X button: smart dashboard command 
-        Trigger(lambda: self.PS5.getCrossButton()).onTrue(IncrementNumber(self.smartdashboardsub))
+        button("Cross", Button.kCross).onTrue(cmd(IncrementNumber(self.smartdashboardsub)))
 
         # O button: update second motor encoder value onto smart dashboard
-        Trigger(lambda: self.PS5.getCircleButton()).onTrue(DisplayEncoderValue(self.secondmotorsub))
+        button("Circle", Button.kCircle).onTrue(cmd(DisplayEncoderValue(self.secondmotorsub)))
 
         # Square button: Move first motor to rotation with PID
-        Trigger(lambda: self.PS5.getSquareButton()).onTrue(MoveToPosition(self.firstmotorsub))
+        button("Square", Button.kSquare).onTrue(cmd(MoveToPosition(self.firstmotorsub)))
 
         
 
         # Example for other buttons (X) if needed
         # Trigger(lambda: self.PS5.getCrossButton()).onTrue(Command(self.sub))
 
-    def all_subsystems(self):
+    def configureAutonomous(self):
+        auto = self.autosub
+        swerve = self.swervedrivesub
+        cmd = self.timing.instrument_command
+
+        auto.add_routine("Do Nothing", commands2.cmd.none(), default=True)
+
+        forward = auto.get_trajectory("forward_2m")
+        s_curve = auto.get_trajectory("s_curve")
+        back_to_start = auto.get_trajectory("back_to_start")
+
+        if forward is not None:
+            auto.add_routine("Drive Forward", cmd(commands2.SequentialCommandGroup(
+                ResetPose(swerve, forward),
+                FollowTrajectory(swerve, forward),
+            )))
+
+        if s_curve is not None:
+            auto.add_routine("S-Curve", cmd(commands2.SequentialCommandGroup(
+                ResetPose(swerve, s_curve),
+                FollowTrajectory(swerve, s_curve),
+            )))
+
+        if forward is not None and back_to_start is not None:
+            auto.add_routine("Out and Back", cmd(commands2.SequentialCommandGroup(
+                ResetPose(swerve, forward),
+                FollowTrajectory(swerve, forward),
+                MoveToPosition(self.firstmotorsub),
+                FollowTrajectory(swerve, back_to_start),
+            )))
+
+    def configureDataLog(self):
+        if os.path.isdir(os.path.dirname(SW.datalog_usb_directory)):
+            directory = SW.datalog_usb_directory
+        else:
+            directory = SW.datalog_fallback_directory
+        if wpilib.RobotBase.isSimulation():
+            directory = "logs"
+        enabled = wpilib.RobotBase.isReal() or SW.datalog_in_simulation
+        self.datalog = DataLogger(directory, enabled)
+
+        # Driver input goes next to the data log, for replay in simulation
+        self.recording_directory = directory
+        self.recording_paths = []
+        if self.datalog.enabled:
+            self.driver_input.recorder = self._new_input_recorder()
+
+        self.log_axes = self.datalog.add_double_array("/PS5/Axes", 6, "LeftX, LeftY, RightX, RightY, L2, R2")
+        self.log_buttons = self.datalog.add_integer("/PS5/Buttons")
+        self.log_setpoints = self.datalog.add_double_array("/Swerve/Setpoints", 8, "speed x4 (m/s), angle x4 (rad)")
+        self.log_measured = self.datalog.add_double_array("/Swerve/Measured", 8, "speed x4 (m/s), angle x4 (rad)")
+        self.log_gyro_yaw = self.datalog.add_double("/Swerve/GyroYaw")
+        self.log_first_motor_velocity = self.datalog.add_double("/FirstMotor/Velocity")
+        self.log_loop_time = self.datalog.add_double("/Robot/LoopTimeMs")
+
+    def _new_input_recorder(self):
+        name = time.strftime(f"inputs_%Y%m%d_%H%M%S_{len(self.recording_paths) + 1}.inp")
+        self.recording_paths.append(os.path.join(self.recording_directory, name))
+        return InputRecorder(self.recording_paths[-1])
+
+    def rotate_input_recording(self):
         """
-        Return every attribute of this RobotContainer which is an instance of
-        a commands2.Subsystem subclass.
+        Closes the driver input recording, writing out its last partial
+        chunk, and starts the next one. Called on disable, so a match is on
+        disk before the robot is powered off.
         """
-        subsystems_list = []
-        for attribute_name in dir(self):
-            attribute = getattr(self, attribute_name)
-            if isinstance(attribute, commands2.Subsystem):
-                subsystems_list.append(attribute)
-        return subsystems_list
+        recorder = self.driver_input.recorder
+        if recorder is None or not recorder.frames:
+            return
+        recorder.close()
+        self.driver_input.recorder = self._new_input_recorder()
+
+    def configureSysId(self):
+        mechanisms = (
+            SysIdMechanism("FirstMotor", self.firstmotorsub,
+                           self.firstmotorsub.set_voltage, self.firstmotorsub.get_sysid_state),
+            SysIdMechanism("SwerveDrive", self.swervedrivesub,
+                           self.swervedrivesub.set_drive_voltage, self.swervedrivesub.get_drive_sysid_state),
+            SysIdMechanism("SwerveSteer", self.swervedrivesub,
+                           self.swervedrivesub.set_steer_voltage, self.swervedrivesub.get_steer_sysid_state),
+        )
+        cmd = self.timing.instrument_command
+        for mechanism in mechanisms:
+            log_entry = self.datalog.add_double_array(
+                f"/SysId/{mechanism.name}", 4, "test, voltage (V), position (rot), velocity (rot/s)"
+            )
+            for test, test_name in TEST_NAMES.items():
+                wpilib.SmartDashboard.putData(
+                    f"SysId/{mechanism.name} {test_name}", cmd(SysIdTest(mechanism, test, log_entry))
+                )
+
+    def configureTuning(self):
+        self.tuning_worker = ConfigWorker(self.configs)
+        self.tuner = LiveTuner(self.tuning_worker, SW.tuning_debounce_s, wpilib.Timer.getFPGATimestamp)
+        if not SW.live_tuning:
+            return
+
+        first_motor = (("first_motor", self.firstmotorsub.first_motor),)
+        config = self.firstmotorsub.config
+        self.tuner.add("FirstMotor/Slot0", first_motor, config.slot0,
+                       {"kS": "k_s", "kV": "k_v", "kA": "k_a", "kP": "k_p", "kI": "k_i", "kD": "k_d"})
+        self.tuner.add("FirstMotor/MotionMagic", first_motor, config.motion_magic, {
+            "CruiseVelocity": "motion_magic_cruise_velocity",
+            "Acceleration": "motion_magic_acceleration",
+            "Jerk": "motion_magic_jerk",
+        })
+
+        # One set of gains for all four modules
+        modules = self.swervedrivesub.modules
+        self.tuner.add("SwerveSteer/Slot0", [(f"{m.name}/steer", m.steer_motor) for m in modules],
+                       modules[0].steer_config.slot0, {"kP": "k_p", "kD": "k_d"})
+        self.tuner.add("SwerveDrive/Slot0", [(f"{m.name}/drive", m.drive_motor) for m in modules],
+                       modules[0].drive_config.slot0, {"kS": "k_s", "kV": "k_v", "kP": "k_p"})
+
+    def log_loop(self):
+        """Appends this loop's inputs, setpoints and measurements to the data log."""
+        self.datalog.set_time(wpilib.RobotController.getFPGATime())
+
+        self.log_axes.append(self.driver_input.axes)
+        self.log_buttons.append(self.driver_input.buttons)
+        self.log_setpoints.append(self.swervedrivesub.setpoints)
+        self.log_measured.append(self.swervedrivesub.get_measured_states())
+        self.log_gyro_yaw.append(self.swervedrivesub.get_gyro_yaw())
+        self.log_first_motor_velocity.append(self.firstmotorsub.get_velocity())
+        self.log_loop_time.append(self.timing.last_loop_ns / 1e6)
 
     def get_autonomous_command(self):
-        pass
+        return self.autosub.get_selected()
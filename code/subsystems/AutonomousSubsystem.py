@@ -0,0 +1,47 @@
+import logging
+log = logging.Logger('P212-robot')
+import os
+import commands2
+import wpilib
+
+from util import TrajectoryStore
+
+
+class AutonomousSubsystemClass(commands2.Subsystem):
+    """
+    Holds the precomputed trajectories and the prebuilt auto routines.
+
+    Trajectories are generated offline by tools/generate_trajectories.py and
+    memory-mapped from deploy/trajectories at construction. RobotContainer
+    builds every routine's command once at startup and registers it here, so
+    autonomousInit only has to look up the chooser's selection.
+    """
+
+    def __init__(self, directory=None) -> None:
+        super().__init__()
+        self.setName("AutonomousSubsystem")
+
+        if directory is None:
+            directory = os.path.join(wpilib.getDeployDirectory(), "trajectories")
+        self.trajectories = TrajectoryStore.load_all(directory)
+        log.info(f"loaded {len(self.trajectories)} trajectories from {directory}")
+
+        self.routines = {}
+        self.chooser = wpilib.SendableChooser()
+        wpilib.SmartDashboard.putData("Auto Routine", self.chooser)
+
+    def get_trajectory(self, name):
+        trajectory = self.trajectories.get(name)
+        if trajectory is None:
+            log.error(f"trajectory {name} is missing, run tools/generate_trajectories.py")
+        return trajectory
+
+    def add_routine(self, name, command, default=False):
+        self.routines[name] = command
+        if default:
+            self.chooser.setDefaultOption(name, name)
+        else:
+            self.chooser.addOption(name, name)
+
+    def get_selected(self):
+        return self.routines.get(self.chooser.getSelected())
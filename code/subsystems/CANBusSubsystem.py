@@ -0,0 +1,126 @@
+import logging
+log = logging.Logger('P212-robot')
+import time
+
+import commands2
+import wpilib
+from phoenix6 import BaseStatusSignal, CANBus
+from phoenix6.hardware import ParentDevice, TalonFX
+
+from constants import SW
+
+# Nominal size of one CAN 2.0B frame with an 8-byte payload, before bit stuffing
+FRAME_BITS = 128
+BUS_BITRATE = 1_000_000
+# Phoenix resends each Talon's control request at this rate
+CONTROL_FRAME_HZ = 100.0
+
+
+class _Requirement:
+    __slots__ = ("signal", "frequency_hz", "consumers")
+
+    def __init__(self, signal, frequency_hz, consumer):
+        self.signal = signal
+        self.frequency_hz = frequency_hz
+        self.consumers = [consumer]
+
+
+class CANBusSubsystemClass(commands2.Subsystem):
+    """
+    Budgets the CAN bus: every status signal runs at the rate its fastest
+    consumer needs, and everything nobody reads is turned off.
+
+    RobotContainer declares what each consumer reads with require() (the
+    main loop's signal registry at the loop rate, the odometry registry at
+    the odometry rate, the CANcoders the steer Talons fuse, ...) and lists
+    every Phoenix device with add_devices(). apply() then sets each signal's
+    update frequency in one batch per rate and has Phoenix disable every
+    other status signal on those devices (optimize_bus_utilization).
+
+    The estimated load assumes one frame per signal per update, an upper
+    bound since Phoenix packs several signals into a frame, plus each
+    Talon's control frames. periodic() publishes it next to the load
+    measured by the CAN controller, once every SW.can_status_period_s,
+    along with the set_control() calls per second the output layer made
+    and skipped as repeats. Those are Python-side calls, not frames: Phoenix
+    sends the control frames at their own rate either way.
+    """
+
+    def __init__(self, telemetry, outputs, bus_name="rio") -> None:
+        super().__init__()
+        self.setName("CANBusSubsystem")
+        self.bus = CANBus(bus_name)
+        self._requirements = {}
+        self.devices = []
+        self.estimated_utilization = 0.0
+        self._next_status = 0.0
+        self.outputs = outputs
+        self._last_counts = (0.0, 0, 0)  # time, sent, suppressed at the last publish
+
+        # Estimated load, measured load, transmit buffer full count, receive/transmit error counts,
+        # set_control() calls made and skipped per second
+        self.status_topic = telemetry.add_number_array("CAN Bus")
+
+    def require(self, signals, frequency_hz, consumer):
+        """Declares that `consumer` reads `signals` at `frequency_hz`."""
+        for signal in signals:
+            requirement = self._requirements.get(id(signal))
+            if requirement is None:
+                self._requirements[id(signal)] = _Requirement(signal, frequency_hz, consumer)
+            else:
+                requirement.frequency_hz = max(requirement.frequency_hz, frequency_hz)
+                requirement.consumers.append(consumer)
+
+    def add_devices(self, *devices):
+        """Devices whose unrequired status signals are turned off."""
+        self.devices.extend(devices)
+
+    def apply(self):
+        """Sets every required rate, disables the rest and logs the budget. Blocks; startup only."""
+        start = time.perf_counter()
+        by_rate = {}
+        for requirement in self._requirements.values():
+            by_rate.setdefault(requirement.frequency_hz, []).append(requirement.signal)
+        for frequency_hz, signals in sorted(by_rate.items()):
+            status = BaseStatusSignal.set_update_frequency_for_all(frequency_hz, *signals)
+            if not status.is_ok():
+                log.error(f"could not set {len(signals)} signals to {frequency_hz:g} Hz: {status.name}")
+
+        # Everything without an explicit frequency above is switched off
+        if self.devices:
+            status = ParentDevice.optimize_bus_utilization_for_all(*self.devices)
+            if not status.is_ok():
+                log.error(f"bus utilization optimization failed: {status.name}")
+
+        self.estimated_utilization = self.estimate()
+        log.info(
+            f"CAN budget: {len(self._requirements)} signals on {len(self.devices)} devices, "
+            f"estimated load {self.estimated_utilization:.0%} (set in {(time.perf_counter() - start) * 1000:.0f} ms)"
+        )
+        for frequency_hz, signals in sorted(by_rate.items()):
+            log.info(f"  {frequency_hz:g} Hz: {len(signals)} signals")
+        if self.estimated_utilization > SW.can_bus_budget:
+            log.warning(f"estimated CAN load is over the {SW.can_bus_budget:.0%} budget")
+
+    def estimate(self):
+        """Upper-bound bus load (0..1) from the required rates and the Talons' control frames."""
+        frames_per_s = sum(requirement.frequency_hz for requirement in self._requirements.values())
+        frames_per_s += CONTROL_FRAME_HZ * sum(1 for device in self.devices if isinstance(device, TalonFX))
+        return frames_per_s * FRAME_BITS / BUS_BITRATE
+
+    def periodic(self):
+        now = wpilib.Timer.getFPGATimestamp()
+        if now < self._next_status:
+            return
+        self._next_status = now + SW.can_status_period_s
+        status = self.bus.get_status()
+
+        sent, suppressed = self.outputs.sent, self.outputs.suppressed
+        last_time, last_sent, last_suppressed = self._last_counts
+        elapsed = max(now - last_time, 1e-6)
+        self._last_counts = (now, sent, suppressed)
+
+        self.status_topic.set((
+            self.estimated_utilization, status.bus_utilization, status.tx_full_count, status.rec, status.tec,
+            (sent - last_sent) / elapsed, (suppressed - last_suppressed) / elapsed,
+        ))
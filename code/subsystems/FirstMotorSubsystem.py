@@ -5,7 +5,7 @@ import commands2
 import phoenix6
 import wpimath.controller
 import wpimath.trajectory
-from phoenix6.controls import VoltageOut, MotionMagicVoltage
+from phoenix6.controls import VoltageOut, MotionMagicVoltage, DutyCycleOut
 from phoenix6 import configs
 
 
@@ -14,7 +14,7 @@ from constants import ELEC, SW
 
 class FirstMotorSubsystemClass(commands2.Subsystem):
 
-    def __init__(self) -> None:
+    def __init__(self, signals, outputs, telemetry, device_configs) -> None:
 
 
         self.first_motor = phoenix6.hardware.TalonFX(ELEC.first_motor_CAN_ID)
@@ -22,6 +22,8 @@ class FirstMotorSubsystemClass(commands2.Subsystem):
 
         # Motion Magic control request
         self.motion_magic = MotionMagicVoltage(0)
+        self.voltage_request = VoltageOut(0)
+        self.duty_cycle_request = DutyCycleOut(0)
         config = configs.TalonFXConfiguration()
 
         # Gear ratio
@@ -40,35 +42,70 @@ class FirstMotorSubsystemClass(commands2.Subsystem):
         slot0.k_i = SW.First_ki
         slot0.k_d = SW.First_kd
         
-        self.first_motor.configurator.apply(config)
+        # Applied at startup by the device config service; kept as the starting point for live tuning
+        self.config = config
+        device_configs.add("first_motor", self.first_motor, config)
+
+        # Every request goes through the output layer, which drops repeats
+        self.output = outputs.add("first_motor", self.first_motor)
+
+        # Status signals are refreshed once per loop by the signal registry
+        self.signals = signals
+        self.rotor_position_handle = signals.register(
+            "first_motor/rotor_position", self.first_motor.get_rotor_position(refresh=False)
+        )
+        self.velocity_handle = signals.register(
+            "first_motor/velocity", self.first_motor.get_velocity(refresh=False)
+        )
+        self.position_handle = signals.register(
+            "first_motor/position", self.first_motor.get_position(refresh=False)
+        )
+
+        # Rotations, wrapped position (degrees), velocity
+        self.state_topic = telemetry.add_number_array("First Motor")
 
         
         
 
     def go_forward(self):
-        self.first_motor.set(ELEC.first_motor_forward)
+        self.duty_cycle_request.output = ELEC.first_motor_forward
+        self.output.set(self.duty_cycle_request)
 
     def go_reverse(self):
-        self.first_motor.set(ELEC.first_motor_reverse)
+        self.duty_cycle_request.output = ELEC.first_motor_reverse
+        self.output.set(self.duty_cycle_request)
 
     def stop(self):
  
-        self.first_motor.set(ELEC.first_motor_stop)
+        self.duty_cycle_request.output = ELEC.first_motor_stop
+        self.output.set(self.duty_cycle_request)
 
     def firstmotorPID(self, target):
 
-        self.first_motor.set_control(self.motion_magic.with_position(target).with_slot(0))
+        self.motion_magic.position = target
+        self.motion_magic.slot = 0
+        self.output.set(self.motion_magic)
 
 
+    def get_velocity(self):
+        return self.signals.value(self.velocity_handle)
+
+    def set_voltage(self, volts):
+        """Open-loop voltage, for characterization."""
+        self.voltage_request.output = volts
+        self.output.set(self.voltage_request)
+
+    def get_sysid_state(self):
+        """Mechanism position (rotations) and velocity (rotations/s)."""
+        return self.signals.value(self.position_handle), self.signals.value(self.velocity_handle)
+
     def periodic(self):
         #Position in degrees
-        rotations = self.first_motor.get_rotor_position().value
+        rotations = self.signals.value(self.rotor_position_handle)
         degrees = rotations * 360.0
         wrapped = degrees % 360.0
         
         #speed
-        velocity = self.first_motor.get_velocity().value
+        velocity = self.signals.value(self.velocity_handle)
 
-        wpilib.SmartDashboard.putNumber("First Motor Rotations", rotations)
-        wpilib.SmartDashboard.putNumber("First Motor Position", wrapped)
-        wpilib.SmartDashboard.putNumber("First Motor Velocity", velocity)
+        self.state_topic.set((rotations, wrapped, velocity))
@@ -1,37 +1,138 @@
 import logging
 log = logging.Logger('P212-robot')
+import collections
+import threading
 
 import commands2
 import phoenix6
-from phoenix6.controls import VoltageOut, MotionMagicVoltage
+from phoenix6.controls import VoltageOut, NeutralOut
 from phoenix6 import configs
+from phoenix6.signals import ForwardLimitSourceValue, ForwardLimitTypeValue, ForwardLimitValue
 import wpilib
 
-from constants import ELEC, SW, MECH
+from constants import ELEC, SW
+from util.AsyncInterrupt import AsynchronousInterrupt
 
 
 class SecondMotorSubsystemClass(commands2.Subsystem):
-
-    def __init__(self) -> None:
+    """
+    Open-loop motor that must not drive forward past a limit switch.
+
+    With SW.second_motor_limit_mode "talon" the switch is wired to the
+    Talon's forward limit input and the Talon itself cuts forward output (and,
+    with SW.second_motor_zero_on_limit, re-zeros its position) the moment it
+    closes. Edges are then seen through the Talon's ForwardLimit signal.
+
+    With "dio" the switch stays on the roboRIO (normally open, pulled up, so
+    it reads False while pressed). An interrupt thread catches the press,
+    stops forward output and optionally re-zeros right away; run() still
+    checks the switch every loop as the fallback. In simulation the
+    interrupt thread is not started and periodic() polls for the edges.
+    The request and its ControlOutput are shared with the interrupt thread,
+    so both sides touch them only while holding _output_lock.
+    """
+
+    def __init__(self, signals, outputs, telemetry, device_configs) -> None:
         super().__init__()
 
         self.second_motor = phoenix6.hardware.TalonFX(ELEC.second_motor_CAN_ID)
         self.limit_switch = wpilib.DigitalInput(ELEC.limit_switch_port)
-        self.is_limit_pressed = lambda: self.limit_switch.get()
+        self.hardware_limit = SW.second_motor_limit_mode == "talon"
 
         self.request = VoltageOut(0)
-
-        
-
+        self._limit_stop = NeutralOut()  # used only by the interrupt thread
+        self._output_lock = threading.Lock()
+
+        config = configs.TalonFXConfiguration()
+        limits = config.hardware_limit_switch
+        limits.forward_limit_enable = self.hardware_limit
+        limits.forward_limit_source = ForwardLimitSourceValue.LIMIT_SWITCH_PIN
+        limits.forward_limit_type = ForwardLimitTypeValue.NORMALLY_OPEN
+        limits.forward_limit_autoset_position_enable = self.hardware_limit and SW.second_motor_zero_on_limit
+        limits.forward_limit_autoset_position_value = SW.second_motor_limit_position
+        device_configs.add("second_motor", self.second_motor, config)
+        self.output = outputs.add("second_motor", self.second_motor)
+
+        # Status signals are refreshed once per loop by the signal registry
+        self.signals = signals
+        self.position_handle = signals.register(
+            "second_motor/position", self.second_motor.get_position(refresh=False)
+        )
+        if self.hardware_limit:
+            self.forward_limit_handle = signals.register(
+                "second_motor/forward_limit", self.second_motor.get_forward_limit(refresh=False)
+            )
+
+        # Limit edges: (pressed, FPGA timestamp), appended by the interrupt thread
+        self._edges = collections.deque(maxlen=16)
+        self._polled_pressed = self.is_limit_pressed()
+        self.presses = 0
+        self.last_press_timestamp = 0.0
+        self._published_limit = None
+
+        self.interrupt = None
+        if not self.hardware_limit:
+            self.interrupt = AsynchronousInterrupt(self.limit_switch, self._on_interrupt, name="second-motor-limit")
+            if wpilib.RobotBase.isReal():
+                self.interrupt.start()
+
+        # Wrapped position (degrees), raw rotations
+        self.encoder_topic = telemetry.add_number_array("Second Motor Encoder")
+        # Pressed, presses, last press (FPGA s)
+        self.limit_topic = telemetry.add_number_array("Second Motor Limit", debug=True)
+
+    def is_limit_pressed(self) -> bool:
+        if self.hardware_limit:
+            return self.signals.value(self.forward_limit_handle) == ForwardLimitValue.CLOSED_TO_GROUND.value
+        return not self.limit_switch.get()
+
+    def _on_interrupt(self, rising, falling, rising_timestamp, falling_timestamp):
+        """Interrupt thread: a falling edge is the switch closing."""
+        if falling:
+            with self._output_lock:
+                if self.request.output > 0:
+                    self.second_motor.set_control(self._limit_stop)
+                    self.output.invalidate()
+            if SW.second_motor_zero_on_limit:
+                self.second_motor.set_position(SW.second_motor_limit_position)
+            self._edges.append((True, falling_timestamp))
+        if rising:
+            self._edges.append((False, rising_timestamp))
+
+    def periodic(self):
+        pressed = self.is_limit_pressed()
+
+        # Fallback edge detection when no interrupt thread is running
+        if self.interrupt is None or not self.interrupt.is_running():
+            if pressed != self._polled_pressed:
+                self._polled_pressed = pressed
+                now = wpilib.Timer.getFPGATimestamp()
+                if self.interrupt is not None:
+                    self._on_interrupt(not pressed, pressed, now, now)
+                else:
+                    self._edges.append((pressed, now))
+
+        while self._edges:
+            edge_pressed, timestamp = self._edges.popleft()
+            if edge_pressed:
+                self.presses += 1
+                self.last_press_timestamp = timestamp
+
+        # Published only when something changed; the switch sits still most loops
+        limit = (pressed, self.presses)
+        if limit != self._published_limit:
+            self._published_limit = limit
+            self.limit_topic.set((float(pressed), self.presses, self.last_press_timestamp))
 
     def run(self, speed: float):
 
-        if speed > 0 and not self.is_limit_pressed():
+        # The Talon enforces its own forward limit; otherwise check the switch here too
+        if speed > 0 and not self.hardware_limit and self.is_limit_pressed():
             speed = 0.0
 
-        self.second_motor.set_control(
-            self.request.with_output(speed * 12.0)
-        )
+        with self._output_lock:
+            self.request.output = speed * 12.0
+            self.output.set(self.request)
 
     def go_forward(self):
         self.run(1.0)
@@ -42,11 +143,15 @@ class SecondMotorSubsystemClass(commands2.Subsystem):
     def stop(self):
         self.run(0.0)
 
+    def get_encoder_rotations(self) -> float:
+        return self.signals.value(self.position_handle)
+
     def get_encoder_position(self) -> float:
 
-        rotations = self.second_motor.get_rotor_position().value
+        rotations = self.get_encoder_rotations()
         degrees = rotations * 360.0
         wrapped = degrees % 360.0
         return wrapped
-    
 
+    def publish_encoder(self):
+        self.encoder_topic.set((self.get_encoder_position(), self.get_encoder_rotations()))
@@ -11,17 +11,19 @@ from constants import ELEC
 
 class SmartDashboardSubsystemClass(commands2.Subsystem):
 
-    def __init__(self) -> None:
+    def __init__(self, telemetry) -> None:
         
         super().__init__()
         self.setName("SmartDashboardSubsystem")
 
         
         self.stored_number = 0
+        self.stored_number_topic = telemetry.add_number("Stored Number")
         
 
     def increment_number(self):
         self.stored_number = self.stored_number + 1
+        self.stored_number_topic.set(self.stored_number)
 
     def get_number(self):
         return self.stored_number
@@ -1,138 +1,319 @@
 import math
+import numpy as np
 import wpilib
-import wpimath
 from wpilib import SmartDashboard
-from wpimath.geometry import Translation2d, Rotation2d
-from wpimath.kinematics import SwerveDrive2Kinematics, SwerveModuleState
 from phoenix6.hardware import TalonFX, CANcoder
-from phoenix6.controls import PositionVoltage, VelocityVoltage
-from phoenix6.configs import TalonFXConfiguration
+from phoenix6.controls import PositionVoltage, VelocityVoltage, VoltageOut
+from phoenix6.configs import TalonFXConfiguration, CANcoderConfiguration
+from phoenix6.signals import FeedbackSensorSourceValue
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.kinematics import SwerveModulePosition, SwerveModuleState
 import commands2
-from constants import MECH, PHYS, ELEC
+from constants import MECH, ELEC, SW, DERIVED, SWERVE_MODULE_LOCATIONS, SWERVE_KINEMATICS
+from util.SwerveKinematics import SwerveKinematicsEngine
+from util.OdometryThread import OdometryThread
+from util.PoseEstimator import PoseEstimator
+
+# Conversion factors from constants.DERIVED, bound here so control calls only multiply
+RADIANS_PER_ROTATION = DERIVED.steer_radians_per_rotation
+ROTATIONS_PER_RADIAN = DERIVED.steer_rotations_per_radian
+DRIVE_ROTATIONS_PER_METER = DERIVED.drive_rotations_per_meter
+DRIVE_METERS_PER_ROTATION = DERIVED.drive_meters_per_rotation
 
 
 class SwerveModule:
-    def __init__(self, drive_motor_id, steer_motor_id, encoder_id, angle_offset_deg):
+    def __init__(self, name, drive_motor_id, steer_motor_id, encoder_id, angle_offset_deg, signals, outputs, configs):
+        self.name = name
         self.drive_motor = TalonFX(drive_motor_id)
         self.steer_motor = TalonFX(steer_motor_id)
         self.abs_encoder = CANcoder(encoder_id)
 
-        # Set neutral modes from constants
-        self.drive_motor.setNeutralMode(ELEC.driveMotor_neutral)
-        self.steer_motor.setNeutralMode(ELEC.steerMotor_neutral)
-
         # Physical mounting offset
         self.angle_offset = math.radians(angle_offset_deg)
 
-        # Steering PID
+        # The CANcoder applies the mounting offset itself and reports the
+        # wheel angle in -0.5..0.5 rotations
+        encoder_cfg = CANcoderConfiguration()
+        encoder_cfg.magnet_sensor.magnet_offset = -angle_offset_deg / 360.0
+        encoder_cfg.magnet_sensor.absolute_sensor_discontinuity_point = 0.5
+
+        # The steer Talon closes its loop on the CANcoder, so its position is
+        # the wheel angle in rotations. Fusing it with the rotor for resolution
+        # needs a Phoenix Pro license; an unlicensed Talon faults and disables
+        # its output, so robots opt in with SW.steer_fused_cancoder.
         steer_cfg = TalonFXConfiguration()
-        steer_cfg.slot0.k_p = 2.5
-        steer_cfg.slot0.k_d = 0.1
-        self.steer_motor.configurator.apply(steer_cfg)
+        steer_cfg.feedback.feedback_remote_sensor_id = encoder_id
+        steer_cfg.feedback.feedback_sensor_source = (
+            FeedbackSensorSourceValue.FUSED_CANCODER if SW.steer_fused_cancoder
+            else FeedbackSensorSourceValue.REMOTE_CANCODER
+        )
+        steer_cfg.feedback.rotor_to_sensor_ratio = MECH.swerve_module_steering_gearing_ratio
+        steer_cfg.feedback.sensor_to_mechanism_ratio = 1.0
+        steer_cfg.closed_loop_general.continuous_wrap = True
+
+        # Steering PID, per wheel rotation; neutral mode from constants
+        steer_cfg.slot0.k_p = SW.steer_kp
+        steer_cfg.slot0.k_d = SW.steer_kd
+        steer_cfg.motor_output.neutral_mode = ELEC.steerMotor_neutral
 
-        # Drive PID
+        # Drive velocity PID and feedforward, per motor rotation; neutral mode from constants
         drive_cfg = TalonFXConfiguration()
-        drive_cfg.slot0.k_p = 0.1
-        self.drive_motor.configurator.apply(drive_cfg)
+        drive_cfg.slot0.k_s = SW.drive_ks
+        drive_cfg.slot0.k_v = SW.drive_kv
+        drive_cfg.slot0.k_p = SW.drive_kp
+        drive_cfg.motor_output.neutral_mode = ELEC.driveMotor_neutral
 
-        # Sync steering to absolute encoder
-        self._sync_to_absolute()
+        # Applied in parallel with every other device by the config service;
+        # the motor configs are kept as the starting point for live tuning
+        self.steer_config = steer_cfg
+        self.drive_config = drive_cfg
+        configs.add(f"{name}/encoder", self.abs_encoder, encoder_cfg)
+
+        # The steer Talon reads these CANcoder frames straight off the bus
+        self.remote_sensor_signals = (
+            self.abs_encoder.get_position(refresh=False), self.abs_encoder.get_velocity(refresh=False),
+        )
+        configs.add(f"{name}/steer", self.steer_motor, steer_cfg)
+        configs.add(f"{name}/drive", self.drive_motor, drive_cfg)
+
+        # Control requests are created once and mutated in place every loop,
+        # and sent through the output layer, which drops repeats
+        self.steer_output = outputs.add(f"{name}/steer", self.steer_motor)
+        self.drive_output = outputs.add(f"{name}/drive", self.drive_motor)
+        self.steer_request = PositionVoltage(0)
+        self.drive_request = VelocityVoltage(0)
+        self.steer_voltage_request = VoltageOut(0)
+        self.drive_voltage_request = VoltageOut(0)
+
+        # Status signals are refreshed once per loop by the signal registry
+        self.signals = signals
+        self.steer_angle_handle = signals.register(
+            f"{name}/steer_angle", self.steer_motor.get_position(refresh=False)
+        )
 
     def get_absolute_angle(self):
-        """Returns the current angle in radians."""
-        raw = self.abs_encoder.get_absolute_position().value  # 0–1 rotations
-        angle = (raw * 2 * math.pi) - self.angle_offset
-        return angle
+        """Returns the current wheel angle in radians, as of the last signal refresh."""
+        return self.signals.value(self.steer_angle_handle) * RADIANS_PER_ROTATION
+
+    def register_odometry_signals(self, registry):
+        """Registers drive and steer positions, compensated by their velocities."""
+        self.drive_position_handle = registry.register(
+            f"{self.name}/drive_position",
+            self.drive_motor.get_position(refresh=False),
+            slope=self.drive_motor.get_velocity(refresh=False),
+        )
+        self.drive_velocity_handle = registry.handle(f"{self.name}/drive_position/slope")
+        self.steer_position_handle = registry.register(
+            f"{self.name}/steer_position",
+            self.steer_motor.get_position(refresh=False),
+            slope=self.steer_motor.get_velocity(refresh=False),
+        )
+        self.steer_velocity_handle = registry.handle(f"{self.name}/steer_position/slope")
+
+    def get_module_position(self, registry):
+        """Drive distance (m) and steer angle from an odometry signal snapshot."""
+        return SwerveModulePosition(
+            registry.value(self.drive_position_handle) * DRIVE_METERS_PER_ROTATION,
+            Rotation2d(registry.value(self.steer_position_handle) * RADIANS_PER_ROTATION),
+        )
 
-    def _sync_to_absolute(self):
-        """Sync steering motor to absolute encoder."""
-        rad = self.get_absolute_angle()
-        rotations = rad / (2 * math.pi) * MECH.swerve_module_steering_gearing_ratio
-        self.steer_motor.set_position(rotations)
+    def get_drive_velocity(self, registry):
+        """Measured wheel speed in m/s from an odometry signal snapshot."""
+        return registry.value(self.drive_velocity_handle) * DRIVE_METERS_PER_ROTATION
 
     def set(self, speed_mps, target_angle_rad):
-        """Set speed and angle for this swerve module."""
-        current = self.get_absolute_angle()
-        delta = (target_angle_rad - current + math.pi) % (2 * math.pi) - math.pi
+        """
+        Set speed and angle for this swerve module. The state is expected to be
+        already desaturated and optimized by the kinematics engine.
+        """
+        # Steering runs on the fused wheel angle, which wraps continuously
+        self.steer_request.position = target_angle_rad * ROTATIONS_PER_RADIAN
+        self.steer_output.set(self.steer_request)
 
-        # Flip wheel direction if needed
-        if abs(delta) > math.pi / 2:
-            speed_mps *= -1
-            target_angle_rad += math.pi
-            target_angle_rad %= 2 * math.pi
+        # Drive motor control: speed in m/s -> rotations/sec using gearing ratio
+        self.drive_request.velocity = speed_mps * DRIVE_ROTATIONS_PER_METER
+        self.drive_output.set(self.drive_request)
 
-        # Steering motor control with gearing ratio
-        steer_rotations = target_angle_rad / (2 * math.pi) * MECH.swerve_module_steering_gearing_ratio
-        self.steer_motor.set_control(PositionVoltage(steer_rotations))
+    def set_drive_voltage(self, volts):
+        """Characterization: wheel held straight, open-loop drive voltage."""
+        self.steer_request.position = 0.0
+        self.steer_output.set(self.steer_request)
+        self.drive_voltage_request.output = volts
+        self.drive_output.set(self.drive_voltage_request)
 
-        # Drive motor control: speed in m/s -> rotations/sec using gearing ratio
-        wheel_circ = math.pi * PHYS.wheel_diameter_meters
-        motor_rps = (speed_mps / wheel_circ) * MECH.swerve_module_driving_gearing_ratio
-        self.drive_motor.set_control(VelocityVoltage(motor_rps))
+    def set_steer_voltage(self, volts):
+        """Characterization: drive stopped, open-loop steer voltage."""
+        self.drive_voltage_request.output = 0.0
+        self.drive_output.set(self.drive_voltage_request)
+        self.steer_voltage_request.output = volts
+        self.steer_output.set(self.steer_voltage_request)
+
+
+def _pack_module_states(values):
+    """(speed x4, angle x4) -> four SwerveModuleStates for the dashboard."""
+    return [SwerveModuleState(values[i], Rotation2d(values[i + 4])) for i in range(4)]
+
+
+def _pack_pose(values):
+    return Pose2d(values[0], values[1], Rotation2d(values[2]))
 
 
 class SwerveDriveSubsystemClass(commands2.Subsystem):
-    def __init__(self):
+    def __init__(self, signals, outputs, telemetry, configs):
         super().__init__()
 
         # --------------- CREATE MODULES USING CAN IDs ---------------
         self.front_right = SwerveModule(
+            "front_right",
             ELEC.RF_drive_CAN_ID,
             ELEC.RF_steer_CAN_ID,
             ELEC.RF_encoder_DIO,
-            45
+            45,
+            signals,
+            outputs,
+            configs
         )
         self.back_right = SwerveModule(
+            "back_right",
             ELEC.RB_drive_CAN_ID,
             ELEC.RB_steer_CAN_ID,
             ELEC.RB_encoder_DIO,
-            0
+            0,
+            signals,
+            outputs,
+            configs
         )
         self.back_left = SwerveModule(
+            "back_left",
             ELEC.LB_drive_CAN_ID,
             ELEC.LB_steer_CAN_ID,
             ELEC.LB_encoder_DIO,
-            180
+            180,
+            signals,
+            outputs,
+            configs
         )
         self.front_left = SwerveModule(
+            "front_left",
             ELEC.LF_drive_CAN_ID,
             ELEC.LF_steer_CAN_ID,
             ELEC.LF_encoder_DIO,
-            135
+            135,
+            signals,
+            outputs,
+            configs
         )
 
+        # Kinematics engine order: front-left, front-right, back-left, back-right
+        self.modules = (self.front_left, self.front_right, self.back_left, self.back_right)
+        self._current_angles = np.zeros(len(self.modules))
+        self.setpoints = [0.0] * (2 * len(self.modules))  # speed x4, angle x4
+        self.command = (0.0, 0.0, 0.0)  # last drive() call: x, y (m/s), rotation (rad/s)
+        self.command_heading_rad = 0.0  # heading that command was rotated by (0 if robot-relative)
+
         # --------------- ROBOT GEOMETRY ---------------
-        L = PHYS.wheelbase_meters
-        W = PHYS.trackwidth_meters
-        self.kinematics = SwerveDrive2Kinematics(
-            Translation2d(+W/2, +L/2),  # Front Left
-            Translation2d(+W/2, -L/2),  # Front Right
-            #Translation2d(-L/2, W/2), # Back Left 
-            #Translation2d(-L/2, -W/2) # Back Right 
-        )
+        self.kinematics = SwerveKinematicsEngine(SWERVE_MODULE_LOCATIONS, SW.swerve_max_module_speed_mps)
 
         # --------------- GYRO ---------------
         self.gyro = wpilib.ADIS16470_IMU()
 
+        # --------------- ODOMETRY ---------------
+        self.odometry = OdometryThread(
+            self.modules, self.gyro, SWERVE_KINEMATICS, SW.odometry_frequency_hz,
+            history_size=int(SW.pose_history_s * SW.odometry_frequency_hz),
+        )  # primed and started by RobotContainer once configs and signal rates are applied
+
+        # Vision corrections, applied at their capture time against the odometry history
+        self.estimator = PoseEstimator(self.odometry.buffer.history, SW.odometry_std_devs, SW.vision_std_devs)
+
+        # --------------- TELEMETRY ---------------
+        self.command_topic = telemetry.add_number_array("Swerve Command Speeds")  # x, y, rotation
+        self.module_states_topic = telemetry.add_struct_array(
+            "Swerve Module States", SwerveModuleState, _pack_module_states, debug=True
+        )
+        self.pose_topic = telemetry.add_struct("Swerve Pose", Pose2d, _pack_pose)
+        self.odometry_pose_topic = telemetry.add_struct("Swerve Odometry Pose", Pose2d, _pack_pose, debug=True)
+
+    def periodic(self):
+        # Without the background thread, integrate once per loop
+        if not self.odometry.is_running():
+            self.odometry.update()
+
+        odometry_pose = self.odometry.get_pose()
+        pose = self.estimator.estimate(odometry_pose)
+        self.pose_topic.set((pose.X(), pose.Y(), pose.rotation().radians()))
+        self.odometry_pose_topic.set((odometry_pose.X(), odometry_pose.Y(), odometry_pose.rotation().radians()))
+
+    def get_measured_states(self):
+        """Measured speed x4 (m/s), then angle x4 (rad), same layout as setpoints."""
+        snapshot = self.odometry.signals.snapshot()
+        return [module.get_drive_velocity(snapshot) for module in self.modules] + [
+            module.get_absolute_angle() for module in self.modules
+        ]
+
+    def get_gyro_yaw(self):
+        return self.gyro.getAngle()
+
+    def get_pose(self):
+        """Latest fused pose estimate; never blocks on the odometry thread."""
+        return self.estimator.estimate(self.odometry.get_pose())
+
+    def get_odometry_pose(self):
+        """Latest pose from wheel odometry alone."""
+        return self.odometry.get_pose()
+
+    def reset_pose(self, pose):
+        self.odometry.reset_pose(pose)
+        self.estimator.reset()
+
+    def add_vision_measurement(self, pose, timestamp, std_devs=None):
+        """Fuses a vision pose captured at `timestamp` (FPGA seconds)."""
+        return self.estimator.add_vision_measurement(pose, timestamp, std_devs)
+
     def drive(self, x_mps, y_mps, rot_rad_per_s, field_relative=True):
         """Drives the robot using x, y, rotation velocities."""
-        if field_relative:
-            chassis = wpimath.kinematics.ChassisSpeeds.fromFieldRelativeSpeeds(
-                x_mps, y_mps, rot_rad_per_s,
-                Rotation2d.fromDegrees(self.gyro.getAngle())
-            )
-        else:
-            chassis = wpimath.kinematics.ChassisSpeeds(
-                x_mps, y_mps, rot_rad_per_s
-            )
-
-        # Convert chassis speeds to individual module states
-        states = self.kinematics.toSwerveModuleStates(chassis)
-        SwerveDrive2Kinematics.desaturateWheelSpeeds(states, 4.5)  # max velocity
+        heading_rad = math.radians(self.gyro.getAngle()) if field_relative else 0.0
+
+        for i, module in enumerate(self.modules):
+            self._current_angles[i] = module.get_absolute_angle()
+
+        # Convert chassis speeds to desaturated, optimized module states
+        speeds, angles = self.kinematics.to_module_states(
+            x_mps, y_mps, rot_rad_per_s, heading_rad, self._current_angles
+        )
 
         # Apply module speeds and angles
-        self.front_left.set(states[0].speed, states[0].angle.radians())
-        self.front_right.set(states[1].speed, states[1].angle.radians())
-        #self.rear_left.set(states[2].speed, states[2].angle.radians())
-        #self.rear_right.set(states[3].speed, states[3].angle.radians())
+        speeds = speeds.tolist()
+        angles = angles.tolist()
+        for module, speed, angle in zip(self.modules, speeds, angles):
+            module.set(speed, angle)
+
+        self.setpoints = speeds + angles
+        self.command = (x_mps, y_mps, rot_rad_per_s)
+        self.command_heading_rad = heading_rad
+        self.command_topic.set(self.command)
+        self.module_states_topic.set(self.setpoints)
+
+    # ---------------- SYSTEM IDENTIFICATION ----------------
+
+    def set_drive_voltage(self, volts):
+        for module in self.modules:
+            module.set_drive_voltage(volts)
+
+    def set_steer_voltage(self, volts):
+        for module in self.modules:
+            module.set_steer_voltage(volts)
+
+    def get_drive_sysid_state(self):
+        """Mean drive position (motor rotations) and velocity (rotations/s)."""
+        snapshot = self.odometry.signals.snapshot()
+        position = sum(snapshot[module.drive_position_handle] for module in self.modules)
+        velocity = sum(snapshot[module.drive_velocity_handle] for module in self.modules)
+        return position / len(self.modules), velocity / len(self.modules)
 
+    def get_steer_sysid_state(self):
+        """Mean steer position (wheel rotations) and velocity (rotations/s)."""
+        snapshot = self.odometry.signals.snapshot()
+        position = sum(snapshot[module.steer_position_handle] for module in self.modules)
+        velocity = sum(snapshot[module.steer_velocity_handle] for module in self.modules)
+        return position / len(self.modules), velocity / len(self.modules)
@@ -0,0 +1,137 @@
+import logging
+log = logging.Logger('P212-robot')
+import commands2
+import ntcore
+import wpilib
+
+from constants import SW
+
+
+class TelemetryTopic:
+    """
+    One NetworkTables publisher plus its change/rate filter.
+
+    set() only stores the value, so producers can call it every loop for free.
+    The telemetry subsystem's flush() calls flush() here, which publishes the
+    value when it moved by more than epsilon and at least period_s has passed
+    since the last publish. Values are always plain numbers or sequences of
+    numbers; for struct topics, pack builds the struct only when publishing.
+    """
+
+    __slots__ = ("name", "publisher", "epsilon", "period_s", "pack", "_value", "_last_value", "_last_time")
+
+    def __init__(self, name, publisher, epsilon, period_s, pack=None):
+        self.name = name
+        self.publisher = publisher
+        self.epsilon = epsilon
+        self.period_s = period_s
+        self.pack = pack
+        self._value = None
+        self._last_value = None
+        self._last_time = -1e9
+
+    def set(self, value):
+        self._value = value
+
+    def flush(self, now):
+        """Publishes the pending value if needed. Returns True if it was sent."""
+        value = self._value
+        if value is None or now - self._last_time < self.period_s:
+            return False
+
+        if self._last_value is not None and not _differs(value, self._last_value, self.epsilon):
+            return False
+
+        self.publisher.set(self.pack(value) if self.pack is not None else value)
+        self._last_value = value
+        self._last_time = now
+        return True
+
+
+class _DroppedTopic:
+    """Stand-in for debug topics at competition level; set() does nothing."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def set(self, value):
+        pass
+
+
+def _differs(a, b, epsilon):
+    if isinstance(a, (int, float)):
+        return abs(a - b) > epsilon
+    if len(a) != len(b):
+        return True
+    for x, y in zip(a, b):
+        if abs(x - y) > epsilon:
+            return True
+    return False
+
+
+class TelemetrySubsystemClass(commands2.Subsystem):
+    """
+    Owns every dashboard publisher on the robot.
+
+    Publishers are created once, up front, under the SmartDashboard table so
+    existing dashboard layouts keep working. Related values are grouped into
+    array or struct topics instead of one key per number. At the "competition"
+    level, topics added with debug=True are never created.
+
+    Nothing is published from periodic(): Robot calls flush() at the end of
+    every loop, after all subsystems and commands ran, so each topic goes
+    out in the loop that set it.
+    """
+
+    LEVELS = ("competition", "debug")
+
+    def __init__(self, level=SW.telemetry_level) -> None:
+        super().__init__()
+        self.setName("TelemetrySubsystem")
+
+        if level not in self.LEVELS:
+            raise ValueError(f"unknown telemetry level {level!r}, expected one of {self.LEVELS}")
+        self.level = level
+
+        self.table = ntcore.NetworkTableInstance.getDefault().getTable("SmartDashboard")
+        self.topics = []
+
+        self.published_count = 0
+        self.suppressed_count = 0
+
+    def _add(self, name, topic, debug, epsilon, period_s, pack=None):
+        if debug and self.level == "competition":
+            return _DroppedTopic(name)
+
+        if epsilon is None:
+            epsilon = SW.telemetry_epsilon
+        if period_s is None:
+            period_s = SW.telemetry_debug_period_s if debug else SW.telemetry_period_s
+
+        entry = TelemetryTopic(name, topic.publish(), epsilon, period_s, pack)
+        self.topics.append(entry)
+        return entry
+
+    def add_number(self, name, debug=False, epsilon=None, period_s=None):
+        return self._add(name, self.table.getDoubleTopic(name), debug, epsilon, period_s)
+
+    def add_number_array(self, name, debug=False, epsilon=None, period_s=None):
+        return self._add(name, self.table.getDoubleArrayTopic(name), debug, epsilon, period_s)
+
+    def add_struct(self, name, struct_type, pack, debug=False, epsilon=None, period_s=None):
+        return self._add(name, self.table.getStructTopic(name, struct_type), debug, epsilon, period_s, pack)
+
+    def add_struct_array(self, name, struct_type, pack, debug=False, epsilon=None, period_s=None):
+        return self._add(name, self.table.getStructArrayTopic(name, struct_type), debug, epsilon, period_s, pack)
+
+    def flush(self):
+        """Publishes every topic whose value is due. Called once per loop by Robot."""
+        now = wpilib.Timer.getFPGATimestamp()
+        published = 0
+        for topic in self.topics:
+            if topic.flush(now):
+                published += 1
+        self.published_count += published
+        self.suppressed_count += len(self.topics) - published
@@ -0,0 +1,35 @@
+import logging
+log = logging.Logger('P212-robot')
+import commands2
+import wpilib
+
+
+class VisionSubsystemClass(commands2.Subsystem):
+    """
+    Feeds vision poses into the swerve pose estimator.
+
+    `source` is anything with poll(now) returning (Pose2d, capture timestamp)
+    pairs. There is no camera on the robot yet, so it is None there; the
+    simulator plugs in a SimulatedVision.
+    """
+
+    def __init__(self, swerve, telemetry) -> None:
+        super().__init__()
+        self.setName("VisionSubsystem")
+        self.swerve = swerve
+        self.source = None
+
+        # Frames applied, frames rejected (older than the odometry history), last latency (s)
+        self.status_topic = telemetry.add_number_array("Vision", debug=True)
+        self.last_latency = 0.0
+
+    def periodic(self):
+        if self.source is None:
+            return
+        now = wpilib.Timer.getFPGATimestamp()
+        for pose, timestamp in self.source.poll(now):
+            self.swerve.add_vision_measurement(pose, timestamp)
+            self.last_latency = now - timestamp
+
+        estimator = self.swerve.estimator
+        self.status_topic.set((estimator.applied, estimator.rejected, self.last_latency))
@@ -0,0 +1,79 @@
+'''
+    Runs the drive hot path (inverse kinematics plus the module control
+    outputs) under the AllocationCounter: it must keep a small, bounded number of
+    blocks alive per loop, and a leak in the same loop must show up.
+'''
+
+import math
+
+import numpy as np
+from phoenix6.controls import PositionVoltage, VoltageOut
+
+import constants
+from constants import SW
+from util.AllocationCounter import AllocationCounter
+from util.OutputRegistry import OutputRegistry
+from util.SwerveKinematics import SwerveKinematicsEngine
+
+WARMUP_LOOPS = 3
+LOOPS = 100
+# Blocks the drive loop below may keep alive per loop: 4 per control output + 2
+ALLOCATION_BOUND = 4 * 8 + 2
+
+
+class FakeMotor:
+    def set_control(self, request):
+        pass
+
+
+def run_drive_loops(loops, leak=None, send=True):
+    engine = SwerveKinematicsEngine(constants.SWERVE_MODULE_LOCATIONS, SW.swerve_max_module_speed_mps)
+    outputs = OutputRegistry(0.1, 1e-4)
+    drives = [outputs.add(f"drive {i}", FakeMotor()) for i in range(4)]
+    steers = [outputs.add(f"steer {i}", FakeMotor()) for i in range(4)]
+    drive_requests = [VoltageOut(0) for _ in range(4)]
+    steer_requests = [PositionVoltage(0) for _ in range(4)]
+    current_angles = np.zeros(4)
+
+    counter = AllocationCounter(True, report_every=loops + 1)
+    counts = [0] * loops
+    try:
+        counter.mark_loop()  # drop everything allocated while setting up
+        for i in range(loops):
+            # A command that changes every loop, so the outputs (nearly) always send
+            speeds, angles = engine.to_module_states(1.0 + 0.01 * i, 0.3, 0.5, 0.05 * i, current_angles)
+            for j in range(4 if send else 0):
+                drive_requests[j].output = speeds[j] * 3.0
+                drives[j].set(drive_requests[j])
+                steer_requests[j].position = angles[j] / (2 * math.pi)
+                steers[j].set(steer_requests[j])
+            current_angles[:] = angles
+            if leak is not None:
+                leak.extend(np.zeros(8) for _ in range(10))
+            counter.mark_loop()
+            counts[i] = counter.last_count
+    finally:
+        counter.stop()
+    return counts, outputs
+
+
+def test_drive_loop_allocations_are_bounded():
+    counts, outputs = run_drive_loops(LOOPS)
+    assert outputs.sent + outputs.suppressed == 8 * LOOPS and outputs.sent > 7 * LOOPS
+
+    # Each send replaces its ControlOutput's two last-sent value lists and may
+    # leave a new float in its request (depending on CPython's float free
+    # list), and the counter keeps a couple of its own totals. The kinematics
+    # work in preallocated buffers and keep nothing.
+    assert max(counts[WARMUP_LOOPS:]) <= ALLOCATION_BOUND
+
+
+def test_kinematics_keep_nothing_alive():
+    counts, _ = run_drive_loops(LOOPS, send=False)
+    assert max(counts[WARMUP_LOOPS:]) == 0
+
+
+def test_a_leak_in_the_loop_breaks_the_bound():
+    # Ten arrays kept per loop, each an object plus its data buffer
+    counts, _ = run_drive_loops(LOOPS, leak=[])
+    assert min(counts[WARMUP_LOOPS:]) > ALLOCATION_BOUND
@@ -0,0 +1,104 @@
+'''
+    Latency benchmarks for the control-loop hot paths, run against the
+    simulated hardware in physics.py.
+
+    Each path is called many times between paused simulation steps, and its
+    p50/p99/max are compared to tests/benchmark_baseline.json. A path that
+    got more than SW.benchmark_regression_factor slower at p99 raises a
+    warning; a full scheduler iteration whose p99 exceeds
+    SW.benchmark_loop_budget_share of the loop fails the run.
+
+    To refresh the baseline after an intended change, run
+
+        BENCHMARK_UPDATE_BASELINE=1 python -m robotpy test -- -k benchmark
+'''
+
+import json
+import os
+import warnings
+from time import perf_counter_ns
+
+import commands2
+import numpy as np
+import wpilib.simulation
+
+from constants import OP, SW
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+ITERATIONS = 500
+WARMUP = 50
+NOISE_FLOOR_US = 20.0  # sub-microsecond paths jitter by more than 2x
+
+
+def measure(fn, iterations=ITERATIONS, warmup=WARMUP):
+    """Calls fn repeatedly and returns (p50, p99, max) in microseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations, dtype=np.int64)
+    for i in range(iterations):
+        start = perf_counter_ns()
+        fn()
+        samples[i] = perf_counter_ns() - start
+    p50, p99 = np.percentile(samples, (50, 99))
+    return {"p50_us": float(p50) / 1e3, "p99_us": float(p99) / 1e3, "max_us": float(samples.max()) / 1e3}
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def report(results):
+    """Prints the results against the baseline and warns about regressions."""
+    baseline = load_baseline()
+    print(f"\n{'benchmark':48s} {'p50 us':>9s} {'p99 us':>9s} {'max us':>9s} {'base p99':>9s}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        base_p99 = f"{base['p99_us']:9.1f}" if base else f"{'-':>9s}"
+        print(f"{name:48s} {stats['p50_us']:9.1f} {stats['p99_us']:9.1f} {stats['max_us']:9.1f} {base_p99}")
+        if (
+            base
+            and stats["p99_us"] > base["p99_us"] * SW.benchmark_regression_factor
+            and stats["p99_us"] - base["p99_us"] > NOISE_FLOOR_US
+        ):
+            warnings.warn(f"{name} p99 {stats['p99_us']:.1f} us vs baseline {base['p99_us']:.1f} us")
+
+    if os.environ.get("BENCHMARK_UPDATE_BASELINE"):
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+def test_benchmark_hot_paths(control, robot):
+    with control.run_robot():
+        # Drive in teleop for a moment so every path has real data to chew on
+        ps5 = wpilib.simulation.PS5ControllerSim(OP.joystick_port)
+        ps5.setLeftY(-0.5)
+        ps5.setRightX(0.3)
+        ps5.notifyNewData()
+        control.step_timing(seconds=1.0, autonomous=False, enabled=True)
+
+        # The robot thread is paused between steps, so the paths run alone here
+        container = robot.container
+        swerve = container.swervedrivesub
+        drive_command = swerve.getDefaultCommand()
+        module = swerve.front_left
+
+        results = {
+            "SwerveDriveSubsystemClass.drive": measure(lambda: swerve.drive(1.0, 0.5, 0.3)),
+            "SwerveModule.set": measure(lambda: module.set(1.0, 0.5)),
+            "SwerveDriveCommand.execute": measure(drive_command.execute),
+            "SignalRegistry.refresh": measure(container.signals.refresh),
+        }
+        for subsystem in container.registry.subsystems:
+            results[f"{subsystem.getName()}.periodic"] = measure(subsystem.periodic)
+        results["TelemetrySubsystem.flush"] = measure(container.telemetrysub.flush)
+        results["CommandScheduler.run"] = measure(commands2.CommandScheduler.getInstance().run)
+
+    report(results)
+
+    budget_us = SW.benchmark_loop_budget_share * SW.loop_period_s * 1e6
+    p99 = results["CommandScheduler.run"]["p99_us"]
+    assert p99 < budget_us, f"scheduler p99 {p99:.0f} us exceeds {budget_us:.0f} us budget"
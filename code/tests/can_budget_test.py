@@ -0,0 +1,85 @@
+'''
+    Checks the CAN bus budget (each signal at its fastest consumer's rate,
+    the load estimate) and the subsystem registry's mode hook dispatch.
+'''
+
+import time
+
+import pytest
+from phoenix6.hardware import TalonFX
+
+from subsystems.CANBusSubsystem import BUS_BITRATE, CONTROL_FRAME_HZ, FRAME_BITS, CANBusSubsystemClass
+from subsystems.TelemetrySubsystem import TelemetrySubsystemClass
+from util.OutputRegistry import OutputRegistry
+from util.SubsystemRegistry import MODE_HOOKS, SubsystemRegistry
+
+
+def test_requested_rates_resolve_to_the_fastest_consumer(control, robot):
+    with control.run_robot():
+        bus = CANBusSubsystemClass(TelemetrySubsystemClass("debug"), OutputRegistry(0.1, 1e-4))
+        talon = TalonFX(53)
+        position, velocity, current = (
+            talon.get_position(refresh=False), talon.get_velocity(refresh=False), talon.get_stator_current(refresh=False)
+        )
+
+        bus.require((position, velocity), 50.0, "slow loop")
+        bus.require((position,), 200.0, "odometry")
+        bus.require((current, velocity), 10.0, "dashboard")
+        bus.add_devices(talon)
+
+        rates = {id(r.signal): (r.frequency_hz, r.consumers) for r in bus._requirements.values()}
+        assert rates == {
+            id(position): (200.0, ["slow loop", "odometry"]),
+            id(velocity): (50.0, ["slow loop", "dashboard"]),
+            id(current): (10.0, ["dashboard"]),
+        }
+        assert bus.estimate() == pytest.approx((200.0 + 50.0 + 10.0 + CONTROL_FRAME_HZ) * FRAME_BITS / BUS_BITRATE)
+
+        bus.apply()
+        time.sleep(0.1)
+        # Phoenix packs signals into shared frames and runs each frame at its
+        # fastest signal's rate, so a signal may come out faster, never slower
+        assert position.get_applied_update_frequency() == pytest.approx(200.0)
+        for signal in (position, velocity, current):
+            assert signal.get_applied_update_frequency() >= rates[id(signal)][0]
+        # Nothing required the fault field, so optimize_bus_utilization turned it off
+        assert talon.get_fault_field(refresh=False).get_applied_update_frequency() == 0.0
+        assert bus.estimated_utilization == pytest.approx(bus.estimate())
+
+
+class Hooked:
+    def __init__(self, name, calls, hooks):
+        self.name = name
+        for hook in hooks:
+            setattr(self, hook, lambda hook=hook: calls.append((self.name, hook)))
+
+    def getName(self):
+        return self.name
+
+
+def test_hooks_dispatch_in_registration_order():
+    calls = []
+    registry = SubsystemRegistry()
+    first = Hooked("first", calls, ("teleopPeriodic", "disabledInit"))
+    second = Hooked("second", calls, ("teleopPeriodic",))
+    plain = Hooked("plain", calls, ())
+    plain.robotPeriodic = None  # not callable, so not a hook
+
+    assert registry.register(first) is first
+    registry.register(second)
+    registry.register(plain)
+    assert registry.subsystems == [first, second, plain]
+
+    teleop = registry.dispatcher("teleopPeriodic")
+    teleop()
+    registry.dispatcher("disabledInit")()
+    registry.dispatcher("robotPeriodic")()
+    assert calls == [("first", "teleopPeriodic"), ("second", "teleopPeriodic"), ("first", "disabledInit")]
+    assert {name for name in MODE_HOOKS if registry.hooks(name)} == {"teleopPeriodic", "disabledInit"}
+
+    # Dispatchers walk the live hook list, so later registrations are included
+    late = registry.register(Hooked("late", calls, ("teleopPeriodic",)))
+    calls.clear()
+    teleop()
+    assert calls == [("first", "teleopPeriodic"), ("second", "teleopPeriodic"), ("late", "teleopPeriodic")]
+    assert registry.hooks("teleopPeriodic")[-1] == late.teleopPeriodic
@@ -0,0 +1,44 @@
+'''
+    Checks the constants validation and the robot profiles.
+'''
+
+import os
+
+import pytest
+
+import constants
+
+
+def test_defaults_are_valid():
+    groups = constants.build()
+    assert groups["SW"] == constants.Software()
+    assert constants.DERIVED.drive_rotations_per_meter * constants.DERIVED.drive_meters_per_rotation == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("profile", sorted(
+    os.path.splitext(name)[0] for name in os.listdir(constants.PROFILE_DIRECTORY) if name.endswith(".toml")
+))
+def test_profiles_are_valid(profile):
+    constants.build(constants.load_profile(profile))
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"ELEC": {"RF_encoder_DIO": 63}}, "RF_encoder_DIO must be in [0, 62]"),
+    ({"SW": {"drive_deadband": 0.8}}, "drive_deadband must be in [0.0, 0.5]"),
+    ({"SW": {"telemetry_level": 1}}, "telemetry_level must be str"),
+    ({"SW": {"no_such_field": 1}}, "SW has no fields"),
+    ({"PHYSICS": {}}, "unknown constants groups"),
+])
+def test_bad_values_are_rejected(overrides, message):
+    with pytest.raises(ValueError, match=message.replace("[", r"\[").replace("]", r"\]")):
+        constants.build(overrides)
+
+
+def test_shared_can_ids_warn():
+    with pytest.warns(constants.ConstantsWarning, match="CAN ID 2 is used by second_motor_CAN_ID and RB_drive_CAN_ID"):
+        constants.build({"ELEC": {"RB_drive_CAN_ID": 2}})
+
+
+def test_groups_are_frozen():
+    with pytest.raises(AttributeError):
+        constants.SW.drive_kp = 1.0
@@ -0,0 +1,120 @@
+'''
+    Checks that the data logger writes valid WPILOG, read back with wpiutil's
+    DataLogReader, and that a full ring drops and counts records instead of
+    blocking.
+'''
+
+import threading
+import time
+
+from wpiutil.log import DataLogReader
+
+from util.DataLogger import DataLogger
+
+
+DECODE = {
+    "double": lambda record: record.getDouble(),
+    "int64": lambda record: record.getInteger(),
+    "boolean": lambda record: record.getBoolean(),
+    "double[]": lambda record: list(record.getDoubleArray()),
+}
+
+
+def read_back(path):
+    """{entry name: (type, metadata, [(timestamp_us, value)])} from a WPILOG file."""
+    reader = DataLogReader(path)
+    assert reader.isValid()
+    entries, names = {}, {}
+    for record in reader:
+        if record.isStart():
+            start = record.getStartData()
+            names[start.entry] = start.name
+            entries[start.name] = (start.type, start.metadata, [])
+        elif not record.isControl():
+            type_name, _, values = entries[names[record.getEntry()]]
+            values.append((record.getTimestamp(), DECODE[type_name](record)))
+    return entries
+
+
+class StalledFile:
+    """A log file whose writes wait until released, like a slow USB stick."""
+
+    def __init__(self, file):
+        self.file = file
+        self.released = threading.Event()
+
+    def write(self, data):
+        self.released.wait()
+        return self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+
+def test_entries_read_back_as_wpilog(tmp_path):
+    logger = DataLogger(str(tmp_path))
+    double = logger.add_double("/Test/Double", "m/s")
+    integer = logger.add_integer("/Test/Integer")
+    boolean = logger.add_boolean("/Test/Boolean")
+    array = logger.add_double_array("/Test/Array", 3, "x, y, z")
+
+    loops = 2000
+    for loop in range(loops):
+        logger.set_time(1_000_000 + loop * 20_000)
+        double.append(loop * 0.5)
+        integer.append(-loop)
+        boolean.append(loop % 2 == 0)
+        array.append((loop, -loop, 0.25))
+    logger.close()
+
+    assert logger.dropped_records == 0
+    entries = read_back(logger.path)
+    assert {name: entry[:2] for name, entry in entries.items()} == {
+        "/Test/Double": ("double", "m/s"),
+        "/Test/Integer": ("int64", ""),
+        "/Test/Boolean": ("boolean", ""),
+        "/Test/Array": ("double[]", "x, y, z"),
+    }
+
+    timestamps = [1_000_000 + loop * 20_000 for loop in range(loops)]
+    for name, expected in (
+        ("/Test/Double", [loop * 0.5 for loop in range(loops)]),
+        ("/Test/Integer", [-loop for loop in range(loops)]),
+        ("/Test/Boolean", [loop % 2 == 0 for loop in range(loops)]),
+        ("/Test/Array", [[loop, -loop, 0.25] for loop in range(loops)]),
+    ):
+        records = entries[name][2]
+        assert [timestamp for timestamp, _ in records] == timestamps
+        assert [value for _, value in records] == expected
+
+
+def test_full_ring_drops_and_counts_records(tmp_path):
+    logger = DataLogger(str(tmp_path), chunk_size=1024, chunk_count=2)
+    logger._file = stalled = StalledFile(logger._file)
+    double = logger.add_double("/Test/Double")
+
+    # Both chunks fill while the writer is stuck on the first one
+    appended = 0
+    while logger.dropped_records == 0:
+        logger.set_time(appended)
+        double.append(float(appended))
+        appended += 1
+    for _ in range(10):
+        double.append(-1.0)
+        appended += 1
+    assert logger.dropped_records == 11
+
+    # Once the disk catches up, logging resumes
+    stalled.released.set()
+    deadline = time.monotonic() + 2.0
+    while logger._free.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    logger.set_time(10**6)
+    double.append(123.0)
+    appended += 1
+    logger.close()
+
+    records = read_back(logger.path)["/Test/Double"][2]
+    assert len(records) == appended - logger.dropped_records
+    assert records[-1] == (10**6, 123.0)
+    assert all(value >= 0.0 for _, value in records)
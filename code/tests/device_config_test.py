@@ -0,0 +1,58 @@
+'''
+    The startup config cache skips unchanged configs, then checks in the
+    background that the skipped devices still hold them.
+'''
+
+from phoenix6 import configs
+from phoenix6.hardware import TalonFX
+
+from util.DeviceConfigService import DeviceConfigService
+
+
+def make_config():
+    config = configs.TalonFXConfiguration()
+    config.slot0.k_p = 2.5 * 150 / 7  # not exactly representable on the device
+    config.feedback.sensor_to_mechanism_ratio = 6.75
+    return config
+
+
+def apply(cache_path, device, then=None):
+    service = DeviceConfigService(str(cache_path))
+    service.add("motor", device, make_config(), then)
+    service.add("other", TalonFX(51), configs.TalonFXConfiguration())
+    results = {result.name: result for result in service.apply_all()}
+    assert service.wait_verified(timeout=2.0)
+    return results, service.reapplied
+
+
+def test_cached_config_is_verified_against_the_device(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    device = TalonFX(50)
+    seeded = []
+
+    results, _ = apply(cache_path, device)
+    assert not results["motor"].skipped
+    results, reapplied = apply(cache_path, device)
+    assert results["motor"].skipped and reapplied == []
+
+    # Factory reset: the cache still matches, the device does not, so the
+    # background check applies the config again and reruns the callback
+    device.configurator.apply(configs.TalonFXConfiguration(), 0.25)
+    results, reapplied = apply(cache_path, device, lambda: seeded.append(True))
+    assert results["motor"].skipped and reapplied == ["motor"]
+    assert seeded == [True, True]
+    held = configs.TalonFXConfiguration()
+    device.configurator.refresh(held, 0.25)
+    assert held.feedback.sensor_to_mechanism_ratio == 6.75
+
+    results, reapplied = apply(cache_path, device)
+    assert results["motor"].skipped and reapplied == []
+
+
+def test_failing_callback_only_fails_its_own_job(tmp_path):
+    def then():
+        raise RuntimeError("seeding failed")
+
+    results, _ = apply(tmp_path / "cache.json", TalonFX(50), then)
+    assert not results["motor"].ok
+    assert results["other"].ok
@@ -0,0 +1,115 @@
+'''
+    Checks the driver input path: the response curve lookup table, the
+    fixed-step slew limit, and the button snapshot with its edge masks, fed
+    synthetic axis and button sequences through the simulated driver station.
+'''
+
+import math
+
+import numpy as np
+import pytest
+import wpilib
+import wpilib.simulation
+
+from constants import SW
+from util.InputShaping import DriverInput, ResponseCurve, button_mask
+
+PORT = 4
+Button = wpilib.PS5Controller.Button
+
+
+def expected_curve(value, deadband, expo):
+    live = min(max((abs(value) - deadband) / (1.0 - deadband), 0.0), 1.0)
+    return math.copysign((1.0 - expo) * live + expo * live ** 3, value)
+
+
+@pytest.mark.parametrize("deadband, expo", [(0.1, 0.0), (0.08, 0.5), (0.0, 1.0)])
+def test_response_curve_matches_its_formula(deadband, expo):
+    curve = ResponseCurve(deadband, expo)
+    # Linear interpolation is off by at most the steepest slope times one table step
+    tolerance = (1.0 + 2.0 * expo) / (1.0 - deadband) / (SW.input_lut_size - 1)
+    for value in np.linspace(-1.0, 1.0, 401):
+        assert curve(value) == pytest.approx(expected_curve(value, deadband, expo), abs=tolerance)
+    assert curve(0.5 * deadband) == 0.0
+    assert curve(1.7) == curve(1.0) == pytest.approx(1.0)
+    assert curve(-0.6) == -curve(0.6)
+
+
+@pytest.fixture
+def driver_input():
+    ds = wpilib.simulation.DriverStationSim
+    ds.setJoystickAxisCount(PORT, 6)
+    ds.setJoystickButtonCount(PORT, 14)
+    controller = wpilib.PS5Controller(PORT)
+    driver_input = DriverInput(controller)
+
+    def feed(buttons=0, **axes):
+        for index in range(6):
+            ds.setJoystickAxis(PORT, index, 0.0)
+        for name, value in axes.items():
+            ds.setJoystickAxis(PORT, int(getattr(wpilib.PS5Controller.Axis, "k" + name)), value)
+        ds.setJoystickButtons(PORT, buttons)
+        ds.notifyNewData()
+        wpilib.DriverStation.refreshData()
+        driver_input.update()
+
+    driver_input.feed = feed
+    yield driver_input
+    feed()
+
+
+def test_button_snapshot_and_edge_masks(driver_input):
+    l1, cross = button_mask(Button.kL1), button_mask(Button.kCross)
+    held = driver_input.condition(Button.kL1)
+
+    sequence = [0, l1, l1 | cross, cross, 0]
+    expected = [
+        # buttons, rising, falling
+        (0, 0, 0),
+        (l1, l1, 0),
+        (l1 | cross, cross, 0),
+        (cross, 0, l1),
+        (0, 0, cross),
+    ]
+    for buttons, (snapshot, rising, falling) in zip(sequence, expected):
+        driver_input.feed(buttons)
+        assert (driver_input.buttons, driver_input.rising, driver_input.falling) == (snapshot, rising, falling)
+        assert held() == bool(snapshot & l1)
+        assert driver_input.pressed(Button.kL1) == bool(rising & l1)
+        assert driver_input.released(Button.kL1) == bool(falling & l1)
+
+
+def test_outputs_slew_by_a_fixed_step_per_update(driver_input):
+    step = SW.drive_slew_rate * SW.loop_period_s
+    forward = []
+    for _ in range(int(1.0 / step) + 3):
+        driver_input.feed(LeftY=-1.0)
+        forward.append(driver_input.forward)
+    assert forward[:3] == pytest.approx([step, 2 * step, 3 * step])
+    assert forward[-1] == pytest.approx(1.0)
+
+    # Straight back down, one step per update
+    driver_input.feed()
+    assert driver_input.forward == pytest.approx(1.0 - step)
+
+
+def test_left_stick_deadband_is_radial(driver_input):
+    # Let the slew limit catch up on a steady diagonal
+    for _ in range(100):
+        driver_input.feed(LeftX=0.3, LeftY=-0.4)
+    magnitude = math.hypot(driver_input.forward, driver_input.strafe)
+    assert magnitude == pytest.approx(expected_curve(0.5, SW.drive_deadband, SW.drive_expo), abs=1e-3)
+    assert driver_input.strafe / driver_input.forward == pytest.approx(0.3 / 0.4)
+
+    # Each axis alone inside the deadband, but not together: still moves
+    small = 0.8 * SW.drive_deadband
+    for _ in range(100):
+        driver_input.feed(LeftX=small, LeftY=-small)
+    assert driver_input.forward > 0.0 and driver_input.strafe > 0.0
+
+
+def test_trigger_and_rotation_are_shaped(driver_input):
+    for _ in range(100):
+        driver_input.feed(RightX=-0.7, L2=0.2, R2=0.9)
+    assert driver_input.rotation == pytest.approx(expected_curve(-0.7, SW.rotation_deadband, SW.rotation_expo), abs=1e-3)
+    assert driver_input.trigger == pytest.approx(expected_curve(0.7, SW.trigger_deadband, SW.trigger_expo), abs=1e-3)
@@ -0,0 +1,114 @@
+'''
+    SwerveKinematicsEngine against WPILib's SwerveDrive4Kinematics on the
+    robot's own module locations: field-relative rotation, desaturation and
+    module optimization must give the same module states, per command and
+    batched, and forward kinematics the same chassis speeds.
+'''
+
+import math
+
+import numpy as np
+import pytest
+from wpimath.geometry import Rotation2d, Translation2d
+from wpimath.kinematics import ChassisSpeeds, SwerveDrive4Kinematics, SwerveModuleState
+
+import constants
+from constants import SW
+from util.SwerveKinematics import SwerveKinematicsEngine
+
+MAX_SPEED = SW.swerve_max_module_speed_mps
+
+CASES = [
+    # vx, vy, omega, heading, current module angles (None: no optimization)
+    pytest.param(0.0, 0.0, 0.0, 0.0, None, id="stopped"),
+    pytest.param(1.0, 0.0, 0.0, 0.0, None, id="forward"),
+    pytest.param(0.5, -0.8, 0.0, 0.0, None, id="strafe"),
+    pytest.param(0.0, 0.0, 2.0, 0.0, None, id="spin"),
+    pytest.param(1.2, 0.4, -0.7, 0.0, None, id="robot-relative"),
+    pytest.param(1.2, 0.4, -0.7, 1.1, None, id="field-relative"),
+    pytest.param(-0.9, 1.3, 0.5, -2.6, None, id="field-relative-behind"),
+    pytest.param(MAX_SPEED, MAX_SPEED, 0.0, 0.0, None, id="desaturate-translation"),
+    pytest.param(MAX_SPEED, -0.3 * MAX_SPEED, 6.0, 0.8, None, id="desaturate-field-relative"),
+    pytest.param(1.0, 0.5, 0.3, 0.0, (0.4, 0.5, 0.3, 0.45), id="optimize-no-flip"),
+    pytest.param(-1.0, 0.0, 0.0, 0.0, (0.1, -0.2, 0.05, 0.0), id="optimize-reverse"),
+    pytest.param(0.3, 1.0, 1.5, -0.4, (2.9, -3.0, -1.9, 2.2), id="optimize-mixed"),
+    pytest.param(-MAX_SPEED, 0.6 * MAX_SPEED, -5.0, 2.2, (0.2, -1.4, 3.1, -2.8), id="all-three"),
+]
+
+
+def wpilib_states(locations, vx, vy, omega, heading, current_angles):
+    kinematics = SwerveDrive4Kinematics(*(Translation2d(x, y) for x, y in locations))
+    speeds = ChassisSpeeds.fromFieldRelativeSpeeds(vx, vy, omega, Rotation2d(heading))
+    states = kinematics.toSwerveModuleStates(speeds)
+    states = SwerveDrive4Kinematics.desaturateWheelSpeeds(states, MAX_SPEED)
+    if current_angles is not None:
+        for state, angle in zip(states, current_angles):
+            state.optimize(Rotation2d(angle))
+    return (
+        np.array([state.speed for state in states]),
+        np.array([state.angle.radians() for state in states]),
+    )
+
+
+@pytest.mark.parametrize("vx, vy, omega, heading, current_angles", CASES)
+def test_module_states_match_wpilib(vx, vy, omega, heading, current_angles):
+    locations = constants.SWERVE_MODULE_LOCATIONS
+    engine = SwerveKinematicsEngine(locations, MAX_SPEED)
+    current = None if current_angles is None else np.array(current_angles)
+
+    speeds, angles = engine.to_module_states(vx, vy, omega, heading, current)
+    expected_speeds, expected_angles = wpilib_states(locations, vx, vy, omega, heading, current_angles)
+
+    np.testing.assert_allclose(speeds, expected_speeds, atol=1e-9)
+    # Same direction, whichever side of +-pi each one landed on
+    angle_error = np.angle(np.exp(1j * (angles - expected_angles)))
+    np.testing.assert_allclose(angle_error, 0.0, atol=1e-9)
+    assert np.all(np.abs(speeds) <= MAX_SPEED + 1e-9)
+    if current is not None:
+        turn = np.angle(np.exp(1j * (angles - current)))
+        assert np.all(np.abs(turn) <= math.pi / 2 + 1e-9)
+
+
+def test_batch_matches_wpilib_row_by_row():
+    locations = constants.SWERVE_MODULE_LOCATIONS
+    engine = SwerveKinematicsEngine(locations, MAX_SPEED)
+    cases = [case.values for case in CASES]
+
+    # One batch without optimization, one with a row of current angles per command
+    for rows in ([c for c in cases if c[4] is None], [c for c in cases if c[4] is not None]):
+        commands = np.array([c[:3] for c in rows])
+        headings = np.array([c[3] for c in rows])
+        current = None if rows[0][4] is None else np.array([c[4] for c in rows])
+
+        speeds, angles = engine.batch_to_module_states(commands, headings, current)
+        assert speeds.shape == angles.shape == (len(rows), 4)
+        for row, case in enumerate(rows):
+            expected_speeds, expected_angles = wpilib_states(locations, *case)
+            np.testing.assert_allclose(speeds[row], expected_speeds, atol=1e-9)
+            angle_error = np.angle(np.exp(1j * (angles[row] - expected_angles)))
+            np.testing.assert_allclose(angle_error, 0.0, atol=1e-9)
+
+
+def test_chassis_speeds_match_wpilib():
+    locations = constants.SWERVE_MODULE_LOCATIONS
+    engine = SwerveKinematicsEngine(locations, MAX_SPEED)
+    kinematics = SwerveDrive4Kinematics(*(Translation2d(x, y) for x, y in locations))
+
+    # Arbitrary module states, so the least-squares fit is exercised, not just the exact case
+    rng = np.random.default_rng(212)
+    speeds = rng.uniform(-MAX_SPEED, MAX_SPEED, (20, 4))
+    angles = rng.uniform(-math.pi, math.pi, (20, 4))
+
+    expected = []
+    for row_speeds, row_angles in zip(speeds, angles):
+        states = [SwerveModuleState(s, Rotation2d(a)) for s, a in zip(row_speeds, row_angles)]
+        chassis = kinematics.toChassisSpeeds(tuple(states))
+        expected.append((chassis.vx, chassis.vy, chassis.omega))
+    expected = np.array(expected)
+
+    np.testing.assert_allclose(engine.to_chassis_speeds(speeds, angles), expected, atol=1e-9)
+    np.testing.assert_allclose(engine.to_chassis_speeds(speeds[0], angles[0]), expected[0], atol=1e-9)
+
+    # Inverse then forward kinematics round-trips an unsaturated command
+    module_speeds, module_angles = engine.to_module_states(0.8, -0.4, 1.1)
+    np.testing.assert_allclose(engine.to_chassis_speeds(module_speeds, module_angles), [0.8, -0.4, 1.1], atol=1e-9)
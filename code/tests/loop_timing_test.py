@@ -0,0 +1,43 @@
+'''
+    The loop time is the busy time of the main and scheduler callbacks, not
+    the idle gap between them.
+'''
+
+import time
+
+from util.LoopTiming import LoopTiming
+
+
+class Topic:
+    def set(self, value):
+        pass
+
+
+class Telemetry:
+    def add_number_array(self, name, period_s=None):
+        return Topic()
+
+
+def busy(seconds):
+    time.sleep(seconds)
+
+
+def test_loop_time_skips_the_scheduler_offset_gap():
+    timing = LoopTiming(Telemetry(), budget_s=0.02)
+    main = timing.timed("main", busy)
+    periodic = timing.timed("periodic", busy)
+
+    for _ in range(3):
+        # Main callback
+        timing.begin_loop()
+        main(0.002)
+        timing.pause_loop()
+        # Idle until the scheduler callback (kSchedulerOffset on the robot,
+        # stretched here so sleep jitter cannot blur the two), then the
+        # end-of-loop callback
+        time.sleep(0.05)
+        periodic(0.002)
+        time.sleep(0.0005)
+        timing.end_loop()
+
+        assert 0.004 <= timing.last_loop_ns / 1e9 < 0.03
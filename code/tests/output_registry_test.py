@@ -0,0 +1,71 @@
+'''
+    The output layer drops repeated control requests but still sends mode
+    changes, real changes and keep-alives.
+'''
+
+from phoenix6.controls import PositionVoltage, VoltageOut
+
+from util.OutputRegistry import OutputRegistry
+
+
+class RecordingDevice:
+    def __init__(self):
+        self.requests = []
+
+    def set_control(self, request):
+        self.requests.append(request.control_info)
+
+
+def test_repeats_are_suppressed():
+    device = RecordingDevice()
+    outputs = OutputRegistry(keep_alive_s=60.0, tolerance=1e-4)
+    output = outputs.add("motor", device)
+    voltage, position = VoltageOut(0), PositionVoltage(0)
+
+    voltage.output = 3.0
+    assert output.set(voltage)
+    assert not output.set(voltage)
+    voltage.output = 3.0 + 1e-6
+    assert not output.set(voltage)
+
+    # A real change, a changed non-float field and a mode change all go out
+    voltage.output = 4.0
+    assert output.set(voltage)
+    voltage.enable_foc = not voltage.enable_foc
+    assert output.set(voltage)
+    assert output.set(position)
+    assert not output.set(position)
+
+    # Something else commanded the device
+    output.invalidate()
+    assert output.set(position)
+
+    assert [request["name"] for request in device.requests] == [
+        "VoltageOut", "VoltageOut", "VoltageOut", "PositionVoltage", "PositionVoltage",
+    ]
+    assert (outputs.sent, outputs.suppressed) == (5, 3)
+
+
+def test_int_initialized_fields_use_the_tolerance():
+    # Sent before ever being set to a float, the setpoint still holds the int 0
+    device = RecordingDevice()
+    output = OutputRegistry(keep_alive_s=60.0, tolerance=1e-4).add("motor", device)
+    request = VoltageOut(0)
+    assert output.set(request)
+
+    request.output = 3.0
+    assert output.set(request)
+    request.output = 3.0 + 1e-6
+    assert not output.set(request)
+
+
+def test_keep_alive_and_disabled_dedup_resend():
+    device = RecordingDevice()
+    request = VoltageOut(2.0)
+
+    keep_alive = OutputRegistry(keep_alive_s=0.0, tolerance=1e-4).add("motor", device)
+    assert keep_alive.set(request) and keep_alive.set(request)
+
+    disabled = OutputRegistry(keep_alive_s=60.0, tolerance=1e-4, enabled=False).add("motor", device)
+    assert disabled.set(request) and disabled.set(request)
+    assert len(device.requests) == 4
@@ -0,0 +1,78 @@
+'''
+    Full-match runs against physics.py. Simulated time is stepped as fast as
+    the robot loop allows, so a 2:30 match takes seconds, not minutes.
+
+    That is not lockstep: the Talons' closed loops run on Phoenix's own wall
+    clock (see physics.py), so closed-loop results vary from run to run.
+    Checks on unpaced runs are loose enough to hold anyway; a check that
+    needs a closed loop to finish by some simulated time uses step_paced(),
+    which keeps simulated time from running ahead of real time.
+'''
+
+import time
+
+import commands2
+import wpilib.simulation
+
+from constants import OP, SW
+
+
+def step_paced(control, seconds, **mode):
+    """Steps simulated time no faster than real time, one loop at a time."""
+    start = time.perf_counter()
+    for i in range(round(seconds / SW.loop_period_s)):
+        control.step_timing(seconds=SW.loop_period_s, **mode)
+        ahead = (i + 1) * SW.loop_period_s - (time.perf_counter() - start)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def test_full_match_drives_forward(control, robot):
+    with control.run_robot():
+        ps5 = wpilib.simulation.PS5ControllerSim(OP.joystick_port)
+
+        control.step_timing(seconds=1.0, autonomous=False, enabled=False)
+        control.step_timing(seconds=15.0, autonomous=True, enabled=True)
+        control.step_timing(seconds=1.0, autonomous=False, enabled=False)
+
+        # Half stick forward for the whole of teleop
+        ps5.setLeftY(-0.5)
+        ps5.notifyNewData()
+        control.step_timing(seconds=135.0, autonomous=False, enabled=True)
+
+        pose = robot.container.swervedrivesub.get_pose()
+        assert pose.X() > 10.0
+        assert abs(pose.Y()) < 0.1 * pose.X()
+
+
+
+def test_first_motor_reaches_setpoint(control, robot):
+    with control.run_robot():
+        ps5 = wpilib.simulation.PS5ControllerSim(OP.joystick_port)
+        control.step_timing(seconds=0.4, autonomous=False, enabled=True)
+
+        # Square runs the Motion Magic move to the setpoint
+        ps5.setSquareButton(True)
+        ps5.notifyNewData()
+        control.step_timing(seconds=0.4, autonomous=False, enabled=True)
+        ps5.setSquareButton(False)
+        ps5.notifyNewData()
+        # Motion Magic runs on the Talon, on the wall clock
+        step_paced(control, 3.0, autonomous=False, enabled=True)
+
+        position = robot.container.firstmotorsub.get_sysid_state()[0]
+        assert abs(position - SW.FirstMotorSetpoint) < 0.5
+
+
+def test_second_motor_stops_at_limit_switch(control, robot):
+    with control.run_robot():
+        container = robot.container
+        second = container.secondmotorsub
+        control.step_timing(seconds=0.4, autonomous=False, enabled=True)
+
+        commands2.RunCommand(second.go_forward, second).schedule()
+        control.step_timing(seconds=3.0, autonomous=False, enabled=True)
+
+        assert second.is_limit_pressed()
+        assert second.presses == 1
+        assert second.request.output == 0.0
@@ -0,0 +1,138 @@
+'''
+    Checks the pose estimator against drifting odometry and late vision.
+'''
+
+import threading
+import time
+
+import wpilib
+from phoenix6.utils import fpga_to_current_time
+from wpimath.geometry import Pose2d, Rotation2d
+
+from util.PoseEstimator import PoseEstimator, PoseHistory
+
+DT = 0.005
+SPEED = 2.0
+DRIFT = 1.05
+LATENCY = 0.1
+
+
+def true_pose(t):
+    return Pose2d(SPEED * t, 0.5 * t, Rotation2d(0.2 * t))
+
+
+def odometry_pose(t):
+    # Odometry over-reads distance by 5%
+    return Pose2d(DRIFT * SPEED * t, DRIFT * 0.5 * t, Rotation2d(0.2 * t))
+
+
+def run(frames_in_order=True):
+    history = PoseHistory(400)
+    estimator = PoseEstimator(history, (0.1, 0.1, 0.1), (0.2, 0.2, 0.5))
+    pending = []
+    for i in range(1000):
+        t = i * DT
+        history.add(t, odometry_pose(t))
+        if i % 10 == 0:
+            pending.append(t)
+        # Frames arrive LATENCY after capture, in pairs swapped when out of order
+        ready = [c for c in pending if c + LATENCY <= t]
+        if len(ready) >= 2:
+            if not frames_in_order:
+                ready.reverse()
+            for capture in ready:
+                estimator.add_vision_measurement(true_pose(capture), capture)
+                pending.remove(capture)
+    return estimator, t
+
+
+def test_latency_compensated_fusion_beats_odometry():
+    estimator, t = run()
+    truth = true_pose(t)
+    fused = estimator.estimate(odometry_pose(t))
+    odometry_error = odometry_pose(t).translation().distance(truth.translation())
+    fused_error = fused.translation().distance(truth.translation())
+    assert estimator.rejected == 0
+    assert fused_error < 0.1 * odometry_error
+
+
+def test_out_of_order_frames_match_in_order():
+    in_order, t = run(True)
+    out_of_order, _ = run(False)
+    a = in_order.estimate(odometry_pose(t))
+    b = out_of_order.estimate(odometry_pose(t))
+    assert abs(a.X() - b.X()) < 1e-9
+    assert abs(a.Y() - b.Y()) < 1e-9
+
+
+def test_history_interpolates_and_rejects_stale():
+    history = PoseHistory(4)
+    for i in range(8):
+        history.add(i * 0.1, Pose2d(i, 0.0, Rotation2d()))
+    assert history.oldest_timestamp() == 0.4
+    assert abs(history.sample(0.45).X() - 4.5) < 1e-9
+
+    estimator = PoseEstimator(history, (0.1, 0.1, 0.1), (0.5, 0.5, 0.9))
+    assert not estimator.add_vision_measurement(Pose2d(), 0.1)
+    assert estimator.rejected == 1
+
+
+def test_threaded_odometry_is_stamped_in_fpga_time(control, robot):
+    # The odometry thread samples on Phoenix's clock, which is far off the
+    # FPGA clock in simulation, like on the robot
+    with control.run_robot():
+        swerve = robot.container.swervedrivesub
+        control.step_timing(seconds=0.2, autonomous=False, enabled=False)
+        assert abs(fpga_to_current_time(0.0)) > 1.0
+
+        odometry = swerve.odometry
+        odometry.start()
+        try:
+            deadline = time.monotonic() + 2.0
+            start_count = odometry.update_count
+            while odometry.update_count < start_count + 10 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            odometry.stop()
+        assert odometry.update_count >= start_count + 10
+
+        timestamp, pose = odometry.buffer.latest()
+        now = wpilib.Timer.getFPGATimestamp()
+        assert abs(timestamp - now) < 0.1
+
+        # A vision frame captured now lands inside the history
+        assert swerve.add_vision_measurement(pose, now)
+
+
+def test_reset_pose_is_not_overwritten_by_the_odometry_thread(control, robot):
+    with control.run_robot():
+        swerve = robot.container.swervedrivesub
+        control.step_timing(seconds=0.2, autonomous=False, enabled=False)
+
+        # Widen the gap between an update's integration and its publish
+        odometry = swerve.odometry
+        publish = odometry.buffer.publish
+
+        def slow_publish(timestamp, pose):
+            if threading.current_thread().name == "odometry":
+                time.sleep(0.01)
+            publish(timestamp, pose)
+
+        odometry.buffer.publish = slow_publish
+        odometry.start()
+        try:
+            for i in range(20):
+                target = Pose2d(float(i), 0.0, Rotation2d())
+                odometry.reset_pose(target)
+                # An update that was in flight during the reset must not land after it
+                time.sleep(0.011)
+                timestamp, pose = odometry.buffer.latest()
+                assert pose.translation().distance(target.translation()) < 0.5
+        finally:
+            odometry.stop()
+            del odometry.buffer.publish
+
+        # Readers on this thread see one refresh cycle at a time
+        snapshot = odometry.signals.snapshot()
+        assert isinstance(snapshot.values, tuple) and odometry.signals.snapshot() is snapshot
+        assert len(swerve.get_measured_states()) == 8
@@ -0,0 +1,140 @@
+'''
+    Replays recorded driver sessions through the robot and checks what it
+    did, loop by loop, against the outputs stored next to the recording.
+
+    Recordings are written next to the robot's data log (inputs_*.inp); copy
+    any session worth keeping into tests/recordings. scripted_match.inp is a
+    scripted 27 s session (disabled, autonomous, teleop with stick sweeps and
+    button presses) recorded in simulation.
+
+    Every loop the test captures the chassis command given to the swerve
+    drive, the first and second motor control requests, each module's
+    setpoint and the estimated pose.
+
+    Only the command and the requests are an exact regression check against
+    the recording: they must match the stored ones bit for bit. Everything
+    downstream of them goes through Phoenix's simulated closed loops, which
+    run on the wall clock rather than stepped time (see physics.py), so the
+    replay runs paced to real time and still varies a little between runs:
+      - the pose is compared to the stored one within tolerances a few
+        times its run-to-run spread of a few centimetres;
+      - module setpoints depend on the gyro heading a field-relative command
+        is rotated by, so they are not compared to stored ones at all. They
+        are only checked for consistency: they must match WPILib's
+        SwerveDrive4Kinematics for the stored command at the heading this
+        run used (as wheel velocity vectors, so an optimized flip compares
+        equal).
+
+    To store the outputs for a new recording, or after an intended change in
+    behavior, run
+
+        REPLAY_UPDATE_OUTPUTS=1 python -m robotpy test -- -k replay
+'''
+
+import glob
+import math
+import os
+
+import numpy as np
+import pytest
+from wpimath.geometry import Rotation2d
+from wpimath.kinematics import ChassisSpeeds, SwerveDrive4Kinematics
+
+import constants
+from constants import OP, SW
+from util import InputRecording
+from util.InputRecording import InputReplay
+
+RECORDINGS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "*.inp")))
+OUTPUTS_SUFFIX = ".outputs.npz"
+
+MODULE_VELOCITY_TOLERANCE = 1e-6  # m/s, per wheel velocity component
+POSE_TOLERANCE = 0.15             # m
+HEADING_TOLERANCE = 0.1           # rad
+
+
+def capture(container):
+    """One loop of robot outputs."""
+    swerve = container.swervedrivesub
+    first = container.firstmotorsub
+    pose = swerve.get_pose()
+    return (
+        (first.motion_magic.position, first.duty_cycle_request.output, container.secondmotorsub.request.output),
+        swerve.command,
+        module_velocities(swerve.setpoints[:4], swerve.setpoints[4:]),
+        (swerve.command_heading_rad,),
+        (pose.X(), pose.Y(), pose.rotation().radians()),
+    )
+
+
+def module_velocities(speeds, angles):
+    """Wheel velocity vectors, x components then y components."""
+    return [s * math.cos(a) for s, a in zip(speeds, angles)] + [s * math.sin(a) for s, a in zip(speeds, angles)]
+
+
+def wpilib_module_velocities(command, heading_rad):
+    x_mps, y_mps, rot_rad_per_s = command
+    speeds = ChassisSpeeds.fromFieldRelativeSpeeds(x_mps, y_mps, rot_rad_per_s, Rotation2d(heading_rad))
+    states = SwerveDrive4Kinematics.desaturateWheelSpeeds(
+        constants.SWERVE_KINEMATICS.toSwerveModuleStates(speeds), SW.swerve_max_module_speed_mps
+    )
+    return module_velocities([state.speed for state in states], [state.angle.radians() for state in states])
+
+
+@pytest.mark.parametrize("path", RECORDINGS, ids=os.path.basename)
+def test_replay_reproduces_robot_outputs(control, robot, path, tmp_path):
+    frames = InputRecording.load(path)
+
+    loops = []
+    with control.run_robot():
+        container = robot.container
+        # A new recording starts at every disable
+        container.recording_directory = str(tmp_path)
+        container.driver_input.recorder = container._new_input_recorder()
+        replay = InputReplay(frames, OP.joystick_port, SW.loop_period_s)
+        replay.run(lambda: loops.append(capture(container)))
+    container.driver_input.recorder.close()
+
+    # The inputs themselves come back bit-identical
+    replayed = np.concatenate([InputRecording.load(p) for p in container.recording_paths])
+    assert len(container.recording_paths) > 1
+    assert replayed.tobytes() == frames.tobytes()
+
+    outputs = {
+        name: np.array([loop[i] for loop in loops], dtype=float)
+        for i, name in enumerate(("requests", "command", "module_velocities", "command_heading", "pose"))
+    }
+    module_velocities = outputs.pop("module_velocities")
+    command_heading = outputs.pop("command_heading")[:, 0]
+    outputs_path = path[:-len(InputRecording.FILE_EXTENSION)] + OUTPUTS_SUFFIX
+    if os.environ.get("REPLAY_UPDATE_OUTPUTS"):
+        np.savez_compressed(outputs_path, **outputs)
+    expected = np.load(outputs_path)
+
+    np.testing.assert_array_equal(outputs["requests"], expected["requests"])
+    np.testing.assert_array_equal(outputs["command"], expected["command"])
+    expected_velocities = [
+        wpilib_module_velocities(command, heading) for command, heading in zip(expected["command"], command_heading)
+    ]
+    np.testing.assert_allclose(module_velocities, expected_velocities, rtol=0, atol=MODULE_VELOCITY_TOLERANCE)
+    np.testing.assert_allclose(outputs["pose"][:, :2], expected["pose"][:, :2], rtol=0, atol=POSE_TOLERANCE)
+    heading_error = np.abs(np.remainder(outputs["pose"][:, 2] - expected["pose"][:, 2] + math.pi, math.tau) - math.pi)
+    assert heading_error.max() < HEADING_TOLERANCE
+
+
+def test_disable_writes_out_the_recording(control, robot, tmp_path):
+    with control.run_robot():
+        container = robot.container
+        container.recording_directory = str(tmp_path)
+        container.recording_paths = []
+        first = container.driver_input.recorder = container._new_input_recorder()
+
+        control.step_timing(seconds=0.5, autonomous=False, enabled=True)
+        control.step_timing(seconds=0.1, autonomous=False, enabled=False)
+
+        # Far less than one chunk, so only close() can have written it
+        frames = InputRecording.load(first.path)
+        assert 0 < len(frames) == first.frames < 250
+        assert frames["mode"][0] & InputRecording.MODE_ENABLED
+        assert container.driver_input.recorder is not first
+    container.driver_input.recorder.close()
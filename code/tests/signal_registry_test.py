@@ -0,0 +1,98 @@
+'''
+    Checks the signal registry's batched refresh, latency compensation and
+    per-cycle snapshots, with stand-in status signals on a fixed clock.
+'''
+
+import pytest
+
+from util import SignalRegistry as signal_registry
+from util.SignalRegistry import SignalRegistry
+
+NOW = 100.0
+
+
+class Status:
+    def __init__(self, ok=True):
+        self.ok = ok
+
+    def is_ok(self):
+        return self.ok
+
+
+class Timestamp:
+    def __init__(self, time):
+        self.time = time
+
+
+class Signal:
+    def __init__(self, value, age=0.0, ok=True):
+        self.value_as_double = value
+        self.timestamp = Timestamp(NOW - age)
+        self.status = Status(ok)
+
+
+class Phoenix:
+    """Batched refreshes leave the stand-in signals as they are."""
+
+    refreshes = 0
+
+    @classmethod
+    def refresh_all(cls, signals):
+        cls.refreshes += 1
+
+    @classmethod
+    def wait_for_all(cls, timeout_seconds, signals):
+        cls.refreshes += 1
+
+
+@pytest.fixture(autouse=True)
+def phoenix(monkeypatch):
+    monkeypatch.setattr(signal_registry, "BaseStatusSignal", Phoenix)
+    monkeypatch.setattr(signal_registry, "get_current_time_seconds", lambda: NOW)
+
+
+def test_refresh_reads_every_signal_in_one_batch():
+    registry = SignalRegistry()
+    a = registry.register("a", Signal(1.5))
+    b = registry.register("b", Signal(-2.0))
+    assert registry.register("a", Signal(9.0)) == a
+    assert registry.value(a) == 0.0
+
+    refreshes = Phoenix.refreshes
+    registry.refresh()
+    assert Phoenix.refreshes == refreshes + 1
+    assert (registry.value(a), registry.value(b)) == (1.5, -2.0)
+    assert registry.timestamp == NOW and registry.all_good
+
+
+def test_values_are_latency_compensated_to_the_refresh_time():
+    registry = SignalRegistry()
+    fresh = registry.register("fresh", Signal(1.0, age=0.02), slope=Signal(10.0))
+    stale = registry.register("stale", Signal(1.0, age=5.0), slope=Signal(10.0))
+    future = registry.register("future", Signal(1.0, age=-0.01), slope=Signal(10.0))
+    plain = registry.register("plain", Signal(1.0, age=0.02))
+
+    registry.refresh()
+    assert registry.value(fresh) == pytest.approx(1.2)
+    # Capped, so a disconnected device is not extrapolated far
+    assert registry.value(stale) == pytest.approx(1.0 + 10.0 * SignalRegistry.MAX_COMPENSATION_SECONDS)
+    assert registry.value(future) == 1.0
+    assert registry.value(plain) == 1.0
+    assert registry.value(registry.handle("fresh/slope")) == 10.0
+
+
+def test_each_refresh_publishes_a_new_snapshot():
+    registry = SignalRegistry()
+    signal = Signal(1.0)
+    handle = registry.register("position", signal, slope=Signal(0.0, ok=False))
+
+    registry.wait_for_update(0.01)
+    first = registry.snapshot()
+    assert first.value(handle) == first[handle] == 1.0
+    assert first.timestamp == NOW and not first.all_good
+    assert registry.snapshot() is first
+
+    signal.value_as_double = 2.0
+    registry.refresh()
+    assert registry.snapshot()[handle] == 2.0
+    assert first[handle] == 1.0
@@ -0,0 +1,55 @@
+'''
+    Checks the SysId analyzer on synthetic data from a known plant.
+'''
+
+import numpy as np
+
+from util import SysIdAnalysis
+
+KS, KV, KA = 0.25, 0.12, 0.01
+DT = 0.005
+
+
+def simulate_tests(samples_per_test=10000, noise=0.01, seed=0):
+    """Quasistatic and dynamic tests, both directions, on the KS/KV/KA plant."""
+    rng = np.random.default_rng(seed)
+    fit = SysIdAnalysis.FeedforwardFit("plant", KS, KV, KA, 1.0, 0)
+    t_all, test_all, voltage_all, velocity_all = [], [], [], []
+    t0 = 0.0
+    for test, sign, quasistatic in ((1, 1, True), (2, -1, True), (3, 1, False), (4, -1, False)):
+        t = t0 + np.arange(samples_per_test) * DT
+        voltage = sign * (1.0 * (t - t0) if quasistatic else np.full_like(t, 7.0))
+        velocity = np.zeros_like(t)
+        for i in range(1, len(t)):
+            velocity[i] = SysIdAnalysis._step_plant(velocity[i - 1], voltage[i - 1], fit, DT)
+        t_all.append(t)
+        test_all.append(np.full_like(t, test))
+        voltage_all.append(voltage)
+        velocity_all.append(velocity + rng.normal(0.0, noise, len(t)))
+        t0 = t[-1] + 1.0
+    return tuple(np.concatenate(a) for a in (t_all, test_all, voltage_all, velocity_all))
+
+
+def test_fit_recovers_plant():
+    fit, = SysIdAnalysis.fit_feedforward({"plant": simulate_tests()})
+    assert abs(fit.ks - KS) < 0.02
+    assert abs(fit.kv - KV) / KV < 0.02
+    assert fit.r_squared > 0.99
+
+
+def test_gain_sweeps_pick_interior_gains():
+    fit = SysIdAnalysis.FeedforwardFit("plant", KS, KV, KA, 1.0, 0)
+    kp_values, kd_values = np.linspace(0, 1000, 41), np.linspace(0, 20, 41)
+    kp, kd, cost = SysIdAnalysis.sweep_position_gains(fit, kp_values, kd_values)
+    assert cost.shape == (41, 41)
+    assert kp_values[0] < kp < kp_values[-1] and kd_values[0] < kd < kd_values[-1]
+    # Optimum of a 201 x 201 sweep over the same ranges: kp 425, kd 5.3
+    assert abs(kp - 425.0) <= 50.0 and abs(kd - 5.3) <= 1.0
+
+    # Past the deadbeat gain, where one 2 ms step closes the whole error,
+    # the discrete loop overshoots; below it, it is slower
+    deadbeat = KV / (1.0 - np.exp(-KV / KA * 0.002))
+    kp_values = np.linspace(0, 15, 61)
+    kp, cost = SysIdAnalysis.sweep_velocity_gains(fit, kp_values)
+    assert kp_values[0] < kp < kp_values[-1]
+    assert abs(kp - deadbeat) <= 0.25
@@ -0,0 +1,81 @@
+'''
+    Checks the telemetry filter (epsilon and period), the competition level's
+    debug suppression, and that Robot flushes each loop's values in the same
+    loop, after the commands ran.
+'''
+
+import ntcore
+import pytest
+import wpilib.simulation
+
+from constants import OP, SW
+from subsystems.TelemetrySubsystem import TelemetrySubsystemClass
+
+
+def subscribe(name):
+    table = ntcore.NetworkTableInstance.getDefault().getTable("SmartDashboard")
+    return table.getDoubleArrayTopic(name).subscribe([])
+
+
+def test_topic_publishes_changes_beyond_epsilon_at_most_once_per_period():
+    telemetry = TelemetrySubsystemClass("debug")
+    topic = telemetry.add_number_array("Telemetry Test Filter", epsilon=0.1, period_s=0.5)
+    published = subscribe("Telemetry Test Filter")
+
+    assert not topic.flush(0.0)  # nothing set yet
+    topic.set((1.0, 2.0))
+    assert topic.flush(0.0)
+    assert list(published.get()) == [1.0, 2.0]
+
+    # Unchanged, or moved by no more than epsilon: not republished
+    topic.set((1.0, 2.05))
+    assert not topic.flush(1.0)
+    assert list(published.get()) == [1.0, 2.0]
+
+    # A real change waits for the period, then goes out
+    topic.set((1.0, 2.5))
+    assert topic.flush(1.2)
+    topic.set((3.0, 2.5))
+    assert not topic.flush(1.5)
+    assert topic.flush(1.7)
+    assert list(published.get()) == [3.0, 2.5]
+
+    # A different length is always a change
+    topic.set((3.0,))
+    assert topic.flush(2.5)
+
+
+@pytest.mark.parametrize("level, created", [("debug", True), ("competition", False)])
+def test_debug_topics_only_exist_at_debug_level(level, created):
+    telemetry = TelemetrySubsystemClass(level)
+    normal = telemetry.add_number("Telemetry Test Normal " + level)
+    debug = telemetry.add_number("Telemetry Test Debug " + level, debug=True)
+    normal.set(1.0)
+    debug.set(1.0)
+    telemetry.flush()
+
+    assert [topic.name for topic in telemetry.topics] == [normal.name] + ([debug.name] if created else [])
+    assert telemetry.published_count == len(telemetry.topics)
+    table = ntcore.NetworkTableInstance.getDefault().getTable("SmartDashboard")
+    assert table.getTopic(debug.name).exists() == created
+
+
+def test_unknown_level_is_rejected():
+    with pytest.raises(ValueError, match="unknown telemetry level"):
+        TelemetrySubsystemClass("verbose")
+
+
+def test_loop_values_are_published_in_the_same_loop(control, robot):
+    with control.run_robot():
+        swerve = robot.container.swervedrivesub
+        published = subscribe("Swerve Command Speeds")
+
+        # The drive command sets the topic after every subsystem periodic ran,
+        # and the slew limiter changes it every loop while the stick ramps up
+        ps5 = wpilib.simulation.PS5ControllerSim(OP.joystick_port)
+        ps5.setLeftY(-1.0)
+        ps5.notifyNewData()
+        for _ in range(5):
+            control.step_timing(seconds=SW.loop_period_s, autonomous=False, enabled=True)
+            assert list(published.get()) == pytest.approx(list(swerve.command))
+        assert any(swerve.command)
@@ -0,0 +1,41 @@
+'''
+    Sampling of array-backed trajectories: interpolation, clamping and
+    uneven sample spacing.
+'''
+
+import math
+
+import numpy as np
+import pytest
+
+from util.TrajectoryStore import COLUMNS, HolonomicTrajectory
+
+
+def make_trajectory():
+    # Uneven spacing, and a heading that crosses +-pi
+    t = np.array([0.0, 0.02, 0.04, 0.05])
+    data = np.zeros((len(COLUMNS), len(t)))
+    data[0] = t
+    data[1] = [0.0, 1.0, 2.0, 4.0]
+    data[3] = [3.0, math.pi - 0.05, -math.pi + 0.05, -3.0]
+    data[4] = [1.0, 2.0, 3.0, 0.0]
+    return HolonomicTrajectory("test", 0.02, data)
+
+
+def test_sample_interpolates_between_neighbours():
+    trajectory = make_trajectory()
+    x, y, heading, vx, vy, omega = trajectory.sample(0.045)
+    assert x == pytest.approx(3.0)
+    assert vx == pytest.approx(1.5)
+    assert (y, vy, omega) == (0.0, 0.0, 0.0)
+
+    # Halfway across the wrap is pi, not 0
+    heading = trajectory.sample(0.03)[2]
+    assert abs(math.remainder(heading - math.pi, math.tau)) < 1e-9
+
+
+def test_sample_holds_the_ends():
+    trajectory = make_trajectory()
+    assert trajectory.sample(-1.0) == trajectory.sample(0.0)
+    assert trajectory.sample(10.0) == (4.0, 0.0, -3.0, 0.0, 0.0, 0.0)
+    assert trajectory.sample(0.02)[0] == pytest.approx(1.0)
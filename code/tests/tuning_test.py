@@ -0,0 +1,61 @@
+'''
+    Edits a gain over NetworkTables and checks that it reaches the Talon
+    through the background config worker, which also invalidates the
+    device's cached boot config.
+'''
+
+import json
+import time
+
+import ntcore
+from phoenix6.configs import Slot0Configs, TalonFXConfiguration
+from phoenix6.hardware import TalonFX
+
+from util.DeviceConfigService import ConfigWorker, DeviceConfigService
+
+
+def test_live_gain_edit_is_applied(control, robot):
+    with control.run_robot():
+        container = robot.container
+        table = ntcore.NetworkTableInstance.getDefault().getTable("Tuning/FirstMotor/Slot0")
+        status = table.getStringTopic("status").subscribe("")
+        control.step_timing(seconds=0.2, autonomous=False, enabled=False)
+        assert status.get() == "boot"
+
+        # A dashboard sets kP; the group is applied once the edits settle. The
+        # worker runs on the wall clock, so give it real time too.
+        table.getEntry("kP").setDouble(7.5)
+        for _ in range(50):
+            control.step_timing(seconds=0.2, autonomous=False, enabled=False)
+            if status.get() == "applied":
+                break
+            time.sleep(0.02)
+        assert status.get() == "applied"
+
+        applied = Slot0Configs()
+        container.firstmotorsub.first_motor.configurator.refresh(applied)
+        assert applied.k_p == 7.5
+        container.tuning_worker.close()
+
+
+def test_worker_drops_cached_fingerprint_before_applying(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    device = TalonFX(52)
+    configs = DeviceConfigService(str(cache_path))
+    configs.add("tuned_motor", device, TalonFXConfiguration())
+    configs.apply_all()
+    assert "tuned_motor" in json.loads(cache_path.read_text())
+
+    worker = ConfigWorker(configs)
+    section = Slot0Configs()
+    section.k_p = 1.5
+    worker.submit("Tuned", [("tuned_motor", device)], section)
+    deadline = time.monotonic() + 2.0
+    results = []
+    while not results and time.monotonic() < deadline:
+        results = worker.results()
+        time.sleep(0.01)
+    worker.close()
+
+    assert results and results[0].ok
+    assert "tuned_motor" not in json.loads(cache_path.read_text())
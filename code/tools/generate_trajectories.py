@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Generates the autonomous trajectories offline and writes them to
+deploy/trajectories, where the robot memory-maps them at startup.
+
+Run from the code directory after editing PATHS, then redeploy:
+
+    python tools/generate_trajectories.py
+"""
+
+import math
+import os
+import sys
+
+import numpy as np
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.trajectory import TrajectoryConfig, TrajectoryGenerator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import SW
+from util import TrajectoryStore
+from util.TrajectoryStore import COLUMNS, HolonomicTrajectory
+
+OUTPUT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "deploy", "trajectories")
+SAMPLE_PERIOD_S = 0.02
+
+# Waypoints are (x m, y m, direction of travel in degrees). The robot heading is
+# separate on a swerve and is blended from start_heading to end_heading.
+PATHS = {
+    "forward_2m": {
+        "waypoints": [(0.0, 0.0, 0.0), (2.0, 0.0, 0.0)],
+        "start_heading": 0.0,
+        "end_heading": 0.0,
+    },
+    "s_curve": {
+        "waypoints": [(0.0, 0.0, 0.0), (1.5, 1.0, 0.0)],
+        "start_heading": 0.0,
+        "end_heading": 90.0,
+    },
+    "back_to_start": {
+        "waypoints": [(2.0, 0.0, 180.0), (0.0, 0.0, 180.0)],
+        "start_heading": 0.0,
+        "end_heading": 0.0,
+    },
+}
+
+
+def generate(name, waypoints, start_heading, end_heading,
+             max_velocity=SW.auto_max_speed_mps, max_acceleration=SW.auto_max_acceleration_mps2):
+    config = TrajectoryConfig(max_velocity, max_acceleration)
+    poses = [Pose2d(x, y, Rotation2d.fromDegrees(direction)) for x, y, direction in waypoints]
+    path = TrajectoryGenerator.generateTrajectory(poses, config)
+
+    t = np.arange(0.0, path.totalTime(), SAMPLE_PERIOD_S)
+    t = np.append(t[t < path.totalTime() - 1e-6], path.totalTime())
+
+    data = np.zeros((len(COLUMNS), len(t)))
+    data[0] = t
+    for i, time in enumerate(t):
+        state = path.sample(float(time))
+        direction = state.pose.rotation().radians()
+        data[1, i] = state.pose.X()
+        data[2, i] = state.pose.Y()
+        data[4, i] = state.velocity * math.cos(direction)
+        data[5, i] = state.velocity * math.sin(direction)
+
+    # Smooth (cosine) heading blend, so omega starts and ends at zero
+    start = math.radians(start_heading)
+    change = math.remainder(math.radians(end_heading) - start, 2 * math.pi)
+    phase = t / path.totalTime()
+    data[3] = start + change * (1 - np.cos(math.pi * phase)) / 2
+    data[6] = change * math.pi / (2 * path.totalTime()) * np.sin(math.pi * phase)
+
+    # The last sample holds position with zero velocity
+    data[4:, -1] = 0.0
+
+    return HolonomicTrajectory(name, SAMPLE_PERIOD_S, data)
+
+
+def main():
+    os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+    for name, path in PATHS.items():
+        trajectory = generate(name, **path)
+        filename = os.path.join(OUTPUT_DIRECTORY, name + TrajectoryStore.FILE_EXTENSION)
+        TrajectoryStore.save(filename, trajectory)
+        print(f"{name}: {trajectory.samples} samples, {trajectory.duration:.2f} s -> {filename}")
+
+
+if __name__ == "__main__":
+    main()
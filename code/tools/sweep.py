@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Runs the robot in simulation many times with different constants and
+collects one row of metrics per run into a single results file.
+
+Each run is a headless robot (robot.py + physics.py, as under `robotpy test`)
+in its own process, with overrides applied to the SW/MECH/PHYS constants
+(on top of the ROBOT_PROFILE, if set) before any robot module is imported.
+Overrides are validated like a profile, so out-of-range values fail the run. The runs are spread over a process
+pool. A run either follows a trajectory in autonomous or replays a recorded
+driver session:
+
+    python tools/sweep.py --path s_curve --grid SW.steer_kp=30,50,80 --grid SW.drive_kp=0.05,0.1,0.2
+    python tools/sweep.py --recording tests/recordings/scripted_match.inp \\
+        --random 200 --range SW.swerve_max_speed_mps=2:4.5 --range SW.drive_slew_rate=1:6
+
+Results go to a .npz file with one array per column (the override values,
+then the metrics), loadable with numpy.load. The best runs are printed.
+
+Phoenix runs its simulated closed loops on the wall clock, so by default
+simulated time is paced to real time (--pace 1). Use --pace 0 to step as
+fast as possible when only open-loop behavior matters.
+"""
+
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+CODE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_DIRECTORY)
+
+GROUPS = ("SW", "MECH", "PHYS")
+
+METRICS = (
+    "path_error_rms_m",     # true pose vs the trajectory, while it runs
+    "path_error_max_m",
+    "heading_error_max_rad",
+    "final_error_m",        # when the trajectory ends
+    "settling_time_s",      # after the trajectory ends, until within --tolerance for good
+    "peak_current_a",       # total of every simulated motor
+    "odometry_error_m",     # estimated vs true pose at the end of the run
+    "distance_m",           # true path length driven
+    "wall_time_s",
+)
+
+
+# ---- OVERRIDES ----
+
+def parse_key(text):
+    """'SW.steer_kp' -> ('SW', 'steer_kp'), checked against constants.py."""
+    import dataclasses
+    import constants
+
+    group, _, name = text.partition(".")
+    if group not in GROUPS or not name:
+        raise ValueError(f"{text}: expected one of {', '.join(GROUPS)} followed by .name")
+    types = {field.name: field.type for field in dataclasses.fields(constants.GROUPS[group])}
+    if name not in types:
+        raise ValueError(f"{text}: {group} has no field {name}")
+    if types[name] not in (int, float):
+        raise ValueError(f"{text}: only numeric constants can be swept")
+    return group, name
+
+
+def parse_grid(text):
+    """'SW.steer_kp=30,50,80' -> ('SW.steer_kp', [30.0, 50.0, 80.0])"""
+    key, _, values = text.partition("=")
+    parse_key(key)
+    return key, [float(value) for value in values.split(",")]
+
+
+def parse_range(text):
+    """'SW.drive_kp=0.05:0.2' -> ('SW.drive_kp', 0.05, 0.2)"""
+    key, _, bounds = text.partition("=")
+    parse_key(key)
+    low, _, high = bounds.partition(":")
+    return key, float(low), float(high)
+
+
+def grid_configs(grids):
+    """Every combination of the grid values, as a list of {key: value}."""
+    keys = [key for key, _ in grids]
+    return [dict(zip(keys, values)) for values in itertools.product(*(values for _, values in grids))]
+
+
+def random_configs(ranges, count, seed):
+    """`count` configs drawn uniformly from the ranges."""
+    rng = np.random.default_rng(seed)
+    samples = {key: rng.uniform(low, high, count) for key, low, high in ranges}
+    return [{key: float(values[i]) for key, values in samples.items()} for i in range(count)]
+
+
+def apply_overrides(overrides):
+    """
+    Rebuilds the constants with the overrides on top of the selected
+    profile. Must run before any robot module does `from constants import ...`.
+    """
+    import dataclasses
+    import constants
+
+    changes = {}
+    for key, value in overrides.items():
+        group, name = parse_key(key)
+        types = {field.name: field.type for field in dataclasses.fields(constants.GROUPS[group])}
+        # Ints stay ints (CAN IDs, table sizes)
+        changes.setdefault(group, {})[name] = types[name](value)
+    constants.apply(changes)
+
+
+# ---- ONE RUN ----
+
+class Scenario:
+    """What each run does: follow a trajectory, or replay a recording."""
+
+    def __init__(self, path=None, recording=None, settle_s=2.0, tolerance_m=0.05, pace=1.0):
+        self.path = path
+        self.recording = recording
+        self.settle_s = settle_s
+        self.tolerance_m = tolerance_m
+        self.pace = pace
+
+
+def _motor_current(engine):
+    motors = [module.drive for module in engine.modules] + [module.steer for module in engine.modules]
+    motors += [engine.first_motor, engine.second_motor]
+    return sum(abs(motor.model.getCurrentDraw()) for motor in motors)
+
+
+def _quiet_worker():
+    """Pool initializer: the robot and Phoenix logs of every run would drown the progress line."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+
+def run_config(args):
+    """Worker entry point: one headless robot run, returns (index, metrics, error)."""
+    index, overrides, scenario = args
+    start = time.perf_counter()
+
+    # wpilib.getDeployDirectory() looks next to the main module, as if run from robot.py
+    sys.modules["__main__"].__file__ = os.path.join(CODE_DIRECTORY, "robot.py")
+
+    # Phoenix keeps simulated device state in ./ctre_sim; keep each run's apart
+    scratch = tempfile.mkdtemp(prefix="sweep")
+    os.chdir(scratch)
+    try:
+        apply_overrides(overrides)
+        metrics, error = _simulate(scenario), ""
+    except Exception as e:
+        metrics, error = dict.fromkeys(METRICS, math.nan), f"{type(e).__name__}: {e}"
+    finally:
+        os.chdir(CODE_DIRECTORY)
+        shutil.rmtree(scratch, ignore_errors=True)
+    metrics["wall_time_s"] = time.perf_counter() - start
+    return index, metrics, error
+
+
+def _simulate(scenario):
+    import commands2
+    import wpilib
+    from pyfrc.physics.core import PhysicsInterface
+    from wpilib.simulation import DriverStationSim, pauseTiming, restartTiming, stepTiming
+    from wpimath.geometry import Pose2d, Rotation2d
+
+    import robot as robot_module
+    from commands.TrajectoryCommands import FollowTrajectory, ResetPose
+    from constants import OP, SW
+    from util import InputRecording
+    from util.InputRecording import InputReplay
+
+    physics, robot_class = PhysicsInterface._create_and_attach(robot_module.Robot, pathlib.Path(CODE_DIRECTORY))
+    initialized = threading.Event()
+
+    # The physics engine is built right after robotInit
+    class SweepRobot(robot_class):
+        def _simulationInit(self):
+            try:
+                super()._simulationInit()
+            finally:
+                initialized.set()
+
+    pauseTiming()
+    restartTiming()
+    wpilib.DriverStation.silenceJoystickConnectionWarning(True)
+    DriverStationSim.setDsAttached(True)
+    DriverStationSim.setEnabled(False)
+    DriverStationSim.notifyNewData()
+
+    robot = SweepRobot()
+    thread = threading.Thread(target=robot.startCompetition, daemon=True)
+    thread.start()
+    if not initialized.wait(timeout=10.0):
+        raise RuntimeError("robot did not initialize")
+
+    container = robot.container
+    swerve = container.swervedrivesub
+    engine = physics.engine
+
+    trajectory = None
+    if scenario.path is not None:
+        trajectory = container.autosub.get_trajectory(scenario.path)
+        if trajectory is None:
+            raise ValueError(f"no trajectory {scenario.path}")
+        container.autosub.add_routine("Sweep", commands2.SequentialCommandGroup(
+            ResetPose(swerve, trajectory), FollowTrajectory(swerve, trajectory),
+        ), default=True)
+        loops = int((trajectory.duration + scenario.settle_s) / SW.loop_period_s)
+        frames = None
+    else:
+        frames = InputRecording.load(scenario.recording)
+        replay = InputReplay(frames, OP.joystick_port, SW.loop_period_s)
+        loops = len(frames)
+
+    path_errors, heading_errors, settled_at = [], [], None
+    peak_current = distance = 0.0
+    final_error = math.nan
+    origin = trajectory.initial_pose() if trajectory is not None else None
+    last = engine.pose
+    wall_start = time.perf_counter()
+
+    if trajectory is not None:
+        DriverStationSim.setAutonomous(True)
+        DriverStationSim.setEnabled(True)
+
+    for i in range(loops):
+        if frames is not None:
+            replay.apply(frames[i])
+        else:
+            DriverStationSim.notifyNewData()
+        stepTiming(SW.loop_period_s)
+        if scenario.pace > 0:
+            ahead = (i + 1) * SW.loop_period_s / scenario.pace - (time.perf_counter() - wall_start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+        pose = engine.pose
+        peak_current = max(peak_current, _motor_current(engine))
+        distance += pose.translation().distance(last.translation())
+        last = pose
+
+        if trajectory is not None:
+            # Time since the routine started, which was the first autonomous loop
+            t = (i + 1) * SW.loop_period_s
+            x, y, heading = trajectory.sample(t)[:3]
+            reference = Pose2d(x, y, Rotation2d(heading)).relativeTo(origin)
+            error = pose.translation().distance(reference.translation())
+            if t <= trajectory.duration:
+                path_errors.append(error)
+                heading_errors.append(abs(math.remainder(pose.rotation().radians() - reference.rotation().radians(), math.tau)))
+                final_error = error
+            elif error <= scenario.tolerance_m:
+                if settled_at is None:
+                    settled_at = t - trajectory.duration
+            else:
+                settled_at = None
+
+    estimated = swerve.get_pose()
+    if origin is not None:
+        estimated = estimated.relativeTo(origin)
+    odometry_error = estimated.translation().distance(engine.pose.translation())
+
+    robot.endCompetition()
+    stepTiming(1.0)
+    thread.join(timeout=2.0)
+
+    path_errors = np.array(path_errors) if path_errors else np.full(1, math.nan)
+    return {
+        "path_error_rms_m": float(np.sqrt(np.mean(np.square(path_errors)))),
+        "path_error_max_m": float(np.max(path_errors)),
+        "heading_error_max_rad": float(max(heading_errors)) if heading_errors else math.nan,
+        "final_error_m": final_error,
+        "settling_time_s": math.nan if settled_at is None else settled_at,
+        "peak_current_a": peak_current,
+        "odometry_error_m": odometry_error,
+        "distance_m": distance,
+    }
+
+
+# ---- SWEEP ----
+
+def sweep(configs, scenario, processes=None):
+    """Runs every config on a process pool. Returns (metrics columns, errors) in config order."""
+    columns = {name: np.full(len(configs), math.nan) for name in METRICS}
+    errors = [""] * len(configs)
+
+    # One fresh interpreter per run: the constants are bound at import time,
+    # and the HAL and Phoenix simulations are process-global
+    context = multiprocessing.get_context("spawn")
+    jobs = [(i, config, scenario) for i, config in enumerate(configs)]
+    done = 0
+    start = time.perf_counter()
+    with context.Pool(processes, initializer=_quiet_worker, maxtasksperchild=1) as pool:
+        for index, metrics, error in pool.imap_unordered(run_config, jobs):
+            for name, value in metrics.items():
+                columns[name][index] = value
+            errors[index] = error
+            done += 1
+            elapsed = time.perf_counter() - start
+            print(f"\r{done}/{len(configs)} runs, {elapsed:.0f} s", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return columns, errors
+
+
+def save(path, configs, columns, errors):
+    keys = sorted({key for config in configs for key in config})
+    arrays = {key: np.array([config.get(key, math.nan) for config in configs], dtype=float) for key in keys}
+    arrays.update(columns)
+    arrays["error"] = np.array(errors)
+    np.savez(path, **arrays)
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    scenario_group = parser.add_mutually_exclusive_group(required=True)
+    scenario_group.add_argument("--path", help="trajectory to follow in autonomous (deploy/trajectories)")
+    scenario_group.add_argument("--recording", help="driver input recording (.inp) to replay")
+    parser.add_argument("--grid", action="append", default=[], metavar="GROUP.name=v1,v2,...",
+                        help="values to try; every combination of the grids is run")
+    parser.add_argument("--range", action="append", default=[], metavar="GROUP.name=low:high",
+                        help="range to sample uniformly, with --random")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="number of random samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds simulated after the trajectory")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="settled position error (m)")
+    parser.add_argument("--pace", type=float, default=1.0, help="simulated seconds per wall second, 0 = unpaced")
+    parser.add_argument("--processes", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--sort", default="path_error_rms_m", choices=METRICS, help="metric to rank runs by")
+    parser.add_argument("--output", default="sweep_results.npz")
+    args = parser.parse_args()
+
+    grids = [parse_grid(text) for text in args.grid]
+    ranges = [parse_range(text) for text in args.range]
+    configs = grid_configs(grids) if grids else [{}]
+    if args.random:
+        samples = random_configs(ranges, args.random, args.seed)
+        configs = [{**config, **sample} for config in configs for sample in samples]
+
+    recording = os.path.abspath(args.recording) if args.recording else None
+    scenario = Scenario(args.path, recording, args.settle, args.tolerance, args.pace)
+    print(f"{len(configs)} runs", file=sys.stderr)
+    columns, errors = sweep(configs, scenario, args.processes)
+    keys = save(args.output, configs, columns, errors)
+
+    failed = sum(1 for error in errors if error)
+    print(f"wrote {args.output} ({len(configs)} runs, {failed} failed)")
+    for error in sorted(set(error for error in errors if error)):
+        print(f"  failed: {error}")
+
+    order = np.argsort(columns[args.sort])  # NaNs sort last
+    header = keys + [args.sort, "peak_current_a"]
+    print("  ".join(f"{name:>24}" for name in header))
+    for i in order[:10]:
+        row = [configs[i].get(key, math.nan) for key in keys] + [columns[args.sort][i], columns["peak_current_a"][i]]
+        print("  ".join(f"{value:>24.4g}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
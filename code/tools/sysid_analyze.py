@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Fits feedforward gains to the characterization data in a robot data log and
+sweeps feedback gains on the fitted plant.
+
+Run the SysId tests from the dashboard (all four per mechanism), copy the
+.wpilog off the robot, then:
+
+    python tools/sysid_analyze.py robot_20250301_101500.wpilog
+
+Gains are printed in the Talon's units, as the SW constants they replace.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from wpiutil.log import DataLogReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from util import SysIdAnalysis
+
+PREFIX = "/SysId/"
+
+# How each mechanism is closed-loop controlled, and the SW keys its gains go into
+MECHANISMS = {
+    "FirstMotor": ("position", "First_ks", "First_kv", "First_ka", "First_kp", "First_kd"),
+    "SwerveSteer": ("position", None, None, None, "steer_kp", "steer_kd"),
+    "SwerveDrive": ("velocity", "drive_ks", "drive_kv", None, "drive_kp", None),
+}
+
+
+def read_sysid_log(path):
+    """Returns {mechanism: (t, test, voltage, position, velocity)} from a WPILOG file."""
+    entries = {}
+    rows = {}
+    for record in DataLogReader(path):
+        if record.isStart():
+            start = record.getStartData()
+            if start.name.startswith(PREFIX):
+                entries[start.entry] = start.name[len(PREFIX):]
+                rows.setdefault(entries[start.entry], [])
+        elif not record.isControl() and record.getEntry() in entries:
+            rows[entries[record.getEntry()]].append((record.getTimestamp() / 1e6, *record.getDoubleArray()))
+
+    data = {}
+    for name, values in rows.items():
+        if values:
+            array = np.array(values)
+            data[name] = tuple(array[:, i] for i in range(5))
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="robot .wpilog file")
+    parser.add_argument("--max-kp", type=float, default=100.0, help="largest kp to try")
+    parser.add_argument("--max-kd", type=float, default=10.0, help="largest kd to try")
+    parser.add_argument("--grid", type=int, default=60, help="gain values per axis")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = read_sysid_log(args.log)
+    if not data:
+        sys.exit(f"no {PREFIX} entries in {args.log}")
+    samples = sum(len(columns[0]) for columns in data.values())
+    print(f"read {samples} samples from {len(data)} mechanisms in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    fits = SysIdAnalysis.fit_feedforward(
+        {name: (t, test, voltage, velocity) for name, (t, test, voltage, _, velocity) in data.items()}
+    )
+    kp_values = np.linspace(0.0, args.max_kp, args.grid)
+    kd_values = np.linspace(0.0, args.max_kd, args.grid)
+
+    for fit in fits:
+        kind, ks_key, kv_key, ka_key, kp_key, kd_key = MECHANISMS.get(fit.name, ("position",) + (None,) * 5)
+        print(f"\n{fit.name}: {fit.samples} samples, r^2 = {fit.r_squared:.4f}")
+        print(f"  ks = {fit.ks:.4f} V  kv = {fit.kv:.4f} V/(rot/s)  ka = {fit.ka:.4f} V/(rot/s^2)")
+
+        if kind == "position":
+            kp, kd, _ = SysIdAnalysis.sweep_position_gains(fit, kp_values, kd_values)
+        else:
+            kp, _ = SysIdAnalysis.sweep_velocity_gains(fit, kp_values)
+            kd = None
+        print(f"  best feedback: kp = {kp:.4f}" + (f"  kd = {kd:.4f}" if kd is not None else ""))
+
+        suggestions = [(ks_key, fit.ks), (kv_key, fit.kv), (ka_key, fit.ka), (kp_key, kp), (kd_key, kd)]
+        for key, value in suggestions:
+            if key is not None and value is not None:
+                print(f'    "{key}": {value:.4f},')
+
+    print(f"\nfit and gain sweeps took {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import logging
+log = logging.Logger('P212-robot')
+import os
+import tracemalloc
+
+
+class AllocationCounter:
+    """
+    Debug-mode counter for memory blocks allocated by robot code per loop.
+
+    Call mark_loop() once at the end of every robot loop. Between two calls
+    tracemalloc records every allocation made from files under code_dir that is
+    still alive at the end of the loop; those are the objects that build up
+    garbage-collector pressure. Loops that allocate more than `threshold` blocks
+    are logged with their top allocation sites.
+
+    When disabled, mark_loop() is a no-op and tracemalloc is never started.
+    """
+
+    def __init__(self, enabled, code_dir=None, threshold=0, report_every=50, top_sites=3):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.report_every = report_every
+        self.top_sites = top_sites
+
+        self.loops = 0
+        self.last_count = 0
+        self.max_count = 0
+        self.total_count = 0
+
+        code_dir = code_dir or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._filters = (tracemalloc.Filter(True, os.path.join(code_dir, "*")),)
+
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def mark_loop(self):
+        """Closes the current loop's measurement window and opens the next one."""
+        if not self.enabled:
+            return
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        tracemalloc.clear_traces()
+
+        stats = snapshot.statistics("lineno")
+        count = sum(stat.count for stat in stats)
+
+        self.loops += 1
+        self.last_count = count
+        self.total_count += count
+        self.max_count = max(self.max_count, count)
+
+        if count > self.threshold and self.loops % self.report_every == 0:
+            sites = ", ".join(
+                f"{stat.traceback[0].filename.rsplit(os.sep, 1)[-1]}:{stat.traceback[0].lineno} x{stat.count}"
+                for stat in stats[:self.top_sites]
+            )
+            log.warning(f"{count} blocks allocated in loop {self.loops}: {sites}")
+
+    def average_count(self):
+        return self.total_count / self.loops if self.loops else 0.0
+
+    def stop(self):
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.enabled = False
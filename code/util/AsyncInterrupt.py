@@ -0,0 +1,60 @@
+import logging
+log = logging.Logger('P212-robot')
+import threading
+
+import wpilib
+
+WaitResult = wpilib.SynchronousInterrupt.WaitResult
+
+
+class AsynchronousInterrupt:
+    """
+    Calls back on digital input edges from a dedicated thread, like WPILib's
+    C++ AsynchronousInterrupt (which RobotPy does not wrap).
+
+    The thread blocks in SynchronousInterrupt.waitForInterrupt(), so an edge
+    is handled within the interrupt latency instead of on the next 20 ms loop.
+    callback(rising, falling, rising_timestamp, falling_timestamp) runs on
+    that thread; timestamps are the FPGA seconds the edges were latched at.
+    Keep the callback short, and hand anything for the main loop over
+    through something thread-safe.
+    """
+
+    def __init__(self, source, callback, rising=True, falling=True, name="interrupt"):
+        self.callback = callback
+        self.name = name
+        self._interrupt = wpilib.SynchronousInterrupt(source)
+        self._interrupt.setInterruptEdges(rising, falling)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._interrupt.wakeupWaitingInterrupt()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None
+
+    def _run(self):
+        interrupt = self._interrupt
+        while not self._stop_event.is_set():
+            # Don't ignore edges that happened while the last callback ran
+            result = interrupt.waitForInterrupt(0.5, ignorePrevious=False)
+            if result == WaitResult.kTimeout or self._stop_event.is_set():
+                continue
+            rising = bool(result.value & WaitResult.kRisingEdge.value)
+            falling = bool(result.value & WaitResult.kFallingEdge.value)
+            try:
+                self.callback(rising, falling, interrupt.getRisingTimestamp(), interrupt.getFallingTimestamp())
+            except Exception:
+                log.exception(f"{self.name} callback failed")
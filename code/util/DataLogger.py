@@ -0,0 +1,227 @@
+import logging
+log = logging.Logger('P212-robot')
+import os
+import queue
+import struct
+import threading
+import time
+
+# WPILOG v1.0: https://github.com/wpilibsuite/allwpilib/blob/main/wpiutil/doc/datalog.adoc
+#
+# Every record is written with a fixed-width header: 4-byte entry id, 4-byte
+# payload size and 8-byte timestamp (microseconds). The format allows shorter
+# fields, but fixed widths let each entry precompile one struct for the whole
+# record.
+_FILE_HEADER = b"WPILOG" + struct.pack("<HI", 0x0100, 0)
+_RECORD_HEADER_BITFIELD = 0x03 | (0x03 << 2) | (0x07 << 4)
+_RECORD_HEADER = struct.Struct("<BIIQ")
+_CONTROL_START = 0
+
+
+class _LogEntry:
+    """One WPILOG entry with a precompiled struct for its whole record."""
+
+    __slots__ = ("logger", "entry_id", "record")
+
+    def __init__(self, logger, entry_id, payload_format):
+        self.logger = logger
+        self.entry_id = entry_id
+        self.record = struct.Struct("<BIIQ" + payload_format)
+
+
+class DoubleLogEntry(_LogEntry):
+    __slots__ = ()
+
+    def append(self, value):
+        record = self.record
+        self.logger._write(
+            record, _RECORD_HEADER_BITFIELD, self.entry_id, record.size - _RECORD_HEADER.size,
+            self.logger.timestamp_us, value
+        )
+
+
+class IntegerLogEntry(DoubleLogEntry):
+    __slots__ = ()
+
+
+class BooleanLogEntry(DoubleLogEntry):
+    __slots__ = ()
+
+
+class DoubleArrayLogEntry(_LogEntry):
+    """Fixed-length double[] entry; append() takes exactly `length` values."""
+
+    __slots__ = ()
+
+    def append(self, values):
+        record = self.record
+        self.logger._write(
+            record, _RECORD_HEADER_BITFIELD, self.entry_id, record.size - _RECORD_HEADER.size,
+            self.logger.timestamp_us, *values
+        )
+
+
+class DataLogger:
+    """
+    WPILOG-compatible binary logger that never blocks the control loop.
+
+    Records are packed straight into one of chunk_count preallocated chunks,
+    which together form a ring buffer. A full chunk, or the active chunk once
+    flush_period_s has passed, is handed to a background thread that writes it
+    to disk in one large sequential write and returns it to the free pool. If
+    the disk falls behind and no free chunk is left, records are dropped and
+    counted instead of waiting.
+
+    Robot calls set_time() once per loop. Every record appended during the
+    loop shares that timestamp. When enabled is False nothing is opened and
+    filled chunks are recycled in place, so the entries cost almost nothing.
+    """
+
+    def __init__(self, directory, enabled=True, chunk_size=256 * 1024, chunk_count=16, flush_period_s=0.5):
+        self.directory = directory
+        self.enabled = enabled
+        self.chunk_size = chunk_size
+        self.flush_period_s = flush_period_s
+
+        self._free = queue.SimpleQueue()
+        for _ in range(chunk_count):
+            self._free.put(bytearray(chunk_size))
+        self._full = queue.SimpleQueue()
+
+        self._chunk = self._free.get()
+        self._offset = 0
+        self._last_handoff = time.monotonic()
+
+        self._next_entry_id = 1
+        self.timestamp_us = 0
+        self.dropped_records = 0
+        self.bytes_written = 0
+        self.path = None
+
+        self._file = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        if self.enabled:
+            try:
+                self._open()
+            except OSError as e:
+                log.error(f"data log disabled, cannot open {self.directory}: {e}")
+                self.enabled = False
+
+        # The file header goes through the ring like any other data
+        self._write_bytes(_FILE_HEADER)
+
+    # ---------------- producer side (robot loop) ----------------
+
+    def set_time(self, timestamp_us):
+        """Sets the timestamp for this loop's records and hands off stale data."""
+        self.timestamp_us = timestamp_us
+        if self._chunk is None:
+            self._take_free_chunk()
+        elif self._offset and time.monotonic() - self._last_handoff >= self.flush_period_s:
+            self._handoff()
+
+    def add_double(self, name, metadata=""):
+        return DoubleLogEntry(self, self._start_entry(name, "double", metadata), "d")
+
+    def add_integer(self, name, metadata=""):
+        return IntegerLogEntry(self, self._start_entry(name, "int64", metadata), "q")
+
+    def add_boolean(self, name, metadata=""):
+        return BooleanLogEntry(self, self._start_entry(name, "boolean", metadata), "?")
+
+    def add_double_array(self, name, length, metadata=""):
+        return DoubleArrayLogEntry(self, self._start_entry(name, "double[]", metadata), f"{length}d")
+
+    def _start_entry(self, name, type_name, metadata):
+        entry_id = self._next_entry_id
+        self._next_entry_id += 1
+
+        name_bytes = name.encode()
+        type_bytes = type_name.encode()
+        metadata_bytes = metadata.encode()
+        payload = (
+            struct.pack("<BII", _CONTROL_START, entry_id, len(name_bytes)) + name_bytes
+            + struct.pack("<I", len(type_bytes)) + type_bytes
+            + struct.pack("<I", len(metadata_bytes)) + metadata_bytes
+        )
+        self._write_bytes(
+            _RECORD_HEADER.pack(_RECORD_HEADER_BITFIELD, 0, len(payload), self.timestamp_us) + payload
+        )
+        return entry_id
+
+    def _write(self, record, *fields):
+        """Packs one record straight into the active chunk."""
+        if self._offset + record.size > self.chunk_size:
+            self._handoff()
+        if self._chunk is None:
+            self.dropped_records += 1
+            return
+        record.pack_into(self._chunk, self._offset, *fields)
+        self._offset += record.size
+
+    def _write_bytes(self, data):
+        if self._offset + len(data) > self.chunk_size:
+            self._handoff()
+        if self._chunk is None:
+            self.dropped_records += 1
+            return
+        self._chunk[self._offset:self._offset + len(data)] = data
+        self._offset += len(data)
+
+    def _handoff(self):
+        if not self.enabled:
+            self._offset = 0
+            return
+        if self._chunk is not None and self._offset:
+            self._full.put((self._chunk, self._offset))
+            self._chunk = None
+        self._take_free_chunk()
+
+    def _take_free_chunk(self):
+        if self._chunk is not None:
+            return
+        try:
+            self._chunk = self._free.get_nowait()
+        except queue.Empty:
+            return
+        self._offset = 0
+        self._last_handoff = time.monotonic()
+
+    # ---------------- consumer side (writer thread) ----------------
+
+    def _open(self):
+        """Opens a new log file and starts the writer thread."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, time.strftime("robot_%Y%m%d_%H%M%S.wpilog"))
+        self._file = open(self.path, "wb", buffering=0)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="datalog", daemon=True)
+        self._thread.start()
+        log.info(f"data log started at {self.path}")
+
+    def _run(self):
+        while not self._stop_event.is_set() or not self._full.empty():
+            try:
+                chunk, length = self._full.get(timeout=self.flush_period_s)
+            except queue.Empty:
+                continue
+            try:
+                self._file.write(memoryview(chunk)[:length])
+                self.bytes_written += length
+            except OSError as e:
+                log.error(f"data log write failed: {e}")
+            self._free.put(chunk)
+
+    def close(self):
+        """Flushes everything buffered so far and closes the file."""
+        if self._thread is None:
+            return
+        self._handoff()
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        self._file.close()
+        self._file = None
+        self.enabled = False
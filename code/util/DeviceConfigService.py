@@ -0,0 +1,331 @@
+import logging
+log = logging.Logger('P212-robot')
+import hashlib
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+
+class _ConfigJob:
+    __slots__ = ("name", "device", "config", "then")
+
+    def __init__(self, name, device, config, then):
+        self.name = name
+        self.device = device
+        self.config = config
+        self.then = then
+
+
+class ConfigResult:
+    __slots__ = ("name", "fingerprint", "skipped", "ok", "seconds")
+
+    def __init__(self, name, fingerprint, skipped, ok, seconds):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.skipped = skipped
+        self.ok = ok
+        self.seconds = seconds
+
+
+def fingerprint(device, config):
+    """Stable hash of a device's identity and the full serialized configuration."""
+    text = f"{type(device).__name__}:{device.network}:{device.device_id}:{config.serialize()}"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _parse(serialized):
+    """Serialized config ("<id>,<type>_<value>" lines) -> {id: (type, value)}."""
+    values = {}
+    for line in serialized.splitlines():
+        key, _, typed = line.partition(",")
+        kind, _, value = typed.partition("_")
+        values[key] = (kind, value)
+    return values
+
+
+def matches(expected, actual):
+    """
+    True when every value in the serialized `expected` config is in `actual`.
+    Devices store floats with less precision than Python, so floats only
+    need to agree to a few significant digits.
+    """
+    actual = _parse(actual)
+    for key, (kind, value) in _parse(expected).items():
+        if key not in actual or actual[key][0] != kind:
+            return False
+        other = actual[key][1]
+        if kind == "f":
+            if not math.isclose(float(value), float(other), rel_tol=1e-4, abs_tol=1e-6):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+class DeviceConfigService:
+    """
+    Applies every device configuration at startup, concurrently and only when
+    it has changed.
+
+    Subsystems call add() from their constructors instead of calling
+    configurator.apply() themselves. RobotContainer calls apply_all() once all
+    subsystems exist. Each job runs on a thread pool, so the blocking applies
+    to different devices overlap. A job whose fingerprint matches the one
+    cached from the last successful apply is a candidate for skipping, which
+    is what makes a reboot after a brownout fast. The cache only says what
+    was applied last boot, not what the device holds now (it may have been
+    swapped or factory reset), so once apply_all() returns, the skipped
+    devices have their config read back on a background thread and any that
+    no longer match are applied there. A read back is a blocking round trip
+    per device, as slow as an apply, so doing it before skipping would cost
+    a cached boot most of what the cache saves.
+    `then` callbacks (e.g. seeding an encoder position) run after the config,
+    whether it was applied or skipped, and again after a background apply;
+    one that raises marks its job failed.
+
+    With cache_path=None (simulation) every config is applied every time.
+    """
+
+    def __init__(self, cache_path=None, max_workers=8, timeout_s=0.25, retries=3):
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.timeout_s = timeout_s
+        self.retries = retries
+
+        self._jobs = []
+        self._cache = self._load_cache()
+        self._cache_lock = threading.Lock()
+        self._verifier = None
+        self.results = []
+        self.total_seconds = 0.0
+        self.reapplied = []
+
+    def _load_cache(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"ignoring unreadable config cache {self.cache_path}: {e}")
+            return {}
+
+    def _save_cache(self):
+        if self.cache_path is None:
+            return
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump(self._cache, f, indent=1, sort_keys=True)
+        except OSError as e:
+            log.warning(f"could not write config cache {self.cache_path}: {e}")
+
+    def add(self, name, device, config, then=None):
+        self._jobs.append(_ConfigJob(name, device, config, then))
+
+    def forget(self, *names):
+        """
+        Drops cached fingerprints, so the next boot applies these configs in
+        full. Call after a device was changed at runtime (e.g. live tuning).
+        """
+        with self._cache_lock:
+            changed = False
+            for name in names:
+                changed |= self._cache.pop(name, None) is not None
+            if changed:
+                self._save_cache()
+
+    def apply_all(self):
+        """
+        Runs every queued job and returns the results. Blocks until every
+        changed config is applied; the skipped ones are verified afterwards
+        in the background (see wait_verified()).
+        """
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="config") as pool:
+            self.results = list(pool.map(self._run, self._jobs))
+        self.total_seconds = perf_counter() - start
+        skipped = [job for job, result in zip(self._jobs, self.results) if result.skipped]
+        self._jobs = []
+
+        with self._cache_lock:
+            for result in self.results:
+                if result.ok:
+                    self._cache[result.name] = result.fingerprint
+                else:
+                    self._cache.pop(result.name, None)
+            self._save_cache()
+
+        self._report()
+        if skipped:
+            self._verifier = threading.Thread(
+                target=self._verify_all, args=(skipped,), name="config-verify", daemon=True
+            )
+            self._verifier.start()
+        return self.results
+
+    def wait_verified(self, timeout=None):
+        """Waits for the background check of skipped configs. True once it is done."""
+        if self._verifier is not None:
+            self._verifier.join(timeout)
+            return not self._verifier.is_alive()
+        return True
+
+    def _run(self, job):
+        start = perf_counter()
+        key = fingerprint(job.device, job.config)
+        skipped = self._cache.get(job.name) == key
+        ok = skipped or self._apply(job)
+        ok = self._then(job) and ok
+        return ConfigResult(job.name, key, skipped, ok, perf_counter() - start)
+
+    def _apply(self, job):
+        for attempt in range(self.retries):
+            status = job.device.configurator.apply(job.config, self.timeout_s)
+            if status.is_ok():
+                return True
+            log.warning(f"{job.name} config attempt {attempt + 1} failed: {status.name}")
+        return False
+
+    def _then(self, job):
+        if job.then is None:
+            return True
+        try:
+            job.then()
+        except Exception:
+            log.exception(f"{job.name} post-config callback failed")
+            return False
+        return True
+
+    def _verify_all(self, jobs):
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="config-verify") as pool:
+            reapplied = [name for name in pool.map(self._verify_job, jobs) if name is not None]
+        self.reapplied = reapplied
+        log.info(
+            f"verified {len(jobs)} cached configs in {(perf_counter() - start) * 1000:.0f} ms "
+            f"({len(reapplied)} reapplied)"
+        )
+
+    def _verify_job(self, job):
+        """Applies job.config again if the device no longer holds it. Returns job.name if it did."""
+        if self._verify(job):
+            return None
+        with self._cache_lock:
+            # Forgotten since boot (e.g. live tuning changed it): not ours to restore
+            if self._cache.get(job.name) != fingerprint(job.device, job.config):
+                return None
+        ok = self._apply(job) and self._then(job)
+        if not ok:
+            log.error(f"{job.name} lost its config and could not be reconfigured")
+            self.forget(job.name)
+        return job.name
+
+    def _verify(self, job):
+        """Reads the device's config back and checks it still holds job.config."""
+        actual = type(job.config)()
+        status = job.device.configurator.refresh(actual, self.timeout_s)
+        if not status.is_ok():
+            log.warning(f"{job.name} config read back failed: {status.name}; reapplying")
+            return False
+        if not matches(job.config.serialize(), actual.serialize()):
+            log.warning(f"{job.name} does not hold its cached config (replaced or reset?); reapplying")
+            return False
+        return True
+
+    def _report(self):
+        serial = sum(result.seconds for result in self.results)
+        applied = sum(1 for result in self.results if not result.skipped)
+        failed = [result.name for result in self.results if not result.ok]
+        log.info(
+            f"configured {len(self.results)} devices in {self.total_seconds * 1000:.0f} ms "
+            f"({serial * 1000:.0f} ms serial, {applied} applied, "
+            f"{len(self.results) - applied} cached and verified in the background)"
+        )
+        for result in sorted(self.results, key=lambda result: result.seconds, reverse=True):
+            state = "cached" if result.skipped else ("ok" if result.ok else "FAILED")
+            log.info(f"  {result.name}: {result.seconds * 1000:.0f} ms {state}")
+        if failed:
+            log.error(f"device configuration failed for: {', '.join(failed)}")
+
+
+class ConfigWorker:
+    """
+    Applies config sections (Slot0Configs, MotionMagicConfigs, ...) on a
+    background thread while the robot runs.
+
+    submit() only records the request, so it is safe to call from the robot
+    loop. Requests are keyed by name and the latest one wins: a request that
+    has not started yet is replaced rather than queued behind, so a slider
+    dragged on the dashboard costs one apply, not one per step. results()
+    hands back what finished since the last call. The thread starts on the
+    first submit and sleeps while there is nothing to do.
+
+    Before touching a device the thread drops its fingerprint from
+    device_configs' cache (a file write, which is why it happens here and
+    not in the loop), so a reboot at any point after that reapplies the
+    boot config instead of trusting a cache the device no longer matches.
+    """
+
+    def __init__(self, device_configs=None, timeout_s=0.1, retries=3):
+        self.device_configs = device_configs
+        self.timeout_s = timeout_s
+        self.retries = retries
+
+        self._pending = {}
+        self._results = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, name, devices, section):
+        """Queues `section` to be applied to every (config name, device) pair."""
+        with self._cond:
+            self._pending[name] = (devices, section)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-worker", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def results(self):
+        """ConfigResults finished since the last call, oldest first."""
+        with self._cond:
+            results, self._results = self._results, []
+        return results
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                name = next(iter(self._pending))
+                devices, section = self._pending.pop(name)
+            result = self._apply(name, devices, section)
+            with self._cond:
+                self._results.append(result)
+
+    def _apply(self, name, devices, section):
+        start = perf_counter()
+        if self.device_configs is not None:
+            self.device_configs.forget(*(device_name for device_name, _ in devices))
+        ok = True
+        for device_name, device in devices:
+            for attempt in range(self.retries):
+                status = device.configurator.apply(section, self.timeout_s)
+                if status.is_ok():
+                    break
+                log.warning(f"{name} on {device_name} attempt {attempt + 1} failed: {status.name}")
+            else:
+                ok = False
+        return ConfigResult(name, None, False, ok, perf_counter() - start)
@@ -0,0 +1,190 @@
+import logging
+log = logging.Logger('P212-robot')
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+import wpilib
+import wpilib.simulation
+
+# Binary layout: an 8-byte header followed by one fixed-size frame per robot
+# loop. Frames are packed with no padding, so the whole file past the header
+# loads straight into a NumPy structured array.
+MAGIC = b"INPT"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, reserved
+FRAME = struct.Struct("<BI6d4d")
+FRAME_DTYPE = np.dtype([
+    ("mode", "u1"),         # MODE_* bits
+    ("buttons", "<u4"),     # HID button bitmask
+    ("axes", "<f8", 6),     # LeftX, LeftY, RightX, RightY, L2, R2
+    ("outputs", "<f8", 4),  # shaped forward, strafe, rotation, trigger
+])
+FILE_EXTENSION = ".inp"
+
+MODE_ENABLED = 0x01
+MODE_AUTONOMOUS = 0x02
+MODE_TEST = 0x04
+
+
+def current_mode():
+    """The driver station mode as MODE_* bits."""
+    mode = 0
+    if wpilib.DriverStation.isEnabled():
+        mode |= MODE_ENABLED
+    if wpilib.DriverStation.isAutonomous():
+        mode |= MODE_AUTONOMOUS
+    elif wpilib.DriverStation.isTest():
+        mode |= MODE_TEST
+    return mode
+
+
+class InputRecorder:
+    """
+    Records the driver input snapshot and its shaped outputs, once per loop.
+
+    Frames are packed into one of chunk_count preallocated chunks of
+    flush_every frames, so a loop costs one struct pack. A full chunk is
+    handed to a writer thread, like the DataLogger's, so the loop never
+    waits on the disk; if the writer falls behind and no chunk is free,
+    frames are dropped and counted. The mode byte in every frame captures
+    the enable/autonomous/test transitions. close() hands over whatever is
+    still buffered and waits for it to be written.
+    """
+
+    def __init__(self, path, flush_every=250, chunk_count=4):
+        self.path = path
+        self.frames = 0
+        self.dropped_frames = 0
+
+        self._free = queue.SimpleQueue()
+        for _ in range(chunk_count):
+            self._free.put(bytearray(FRAME.size * flush_every))
+        self._full = queue.SimpleQueue()
+        self._chunk = self._free.get()
+        self._offset = 0
+
+        self._file = open(path, "wb", buffering=0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0))
+        self._thread = threading.Thread(target=self._run, name="input-recorder", daemon=True)
+        self._thread.start()
+        log.info(f"recording driver input to {path}")
+
+    def record(self, mode, buttons, axes, outputs):
+        if self._chunk is None:
+            self._take_free_chunk()
+            if self._chunk is None:
+                self.dropped_frames += 1
+                return
+        FRAME.pack_into(self._chunk, self._offset, mode, buttons, *axes, *outputs)
+        self._offset += FRAME.size
+        self.frames += 1
+        if self._offset == len(self._chunk):
+            self._handoff()
+
+    def _handoff(self):
+        if self._chunk is not None and self._offset:
+            self._full.put((self._chunk, self._offset))
+            self._chunk = None
+        self._take_free_chunk()
+
+    def _take_free_chunk(self):
+        if self._chunk is not None:
+            return
+        try:
+            self._chunk = self._free.get_nowait()
+        except queue.Empty:
+            return
+        self._offset = 0
+
+    def _run(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                return
+            chunk, length = item
+            try:
+                self._file.write(memoryview(chunk)[:length])
+            except OSError as e:
+                log.error(f"input recording write failed: {e}")
+            self._free.put(chunk)
+
+    def close(self):
+        if self._file is None:
+            return
+        self._handoff()
+        self._full.put(None)
+        self._thread.join(timeout=2.0)
+        self._file.close()
+        self._file = None
+
+
+def load(path):
+    """Reads a recording into a FRAME_DTYPE array, one entry per loop."""
+    with open(path, "rb") as f:
+        magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} input recording")
+        return np.frombuffer(f.read(), dtype=FRAME_DTYPE)
+
+
+class InputReplay:
+    """
+    Plays a recording back into the simulated driver station, one frame per
+    loop, so it reaches RobotContainer through the same HID reads as a live
+    controller. Simulation only.
+
+    The robot's own inputs and commands replay exactly. Anything that goes
+    through Phoenix's simulated closed loops does not: they run on the wall
+    clock, not stepped time (see physics.py). Replaying faster than real
+    time changes what they do, so run() paces to real time unless told not
+    to, and even then they vary a little from run to run.
+    """
+
+    # HID axis number for each recorded axis (LeftX, LeftY, RightX, RightY, L2, R2)
+    AXES = (
+        wpilib.PS5Controller.Axis.kLeftX, wpilib.PS5Controller.Axis.kLeftY,
+        wpilib.PS5Controller.Axis.kRightX, wpilib.PS5Controller.Axis.kRightY,
+        wpilib.PS5Controller.Axis.kL2, wpilib.PS5Controller.Axis.kR2,
+    )
+
+    def __init__(self, frames, port, period_s):
+        self.frames = frames
+        self.port = port
+        self.period_s = period_s
+        self.ds = wpilib.simulation.DriverStationSim
+        self.step = wpilib.simulation.stepTiming
+
+        # Same shape as a PS5 controller
+        self.ds.setJoystickAxisCount(port, 6)
+        self.ds.setJoystickButtonCount(port, 14)
+        self.ds.setDsAttached(True)
+
+    def apply(self, frame):
+        """Loads one frame into the driver station."""
+        ds = self.ds
+        mode = int(frame["mode"])
+        ds.setEnabled(bool(mode & MODE_ENABLED))
+        ds.setAutonomous(bool(mode & MODE_AUTONOMOUS))
+        ds.setTest(bool(mode & MODE_TEST))
+        for axis, value in zip(self.AXES, frame["axes"]):
+            ds.setJoystickAxis(self.port, int(axis), float(value))
+        ds.setJoystickButtons(self.port, int(frame["buttons"]))
+        ds.notifyNewData()
+
+    def run(self, on_loop=None, paced=True):
+        """
+        Applies every frame and runs one robot loop after each, then calls
+        on_loop() if given. With paced, never runs ahead of real time.
+        """
+        start = time.perf_counter()
+        for i, frame in enumerate(self.frames):
+            self.apply(frame)
+            self.step(self.period_s)
+            if on_loop is not None:
+                on_loop()
+            ahead = (i + 1) * self.period_s - (time.perf_counter() - start)
+            if paced and ahead > 0:
+                time.sleep(ahead)
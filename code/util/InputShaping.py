@@ -0,0 +1,163 @@
+import logging
+log = logging.Logger('P212-robot')
+import math
+
+import numpy as np
+import wpilib
+from commands2.button import Trigger
+
+from constants import SW
+from util.InputRecording import current_mode
+
+
+class ResponseCurve:
+    """
+    Deadband plus expo response, evaluated from a lookup table.
+
+    The table maps stick magnitude 0..1 to output 0..1. Inside the deadband
+    the output is zero; the rest of the travel is rescaled to 0..1 and bent
+    by (1 - expo) * x + expo * x^3. Lookups interpolate linearly between
+    table entries, so there is no pow() in the loop.
+    """
+
+    __slots__ = ("table", "scale")
+
+    def __init__(self, deadband, expo, size=SW.input_lut_size):
+        x = np.linspace(0.0, 1.0, size)
+        live = np.clip((x - deadband) / (1.0 - deadband), 0.0, 1.0)
+        self.table = ((1.0 - expo) * live + expo * live ** 3).tolist()
+        self.scale = size - 1
+
+    def magnitude(self, value):
+        """Shapes a magnitude in 0..1 (larger values are clamped)."""
+        if value >= 1.0:
+            return self.table[-1]
+        position = value * self.scale
+        i = int(position)
+        low = self.table[i]
+        return low + (self.table[i + 1] - low) * (position - i)
+
+    def __call__(self, value):
+        """Shapes a signed axis value in -1..1."""
+        if value < 0.0:
+            return -self.magnitude(-value)
+        return self.magnitude(value)
+
+
+def button_mask(button):
+    """Bit for one HID button number (1-based, e.g. PS5Controller.Button.kL1)."""
+    return 1 << (int(button) - 1)
+
+
+class DriverInput:
+    """
+    The one place the PS5 controller is read.
+
+    Robot calls update() once per loop, before the scheduler runs. It takes a
+    snapshot of every axis and of all buttons as one bitmask, with rising and
+    falling edge masks against the previous loop. Triggers made by button()
+    test a bit of that snapshot, so adding bindings adds no HID calls.
+
+    The drive and trigger inputs are then shaped:
+
+      * left stick: radial deadband and expo on the stick's magnitude, so
+        the direction is kept and diagonals are not squared off
+      * right stick X: deadband and expo for rotation
+      * R2 - L2: deadband and expo for the second motor
+
+    Each shaped value is then slew-rate limited, and commands read the
+    results (normalized to -1..1) from the attributes. The slew limit is a
+    fixed step per update() rather than per elapsed second, so the outputs
+    depend only on the sequence of snapshots; that is what lets a recording
+    made by `recorder` replay bit-identically.
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        # LeftX, LeftY, RightX, RightY, L2, R2 as of the last update()
+        self.axes = [0.0] * 6
+
+        # Button bitmasks as of the last update(); bit n is button n + 1
+        self.buttons = 0
+        self.rising = 0
+        self.falling = 0
+
+        self.translation_curve = ResponseCurve(SW.drive_deadband, SW.drive_expo)
+        self.rotation_curve = ResponseCurve(SW.rotation_deadband, SW.rotation_expo)
+        self.trigger_curve = ResponseCurve(SW.trigger_deadband, SW.trigger_expo)
+
+        # Largest change of each output per loop
+        self.drive_step = SW.drive_slew_rate * SW.loop_period_s
+        self.rotation_step = SW.rotation_slew_rate * SW.loop_period_s
+        self.trigger_step = SW.trigger_slew_rate * SW.loop_period_s
+
+        # Shaped outputs: forward, left stick X, rotation, R2 - L2
+        self.forward = 0.0
+        self.strafe = 0.0
+        self.rotation = 0.0
+        self.trigger = 0.0
+
+        # InputRecorder that gets every snapshot, or None
+        self.recorder = None
+
+    def condition(self, button):
+        """Trigger condition: True while `button` is held in the snapshot."""
+        mask = button_mask(button)
+        return lambda: bool(self.buttons & mask)
+
+    def button(self, button):
+        """Trigger that is active while `button` is held in the snapshot."""
+        return Trigger(self.condition(button))
+
+    def pressed(self, button):
+        """True only on the loop `button` went down."""
+        return bool(self.rising & button_mask(button))
+
+    def released(self, button):
+        """True only on the loop `button` came up."""
+        return bool(self.falling & button_mask(button))
+
+    def update(self):
+        controller = self.controller
+
+        buttons = wpilib.DriverStation.getStickButtons(controller.getPort())
+        changed = buttons ^ self.buttons
+        self.rising = changed & buttons
+        self.falling = changed & self.buttons
+        self.buttons = buttons
+
+        axes = self.axes
+        axes[0] = controller.getLeftX()
+        axes[1] = controller.getLeftY()
+        axes[2] = controller.getRightX()
+        axes[3] = controller.getRightY()
+        axes[4] = controller.getL2Axis()
+        axes[5] = controller.getR2Axis()
+
+        # Radial deadband: shape the magnitude, keep the direction
+        forward, strafe = -axes[1], axes[0]
+        magnitude = math.hypot(forward, strafe)
+        if magnitude > 0.0:
+            gain = self.translation_curve.magnitude(magnitude) / magnitude
+            forward *= gain
+            strafe *= gain
+
+        self.forward = _slew(self.forward, forward, self.drive_step)
+        self.strafe = _slew(self.strafe, strafe, self.drive_step)
+        self.rotation = _slew(self.rotation, self.rotation_curve(axes[2]), self.rotation_step)
+        self.trigger = _slew(self.trigger, self.trigger_curve(axes[5] - axes[4]), self.trigger_step)
+
+        if self.recorder is not None:
+            self.recorder.record(
+                current_mode(), buttons, axes, (self.forward, self.strafe, self.rotation, self.trigger)
+            )
+
+
+def _slew(current, target, max_step):
+    """Moves current toward target by at most max_step."""
+    if target > current + max_step:
+        return current + max_step
+    if target < current - max_step:
+        return current - max_step
+    return target
@@ -0,0 +1,95 @@
+import logging
+log = logging.Logger('P212-robot')
+import copy
+
+import ntcore
+
+# Values closer than this to the applied one are not a change (dashboards echo floats back)
+EPSILON = 1e-9
+
+
+class TunableGroup:
+    """One config section (e.g. a Slot0Configs) shared by one or more devices."""
+
+    __slots__ = ("name", "devices", "section", "attributes", "entries", "status", "changed_at")
+
+    def __init__(self, name, devices, section, attributes, entries, status):
+        self.name = name
+        self.devices = devices
+        self.section = section
+        self.attributes = attributes
+        self.entries = entries
+        self.status = status
+        self.changed_at = None
+
+
+class LiveTuner:
+    """
+    Exposes device gains as NetworkTables entries and applies edits in the
+    background.
+
+    Each group publishes its fields under /Tuning/<group>/<key>, seeded with
+    the values applied at boot, plus a /Tuning/<group>/status string. poll()
+    runs once per loop: it compares every entry with the section, and once a
+    group has been quiet for debounce_s it hands a copy of the section to the
+    ConfigWorker, which applies just that section to every device in the
+    group. Results come back on a later poll and are written to the status
+    entry ("applied", "failed") and logged, so the values can be copied into
+    constants.py. The loop itself never waits on CAN or the disk.
+
+    Tuned devices no longer match the boot config; the worker drops their
+    fingerprints from the device config cache before applying, so the next
+    boot reapplies the config from constants.py.
+    """
+
+    def __init__(self, worker, debounce_s, now, table="Tuning"):
+        self.worker = worker
+        self.debounce_s = debounce_s
+        self.now = now
+        self.table = ntcore.NetworkTableInstance.getDefault().getTable(table)
+        self.groups = {}
+
+    def add(self, name, devices, section, attributes):
+        """
+        Makes `section` tunable. devices are (config name, device) pairs as
+        given to DeviceConfigService.add; attributes maps each NT key to the
+        section attribute it sets, e.g. {"kP": "k_p"}.
+        """
+        section = copy.deepcopy(section)
+        table = self.table.getSubTable(name)
+        entries = []
+        for key, attribute in attributes.items():
+            entry = table.getDoubleTopic(key).getEntry(getattr(section, attribute))
+            entry.set(getattr(section, attribute))
+            entries.append(entry)
+        status = table.getStringTopic("status").publish()
+        status.set("boot")
+        self.groups[name] = TunableGroup(name, tuple(devices), section, tuple(attributes.values()), entries, status)
+
+    def poll(self):
+        """Picks up dashboard edits, submits settled groups and reports results."""
+        now = self.now()
+        for group in self.groups.values():
+            section = group.section
+            for entry, attribute in zip(group.entries, group.attributes):
+                value = entry.get()
+                if abs(value - getattr(section, attribute)) > EPSILON:
+                    setattr(section, attribute, value)
+                    group.changed_at = now
+
+            if group.changed_at is not None and now - group.changed_at >= self.debounce_s:
+                group.changed_at = None
+                group.status.set("pending")
+                self.worker.submit(group.name, group.devices, copy.deepcopy(section))
+
+        for result in self.worker.results():
+            self._report(result)
+
+    def _report(self, result):
+        group = self.groups[result.name]
+        group.status.set("applied" if result.ok else "failed")
+        values = ", ".join(f"{attribute}={getattr(group.section, attribute):g}" for attribute in group.attributes)
+        if result.ok:
+            log.info(f"tuned {result.name} in {result.seconds * 1000:.0f} ms: {values}")
+        else:
+            log.error(f"tuning {result.name} failed: {values}")
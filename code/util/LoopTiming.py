@@ -0,0 +1,155 @@
+import logging
+log = logging.Logger('P212-robot')
+from time import perf_counter_ns
+
+import numpy as np
+
+
+class TimingProbe:
+    """
+    Rolling latency record for one instrumented callable.
+
+    Durations go into a fixed-size ring buffer of nanoseconds, so the cost per
+    call is two perf_counter_ns() calls and one array store. loop_ns
+    accumulates the time spent in this probe during the current loop, which is
+    what overrun attribution ranks by.
+    """
+
+    __slots__ = ("name", "samples", "index", "count", "loop_ns", "topic")
+
+    def __init__(self, name, window, topic):
+        self.name = name
+        self.samples = np.zeros(window, dtype=np.int64)
+        self.index = 0
+        self.count = 0
+        self.loop_ns = 0
+        self.topic = topic
+
+    def record(self, elapsed_ns):
+        self.samples[self.index] = elapsed_ns
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        self.loop_ns += elapsed_ns
+
+    def stats_ms(self):
+        """(p50, p99, max) over the window, in milliseconds."""
+        filled = self.samples[:min(self.count, len(self.samples))]
+        if not len(filled):
+            return (0.0, 0.0, 0.0)
+        p50, p99 = np.percentile(filled, (50, 99))
+        return (float(p50) / 1e6, float(p99) / 1e6, float(filled.max()) / 1e6)
+
+
+class LoopTiming:
+    """
+    Times every subsystem periodic, command initialize/execute/end, trigger
+    poll and Robot mode dispatch, and attributes loop overruns.
+
+    The instrument_* helpers replace the bound methods on each instance with
+    timed wrappers, so the command scheduler calls them unchanged. Robot calls
+    end_loop() once the scheduler has run. If the loop took longer than the
+    budget, the slowest probes of that loop are logged. Percentiles are
+    published every publish_every loops.
+
+    A loop runs in two callbacks with an idle gap between them: Robot's main
+    callback (robotPeriodic, then the mode periodic) and, kSchedulerOffset
+    later, the command scheduler's. The "Loop" time is the busy time of both,
+    never the gap. The main callback's section runs from begin_loop() to
+    pause_loop(); the scheduler's opens with the first probe after that (the
+    subsystem periodics, which the scheduler runs first) and closes at the
+    end of the last probe before end_loop().
+    """
+
+    def __init__(self, telemetry, budget_s, window=256, publish_every=50, top_offenders=5):
+        self.telemetry = telemetry
+        self.budget_ns = int(budget_s * 1e9)
+        self.window = window
+        self.publish_every = publish_every
+        self.top_offenders = top_offenders
+
+        self.probes = {}
+        self.loop_probe = self._probe("Loop")
+        self.loops = 0
+        self.overruns = 0
+        self.last_loop_ns = 0
+        self._busy_ns = 0
+        self._section_start_ns = None
+        self._section_end_ns = 0
+
+    def _probe(self, name):
+        probe = self.probes.get(name)
+        if probe is None:
+            topic = self.telemetry.add_number_array(f"Loop Timing/{name}", period_s=0.5)  # p50, p99, max (ms)
+            probe = TimingProbe(name, self.window, topic)
+            self.probes[name] = probe
+        return probe
+
+    def timed(self, name, fn):
+        """Returns fn wrapped in a timing probe called `name`."""
+        probe = self._probe(name)
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            if self._section_start_ns is None:
+                self._section_start_ns = start
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end = perf_counter_ns()
+                probe.record(end - start)
+                self._section_end_ns = end
+
+        return wrapper
+
+    def instrument_subsystem(self, subsystem):
+        subsystem.periodic = self.timed(f"{subsystem.getName()}.periodic", subsystem.periodic)
+
+    def instrument_command(self, command):
+        name = command.getName()
+        for method in ("initialize", "execute", "end"):
+            setattr(command, method, self.timed(f"{name}.{method}", getattr(command, method)))
+        return command
+
+    def timed_condition(self, name, condition):
+        """Wraps a Trigger condition so its polling time is recorded."""
+        return self.timed(f"Trigger {name}", condition)
+
+    def begin_loop(self):
+        """Opens the main callback's section, if no probe has already done so."""
+        if self._section_start_ns is None:
+            self._section_start_ns = perf_counter_ns()
+            self._section_end_ns = self._section_start_ns
+
+    def pause_loop(self):
+        """Closes the current section at the end of its last probe; the next probe opens another."""
+        if self._section_start_ns is not None:
+            self._busy_ns += max(self._section_end_ns - self._section_start_ns, 0)
+            self._section_start_ns = None
+
+    def end_loop(self):
+        self.pause_loop()
+        elapsed = self._busy_ns
+        self._busy_ns = 0
+        self.loop_probe.record(elapsed)
+        self.last_loop_ns = elapsed
+        self.loops += 1
+
+        if elapsed > self.budget_ns:
+            self.overruns += 1
+            self._report_overrun(elapsed)
+
+        if self.loops % self.publish_every == 0:
+            for probe in self.probes.values():
+                probe.topic.set(probe.stats_ms())
+
+        for probe in self.probes.values():
+            probe.loop_ns = 0
+
+    def _report_overrun(self, elapsed_ns):
+        offenders = sorted(
+            (probe for probe in self.probes.values() if probe is not self.loop_probe and probe.loop_ns),
+            key=lambda probe: probe.loop_ns,
+            reverse=True,
+        )[:self.top_offenders]
+        summary = ", ".join(f"{probe.name} {probe.loop_ns / 1e6:.2f} ms" for probe in offenders)
+        log.warning(f"loop overrun #{self.overruns}: {elapsed_ns / 1e6:.2f} ms; top: {summary}")
@@ -0,0 +1,151 @@
+import logging
+log = logging.Logger('P212-robot')
+import threading
+
+import wpilib
+from phoenix6.utils import fpga_to_current_time
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.kinematics import SwerveDrive4Odometry
+
+from util.SignalRegistry import SignalRegistry
+from util.PoseEstimator import PoseHistory
+
+
+class PoseBuffer:
+    """
+    Latest pose plus a timestamped history, shared between the odometry
+    thread and the command loop.
+
+    The latest sample is an immutable (timestamp, Pose2d) tuple that is swapped
+    in with a single reference assignment, so latest() never takes a lock and
+    never blocks. The history is an array-backed PoseHistory, which the pose
+    estimator looks vision capture times up in.
+    """
+
+    def __init__(self, history_size):
+        self._latest = (0.0, Pose2d())
+        self.history = PoseHistory(history_size)
+
+    def publish(self, timestamp, pose):
+        self._latest = (timestamp, pose)
+        self.history.add(timestamp, pose)
+
+    def latest(self):
+        """Returns the newest (timestamp, Pose2d) without blocking."""
+        return self._latest
+
+    def clear(self):
+        self.history.clear()
+
+
+class OdometryThread:
+    """
+    Integrates four-module swerve odometry at a higher rate than the 20 ms loop.
+
+    The drive/steer positions get their own SignalRegistry, so the odometry
+    thread can block in wait_for_update() until all of them have a fresh
+    sample without touching the main loop's registry. The CAN bus budget
+    runs those signals at frequency_hz. The ADIS16470 gyro is not
+    a Phoenix device and is read right after the CAN signals arrive.
+    Other threads read those signals through signals.snapshot() only, so
+    they never see a half-refreshed cycle. Each update and reset_pose()
+    samples, integrates and publishes under one lock, so a reset is never
+    overwritten by an update that was already in flight.
+
+    Nothing is sampled at construction: RobotContainer calls prime() once the
+    device configs and the CAN signal rates are applied, so odometry is seeded
+    from the configured sensors, then start() on the robot, which runs the
+    loop on a daemon thread. In simulation the thread is not started and
+    update() is called from the subsystem's periodic() instead, so simulated
+    runs stay deterministic.
+
+    Poses are timestamped in FPGA seconds, the clock vision uses. On the
+    thread the sample time comes from the signal registry, which uses
+    Phoenix's own clock (get_current_time_seconds), so it is converted to
+    FPGA time before it goes into the history; in update() it is the FPGA
+    time of the loop.
+    """
+
+    def __init__(self, modules, gyro, kinematics, frequency_hz, history_size=50):
+        self.modules = modules
+        self.gyro = gyro
+        self.frequency_hz = frequency_hz
+
+        self.signals = SignalRegistry()
+        for module in modules:
+            module.register_odometry_signals(self.signals)
+
+        self._lock = threading.Lock()
+        self._odometry = SwerveDrive4Odometry(kinematics, self._heading(), self._module_positions())
+        self.buffer = PoseBuffer(history_size)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.update_count = 0
+        self.missed_updates = 0
+
+    def _heading(self):
+        return Rotation2d.fromDegrees(self.gyro.getAngle())
+
+    def _module_positions(self):
+        snapshot = self.signals.snapshot()
+        return tuple(module.get_module_position(snapshot) for module in self.modules)
+
+    def prime(self):
+        """Waits for fresh samples and re-seeds odometry from them. Startup only."""
+        self.signals.wait_for_update(0.1)
+        with self._lock:
+            self._odometry.resetPosition(self._heading(), self._module_positions(), self._odometry.getPose())
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="odometry", daemon=True)
+        self._thread.start()
+        log.info(f"odometry thread started at {self.frequency_hz} Hz")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None
+
+    def _run(self):
+        timeout = 2.0 / self.frequency_hz
+        while not self._stop_event.is_set():
+            self.signals.wait_for_update(timeout)
+            if not self.signals.all_good:
+                self.missed_updates += 1
+            self._integrate(self._to_fpga(self.signals.timestamp))
+
+    def update(self):
+        """Synchronous update, for when the thread is not running."""
+        self.signals.refresh()
+        self._integrate(self._now())
+
+    def _integrate(self, timestamp):
+        with self._lock:
+            pose = self._odometry.update(self._heading(), self._module_positions())
+            self.update_count += 1
+            self.buffer.publish(timestamp, pose)
+
+    @staticmethod
+    def _to_fpga(phoenix_time):
+        """Phoenix signal time -> FPGA seconds."""
+        return phoenix_time - fpga_to_current_time(0.0)
+
+    def _now(self):
+        return wpilib.Timer.getFPGATimestamp()
+
+    def get_pose(self):
+        return self.buffer.latest()[1]
+
+    def reset_pose(self, pose):
+        with self._lock:
+            self._odometry.resetPosition(self._heading(), self._module_positions(), pose)
+            self.buffer.clear()
+            self.buffer.publish(self._now(), pose)
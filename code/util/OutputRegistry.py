@@ -0,0 +1,124 @@
+import logging
+log = logging.Logger('P212-robot')
+
+from phoenix6.utils import get_current_time_seconds
+
+# Compared attributes per control request type, split into numbers (compared
+# within the tolerance) and everything else (bools, enums; compared exactly).
+# A field counts as a number whether it currently holds an int or a float,
+# since requests are built as e.g. VoltageOut(0) and mutated to floats later.
+_FIELDS = {}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _fields(request):
+    fields = _FIELDS.get(type(request))
+    if fields is None:
+        info = request.control_info
+        fields = (
+            tuple(name for name, value in info.items() if name != "name" and _is_number(value)),
+            tuple(name for name, value in info.items() if name != "name" and not _is_number(value)),
+        )
+        _FIELDS[type(request)] = fields
+    return fields
+
+
+class ControlOutput:
+    """
+    Sends one device's control requests, skipping repeats.
+
+    A request is sent when it is a different request object than the last
+    one (a mode change), when any of its fields moved since the last send
+    (numbers by more than the tolerance), or when keep_alive_s has passed
+    since the last send. Otherwise the call is counted as suppressed and
+    nothing reaches Phoenix. Phoenix keeps transmitting the last request at
+    its update_freq_hz on its own, so a suppressed call leaves the motor
+    doing exactly what it was doing.
+    """
+
+    __slots__ = (
+        "name", "device", "keep_alive_s", "tolerance", "enabled", "sent", "suppressed",
+        "_request", "_numbers", "_exact", "_number_values", "_exact_values", "_sent_at",
+    )
+
+    def __init__(self, name, device, keep_alive_s, tolerance, enabled):
+        self.name = name
+        self.device = device
+        self.keep_alive_s = keep_alive_s
+        self.tolerance = tolerance
+        self.enabled = enabled
+        self.sent = 0
+        self.suppressed = 0
+
+        self._request = None
+        self._numbers = self._exact = ()
+        self._number_values = self._exact_values = ()
+        self._sent_at = 0.0
+
+    def set(self, request):
+        """Sends `request` unless it repeats the last one. Returns True if it was sent."""
+        now = get_current_time_seconds()
+        if (self.enabled and request is self._request and now - self._sent_at < self.keep_alive_s
+                and not self._changed(request)):
+            self.suppressed += 1
+            return False
+
+        self.device.set_control(request)
+        if request is not self._request:
+            self._request = request
+            self._numbers, self._exact = _fields(request)
+        self._number_values = [getattr(request, name) for name in self._numbers]
+        self._exact_values = [getattr(request, name) for name in self._exact]
+        self._sent_at = now
+        self.sent += 1
+        return True
+
+    def _changed(self, request):
+        tolerance = self.tolerance
+        for name, value in zip(self._numbers, self._number_values):
+            if abs(getattr(request, name) - value) > tolerance:
+                return True
+        for name, value in zip(self._exact, self._exact_values):
+            if getattr(request, name) != value:
+                return True
+        return False
+
+    def invalidate(self):
+        """Forces the next set() to send, e.g. after something else commanded the device."""
+        self._request = None
+
+
+class OutputRegistry:
+    """
+    Central owner of every motor controller output the robot commands.
+
+    Subsystems call add() once per motor at construction and send every
+    control request through the returned ControlOutput instead of calling
+    set_control() directly. Steady-state loops (a held trigger, a centered
+    stick) then skip the set_control() JNI call. That is all they save: CAN
+    traffic is unchanged, since Phoenix resends the last request at its
+    update_freq_hz whether or not Python calls set_control() again.
+    sent and suppressed total the set_control() calls made and skipped.
+    """
+
+    def __init__(self, keep_alive_s, tolerance, enabled=True):
+        self.keep_alive_s = keep_alive_s
+        self.tolerance = tolerance
+        self.enabled = enabled
+        self.outputs = []
+
+    def add(self, name, device):
+        output = ControlOutput(name, device, self.keep_alive_s, self.tolerance, self.enabled)
+        self.outputs.append(output)
+        return output
+
+    @property
+    def sent(self):
+        return sum(output.sent for output in self.outputs)
+
+    @property
+    def suppressed(self):
+        return sum(output.suppressed for output in self.outputs)
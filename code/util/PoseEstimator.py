@@ -0,0 +1,169 @@
+import logging
+log = logging.Logger('P212-robot')
+import bisect
+import math
+import threading
+
+import numpy as np
+from wpimath.geometry import Pose2d, Rotation2d, Transform2d
+
+
+def _wrap(angle):
+    return math.remainder(angle, 2 * math.pi)
+
+
+class PoseHistory:
+    """
+    Fixed-capacity, timestamped pose history with interpolated lookup.
+
+    Samples live in one (4, 2 * capacity) float64 array of t, x, y, theta.
+    Every sample is written twice, at i and at i + capacity, so the newest
+    `capacity` samples are always one contiguous, time-ordered slice and
+    sample() is a np.searchsorted on a view: O(1) to add, O(log n) to look
+    up, no allocation either way. The odometry thread writes and the loop
+    reads, so both take a lock held only for the array access.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros((4, 2 * capacity))
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def add(self, timestamp, pose):
+        column = (timestamp, pose.X(), pose.Y(), pose.rotation().radians())
+        with self._lock:
+            i = self._next
+            self._data[:, i] = column
+            self._data[:, i + self.capacity] = column
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _window(self):
+        if self._count < self.capacity:
+            return self._data[:, :self._count]
+        return self._data[:, self._next:self._next + self.capacity]
+
+    def __len__(self):
+        return self._count
+
+    def oldest_timestamp(self):
+        with self._lock:
+            return float(self._window()[0, 0]) if self._count else None
+
+    def sample(self, timestamp):
+        """
+        Pose at `timestamp`, interpolated between the two samples around it
+        (heading along the shorter arc). Outside the history the nearest end
+        is returned; an empty history returns None.
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            window = self._window()
+            times = window[0]
+            k = int(np.searchsorted(times, timestamp))
+            if k == 0:
+                _, x, y, theta = window[:, 0].tolist()
+                return Pose2d(x, y, Rotation2d(theta))
+            if k == len(times):
+                _, x, y, theta = window[:, -1].tolist()
+                return Pose2d(x, y, Rotation2d(theta))
+            t0, x0, y0, theta0 = window[:, k - 1].tolist()
+            t1, x1, y1, theta1 = window[:, k].tolist()
+
+        f = (timestamp - t0) / (t1 - t0) if t1 > t0 else 0.0
+        return Pose2d(x0 + (x1 - x0) * f, y0 + (y1 - y0) * f, Rotation2d(theta0 + _wrap(theta1 - theta0) * f))
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+            self._count = 0
+
+
+class _VisionUpdate:
+    __slots__ = ("timestamp", "pose", "gain", "correction")
+
+    def __init__(self, timestamp, pose, gain):
+        self.timestamp = timestamp
+        self.pose = pose
+        self.gain = gain
+        self.correction = Transform2d()
+
+
+class PoseEstimator:
+    """
+    Fuses delayed vision poses into odometry at the time they were captured.
+
+    The estimate is the latest odometry pose moved by a correction transform.
+    A vision pose captured at time t is compared with the estimate at t
+    (odometry from the history, plus the correction in effect then) and
+    blended in per axis with gain q / (q + r) from the odometry and vision
+    standard deviations. The new correction carries everything odometry
+    measured since t forward on top of the corrected pose. Late-arriving
+    measurements older than ones already applied are inserted in capture
+    order and everything after them is replayed.
+    """
+
+    def __init__(self, history, odometry_std_devs, vision_std_devs, max_updates=32):
+        self.history = history
+        self.max_updates = max_updates
+        self._odometry_variance = np.square(odometry_std_devs)
+        self._default_gain = self._gain(vision_std_devs)
+
+        self._updates = []
+        self._base_correction = Transform2d()
+        self.correction = Transform2d()
+        self.applied = 0
+        self.rejected = 0
+
+    def _gain(self, vision_std_devs):
+        q = self._odometry_variance
+        return tuple((q / (q + np.square(vision_std_devs))).tolist())
+
+    def add_vision_measurement(self, pose, timestamp, std_devs=None):
+        """Applies a vision pose captured at `timestamp` (FPGA seconds)."""
+        oldest = self.history.oldest_timestamp()
+        if oldest is None or timestamp < oldest:
+            self.rejected += 1
+            return False
+
+        gain = self._default_gain if std_devs is None else self._gain(std_devs)
+        update = _VisionUpdate(timestamp, pose, gain)
+        i = bisect.bisect_right([u.timestamp for u in self._updates], timestamp)
+        self._updates.insert(i, update)
+        self._replay(i)
+
+        # Updates that fell out of the history are folded into the base
+        while len(self._updates) > self.max_updates or self._updates[0].timestamp < oldest:
+            self._base_correction = self._updates.pop(0).correction
+        self.applied += 1
+        return True
+
+    def _replay(self, start):
+        correction = self._updates[start - 1].correction if start > 0 else self._base_correction
+        for update in self._updates[start:]:
+            odometry = self.history.sample(update.timestamp)
+            estimate = odometry.transformBy(correction)
+            gx, gy, gtheta = update.gain
+            fused = Pose2d(
+                estimate.X() + gx * (update.pose.X() - estimate.X()),
+                estimate.Y() + gy * (update.pose.Y() - estimate.Y()),
+                Rotation2d(estimate.rotation().radians() + gtheta * _wrap(
+                    update.pose.rotation().radians() - estimate.rotation().radians()
+                )),
+            )
+            correction = Transform2d(odometry, fused)
+            update.correction = correction
+        self.correction = correction
+
+    def estimate(self, odometry_pose):
+        """The fused pose, given the latest odometry pose."""
+        return odometry_pose.transformBy(self.correction)
+
+    def reset(self):
+        """Forgets all corrections, after odometry was reset to a known pose."""
+        self._updates.clear()
+        self._base_correction = Transform2d()
+        self.correction = Transform2d()
@@ -0,0 +1,145 @@
+import logging
+log = logging.Logger('P212-robot')
+
+from phoenix6 import BaseStatusSignal
+from phoenix6.utils import get_current_time_seconds
+
+
+class SignalSnapshot:
+    """
+    Immutable view of every registered signal at one instant.
+
+    timestamp is Phoenix's clock (phoenix6.utils.get_current_time_seconds),
+    which is not the FPGA clock; convert before comparing it with FPGA
+    timestamps, as OdometryThread does. Values with a registered slope signal
+    are latency compensated to that instant, so a snapshot holds same-instant
+    samples even though the CAN frames arrived at slightly different times.
+    """
+
+    __slots__ = ("timestamp", "values", "all_good")
+
+    def __init__(self, timestamp, values, all_good):
+        self.timestamp = timestamp
+        self.values = values
+        self.all_good = all_good
+
+    def __getitem__(self, handle):
+        return self.values[handle]
+
+    def value(self, handle):
+        """Same as the registry's value(), so readers take either."""
+        return self.values[handle]
+
+
+class SignalRegistry:
+    """
+    Central owner of every Phoenix 6 status signal the robot reads.
+
+    Subsystems call register() once at construction and keep the returned
+    integer handle. Robot.robotPeriodic calls refresh() once at the start of
+    each loop, which fetches every signal with a single batched
+    BaseStatusSignal.refresh_all() call. After that, value(handle) is a plain
+    tuple lookup with no CAN or JNI traffic.
+
+    Every refresh publishes a new SignalSnapshot with a single reference
+    assignment, once the values are fully latency compensated. A registry
+    refreshed on another thread (the odometry thread's) is read through
+    snapshot(), so a reader gets every value from the same cycle.
+    """
+
+    # Cap on latency compensation, so stale or disconnected devices don't extrapolate far
+    MAX_COMPENSATION_SECONDS = 0.3
+
+    def __init__(self):
+        self.names = []
+        self._signals = []
+        self._slopes = []  # (handle, slope handle) pairs for latency compensation
+        self._handles = {}
+
+        self._values = []  # scratch for the refreshing thread
+        self._snapshot = SignalSnapshot(0.0, (), False)
+        self.timestamp = 0.0
+        self.all_good = False
+        self.refresh_count = 0
+
+    def register(self, name, signal, slope=None):
+        """
+        Adds a status signal and returns its handle.
+
+        slope is an optional status signal holding the derivative of `signal`
+        (e.g. velocity for a position). When given, both are fetched together
+        and the value is latency compensated to the snapshot time.
+        Registering the same name twice returns the existing handle.
+        """
+        if name in self._handles:
+            return self._handles[name]
+
+        handle = self._add(name, signal)
+        if slope is not None:
+            slope_handle = self._add(name + "/slope", slope)
+            self._slopes.append((handle, slope_handle))
+        return handle
+
+    def _add(self, name, signal):
+        handle = len(self._signals)
+        self.names.append(name)
+        self._signals.append(signal)
+        self._values.append(0.0)
+        self._handles[name] = handle
+        self._snapshot = SignalSnapshot(self.timestamp, tuple(self._values), self.all_good)
+        return handle
+
+    def handle(self, name):
+        return self._handles[name]
+
+    @property
+    def signals(self):
+        return list(self._signals)
+
+    def refresh(self):
+        """Non-blocking batched refresh of every registered signal."""
+        if not self._signals:
+            return
+        BaseStatusSignal.refresh_all(self._signals)
+        self._capture()
+
+    def wait_for_update(self, timeout_seconds):
+        """
+        Blocks until every registered signal has new data or the timeout
+        expires. Meant for a dedicated sampling thread, never the main loop.
+        """
+        if not self._signals:
+            return
+        BaseStatusSignal.wait_for_all(timeout_seconds, self._signals)
+        self._capture()
+
+    def _capture(self):
+        now = get_current_time_seconds()
+        values = self._values
+        signals = self._signals
+
+        all_good = True
+        for i, signal in enumerate(signals):
+            values[i] = signal.value_as_double
+            all_good = all_good and signal.status.is_ok()
+
+        for handle, slope_handle in self._slopes:
+            latency = now - signals[handle].timestamp.time
+            latency = min(max(latency, 0.0), self.MAX_COMPENSATION_SECONDS)
+            values[handle] += values[slope_handle] * latency
+
+        if not all_good and self.all_good:
+            log.warning("status signal refresh reported errors")
+
+        self._snapshot = SignalSnapshot(now, tuple(values), all_good)
+        self.timestamp = now
+        self.all_good = all_good
+        self.refresh_count += 1
+
+    def value(self, handle):
+        """Latest refreshed value for a handle."""
+        return self._snapshot.values[handle]
+
+    def snapshot(self):
+        """The latest refresh as an immutable SignalSnapshot. Never blocks."""
+        return self._snapshot
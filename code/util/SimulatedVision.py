@@ -0,0 +1,43 @@
+import heapq
+import math
+
+import numpy as np
+from wpimath.geometry import Pose2d, Rotation2d
+
+
+class SimulatedVision:
+    """
+    Camera stand-in for simulation and tests.
+
+    capture() is given the true robot pose; every period_s it takes a
+    noisy copy and schedules it for delivery after a random latency.
+    poll() returns the frames that have arrived by `now` as
+    (pose, capture timestamp) pairs, like a real pipeline would.
+    """
+
+    def __init__(self, period_s=0.05, latency_s=(0.03, 0.1), noise_std_devs=(0.05, 0.05, 0.02), seed=0):
+        self.period_s = period_s
+        self.latency_s = latency_s
+        self.noise_std_devs = noise_std_devs
+        self._rng = np.random.default_rng(seed)
+        self._pending = []
+        self._count = 0
+        self._next_capture = -math.inf
+
+    def capture(self, now, true_pose):
+        if now < self._next_capture:
+            return
+        self._next_capture = now + self.period_s
+
+        dx, dy, dtheta = self._rng.normal(0.0, self.noise_std_devs).tolist()
+        pose = Pose2d(true_pose.X() + dx, true_pose.Y() + dy, Rotation2d(true_pose.rotation().radians() + dtheta))
+        arrival = now + float(self._rng.uniform(*self.latency_s))
+        heapq.heappush(self._pending, (arrival, self._count, now, pose))
+        self._count += 1
+
+    def poll(self, now):
+        frames = []
+        while self._pending and self._pending[0][0] <= now:
+            _, _, captured, pose = heapq.heappop(self._pending)
+            frames.append((pose, captured))
+        return frames
@@ -0,0 +1,54 @@
+import logging
+log = logging.Logger('P212-robot')
+
+# Robot mode methods a subsystem may define to be called alongside Robot's own
+MODE_HOOKS = (
+    "robotPeriodic",
+    "disabledInit", "disabledPeriodic", "disabledExit",
+    "autonomousInit", "autonomousPeriodic", "autonomousExit",
+    "teleopInit", "teleopPeriodic", "teleopExit",
+    "testInit", "testPeriodic", "testExit",
+)
+
+
+class SubsystemRegistry:
+    """
+    The robot's list of subsystems, and which of them take each mode hook.
+
+    RobotContainer registers every subsystem as it constructs it. A subsystem
+    opts into a mode hook simply by defining a method with that name; the
+    bound method is looked up once, here, and appended to that hook's list.
+    Robot fetches a dispatcher per hook in robotInit, so each loop only
+    iterates a prebuilt list with no getattr/hasattr.
+    """
+
+    def __init__(self):
+        self.subsystems = []
+        self._hooks = {name: [] for name in MODE_HOOKS}
+
+    def register(self, subsystem):
+        """Adds a subsystem and its mode hooks. Returns the subsystem."""
+        self.subsystems.append(subsystem)
+        hooked = []
+        for name in MODE_HOOKS:
+            hook = getattr(subsystem, name, None)
+            if callable(hook):
+                self._hooks[name].append(hook)
+                hooked.append(name)
+        if hooked:
+            log.info(f"{subsystem.getName()} hooks: {', '.join(hooked)}")
+        return subsystem
+
+    def hooks(self, name):
+        """The bound methods registered for one mode hook, in registration order."""
+        return self._hooks[name]
+
+    def dispatcher(self, name):
+        """Returns a function that calls every `name` hook."""
+        hooks = self._hooks[name]
+
+        def dispatch():
+            for hook in hooks:
+                hook()
+
+        return dispatch
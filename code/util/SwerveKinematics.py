@@ -0,0 +1,151 @@
+import math
+
+import numpy as np
+
+
+class SwerveKinematicsEngine:
+    """
+    Four-module swerve inverse kinematics backed by a precomputed NumPy matrix.
+
+    Module order everywhere is front-left, front-right, back-left, back-right,
+    which is the same order WPILib's SwerveDrive4Kinematics uses.
+
+    to_module_states() is the per-loop path: it works on preallocated buffers
+    and does field-relative conversion, desaturation and angle optimization in
+    one pass. batch_to_module_states() runs the same math over an (N, 3) array
+    of chassis commands, for replaying logged matches offline.
+    """
+
+    def __init__(self, module_locations, max_module_speed_mps):
+        self.module_locations = np.asarray(module_locations, dtype=float).reshape(4, 2)
+        self.max_module_speed_mps = float(max_module_speed_mps)
+
+        # Inverse kinematics: [vx_0, vy_0, vx_1, vy_1, ...] = M @ [vx, vy, omega]
+        #   vx_i = vx - omega * y_i
+        #   vy_i = vy + omega * x_i
+        matrix = np.zeros((8, 3))
+        matrix[0::2, 0] = 1.0
+        matrix[1::2, 1] = 1.0
+        matrix[0::2, 2] = -self.module_locations[:, 1]
+        matrix[1::2, 2] = self.module_locations[:, 0]
+        self.inverse_matrix = matrix
+        self.forward_matrix = np.linalg.pinv(matrix)
+
+        # Preallocated buffers for the single-command path
+        self._command = np.zeros(3)
+        self._components = np.zeros(8)
+        self._speeds = np.zeros(4)
+        self._angles = np.zeros(4)
+        self._delta = np.zeros(4)
+        self._flip = np.zeros(4, dtype=bool)
+
+    def to_module_states(self, x_mps, y_mps, rot_rad_per_s, heading_rad=0.0, current_angles=None):
+        """
+        Returns (speeds, angles) arrays of length 4 for one chassis command.
+
+        Speeds are in m/s and angles in radians (-pi, pi]. heading_rad rotates a
+        field-relative command into the robot frame; pass 0.0 for robot-relative.
+        When current_angles is given, each module is optimized to turn at most
+        90 degrees. The returned arrays are reused on the next call.
+        """
+        if heading_rad:
+            cos_h = math.cos(heading_rad)
+            sin_h = math.sin(heading_rad)
+            self._command[0] = x_mps * cos_h + y_mps * sin_h
+            self._command[1] = -x_mps * sin_h + y_mps * cos_h
+        else:
+            self._command[0] = x_mps
+            self._command[1] = y_mps
+        self._command[2] = rot_rad_per_s
+
+        np.dot(self.inverse_matrix, self._command, out=self._components)
+        vx = self._components[0::2]
+        vy = self._components[1::2]
+        np.hypot(vx, vy, out=self._speeds)
+
+        # Hold the current wheel angles when stopped instead of snapping to 0
+        if current_angles is not None and not self._speeds.any():
+            self._angles[:] = current_angles
+            return self._speeds, self._angles
+
+        np.arctan2(vy, vx, out=self._angles)
+
+        # Desaturate
+        top_speed = self._speeds.max()
+        if top_speed > self.max_module_speed_mps:
+            self._speeds *= self.max_module_speed_mps / top_speed
+
+        # Optimize: never turn a module more than 90 degrees, reverse it instead
+        if current_angles is not None:
+            np.subtract(self._angles, current_angles, out=self._delta)
+            _wrap(self._delta, out=self._delta)
+            np.greater(np.abs(self._delta), math.pi / 2, out=self._flip)
+            if self._flip.any():
+                self._speeds[self._flip] *= -1.0
+                self._angles[self._flip] += math.pi
+                _wrap(self._angles, out=self._angles)
+
+        return self._speeds, self._angles
+
+    def batch_to_module_states(self, chassis_speeds, headings_rad=None, current_angles=None):
+        """
+        Vectorized version of to_module_states() for offline analysis.
+
+        chassis_speeds is an (N, 3) array of [vx, vy, omega] rows. headings_rad
+        is an optional (N,) array for field-relative commands, current_angles an
+        optional (N, 4) or (4,) array of measured module angles. Returns new
+        (N, 4) speed and angle arrays.
+        """
+        commands = np.array(chassis_speeds, dtype=float).reshape(-1, 3)
+
+        if headings_rad is not None:
+            headings = np.asarray(headings_rad, dtype=float)
+            cos_h = np.cos(headings)
+            sin_h = np.sin(headings)
+            vx = commands[:, 0] * cos_h + commands[:, 1] * sin_h
+            vy = -commands[:, 0] * sin_h + commands[:, 1] * cos_h
+            commands[:, 0] = vx
+            commands[:, 1] = vy
+
+        components = commands @ self.inverse_matrix.T
+        module_vx = components[:, 0::2]
+        module_vy = components[:, 1::2]
+        speeds = np.hypot(module_vx, module_vy)
+        angles = np.arctan2(module_vy, module_vx)
+
+        top_speed = speeds.max(axis=1, keepdims=True)
+        scale = np.where(
+            top_speed > self.max_module_speed_mps,
+            self.max_module_speed_mps / np.maximum(top_speed, 1e-12),
+            1.0,
+        )
+        speeds *= scale
+
+        if current_angles is not None:
+            current = np.broadcast_to(np.asarray(current_angles, dtype=float), angles.shape)
+            stopped = ~speeds.any(axis=1)
+            angles[stopped] = current[stopped]
+
+            flip = np.abs(_wrap(angles - current)) > math.pi / 2
+            speeds[flip] *= -1.0
+            angles[flip] += math.pi
+            angles = _wrap(angles)
+
+        return speeds, angles
+
+    def to_chassis_speeds(self, speeds, angles):
+        """
+        Forward kinematics: least-squares [vx, vy, omega] from module states.
+        Accepts (4,) arrays or (N, 4) batches.
+        """
+        speeds = np.asarray(speeds, dtype=float)
+        angles = np.asarray(angles, dtype=float)
+        components = np.empty(speeds.shape[:-1] + (8,))
+        components[..., 0::2] = speeds * np.cos(angles)
+        components[..., 1::2] = speeds * np.sin(angles)
+        return components @ self.forward_matrix.T
+
+
+def _wrap(angles, out=None):
+    """Wraps radians into (-pi, pi]."""
+    return np.subtract(math.pi, np.mod(math.pi - angles, 2 * math.pi), out=out)
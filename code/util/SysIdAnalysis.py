@@ -0,0 +1,141 @@
+import numpy as np
+
+# Samples slower than this (rot/s) are dropped from the fit: static friction
+# dominates there and the sign of the velocity is unreliable
+MIN_VELOCITY = 0.05
+
+# Gaps longer than this (s) start a new run, for the acceleration estimate
+MAX_SAMPLE_GAP = 0.1
+
+
+class FeedforwardFit:
+    """ks (V), kv (V per rot/s), ka (V per rot/s^2), fit quality and sample count."""
+
+    __slots__ = ("name", "ks", "kv", "ka", "r_squared", "samples")
+
+    def __init__(self, name, ks, kv, ka, r_squared, samples):
+        self.name = name
+        self.ks = ks
+        self.kv = kv
+        self.ka = ka
+        self.r_squared = r_squared
+        self.samples = samples
+
+
+def acceleration(t, test, velocity):
+    """
+    d(velocity)/dt, differentiated separately within every run of one test,
+    so the jumps between tests do not show up as huge accelerations.
+    """
+    accel = np.zeros_like(velocity)
+    breaks = np.flatnonzero((np.diff(test) != 0) | (np.diff(t) > MAX_SAMPLE_GAP)) + 1
+    for run in np.split(np.arange(len(t)), breaks):
+        if len(run) >= 3:
+            accel[run] = np.gradient(velocity[run], t[run])
+    return accel
+
+
+def fit_feedforward(datasets):
+    """
+    Fits V = ks * sign(v) + kv * v + ka * a for every mechanism at once.
+
+    datasets maps a mechanism name to (t, test, voltage, velocity) arrays.
+    Each mechanism's 3x3 normal equations are accumulated with one matrix
+    product, and all of them are solved in one batched np.linalg.solve call.
+    Returns one FeedforwardFit per mechanism.
+    """
+    names = list(datasets)
+    gram = np.zeros((len(names), 3, 3))
+    moment = np.zeros((len(names), 3))
+    targets = []
+    features = []
+
+    for i, name in enumerate(names):
+        t, test, voltage, velocity = (np.asarray(a, dtype=float) for a in datasets[name])
+        accel = acceleration(t, test, velocity)
+        keep = np.abs(velocity) > MIN_VELOCITY
+        x = np.column_stack((np.sign(velocity[keep]), velocity[keep], accel[keep]))
+        y = voltage[keep]
+        gram[i] = x.T @ x
+        moment[i] = x.T @ y
+        features.append(x)
+        targets.append(y)
+
+    gains = np.linalg.solve(gram, moment[..., None])[..., 0]
+
+    fits = []
+    for i, name in enumerate(names):
+        y = targets[i]
+        residual = y - features[i] @ gains[i]
+        spread = np.sum((y - y.mean()) ** 2)
+        r_squared = 1.0 - np.sum(residual ** 2) / spread if spread > 0 else 0.0
+        ks, kv, ka = gains[i]
+        fits.append(FeedforwardFit(name, float(ks), float(kv), float(ka), float(r_squared), len(y)))
+    return fits
+
+
+def _step_plant(velocity, voltage, fit, dt):
+    """
+    Advances v' = (V - ks sign(v) - kv v) / ka by dt, exactly for the linear
+    part, so stiff plants (small ka) stay stable at any dt.
+    """
+    drive = voltage - fit.ks * np.sign(velocity)
+    if fit.ka <= 1e-6:
+        return drive / fit.kv
+    decay = np.exp(-fit.kv / fit.ka * dt)
+    return velocity * decay + drive / fit.kv * (1.0 - decay)
+
+
+def sweep_position_gains(fit, kp_values, kd_values, step=1.0, duration=1.0, dt=0.002, max_voltage=12.0):
+    """
+    Simulates a position step on the fitted plant for every (kp, kd) pair at
+    once, with the controller the Talon's PositionVoltage runs
+    (kp * error - kd * velocity + ks * sign(error)), and scores each pair by
+    integrated time-weighted absolute error plus overshoot.
+
+    Returns (best kp, best kd, cost grid shaped (len(kp_values), len(kd_values))).
+    """
+    kp, kd = np.meshgrid(np.asarray(kp_values, float), np.asarray(kd_values, float), indexing="ij")
+    kp = kp.ravel()
+    kd = kd.ravel()
+    position = np.zeros_like(kp)
+    velocity = np.zeros_like(kp)
+    cost = np.zeros_like(kp)
+    overshoot = np.zeros_like(kp)
+
+    for i in range(int(duration / dt)):
+        error = step - position
+        voltage = np.clip(kp * error - kd * velocity + fit.ks * np.sign(error), -max_voltage, max_voltage)
+        new_velocity = _step_plant(velocity, voltage, fit, dt)
+        position += 0.5 * (velocity + new_velocity) * dt
+        velocity = new_velocity
+        cost += (i * dt) * np.abs(error) * dt
+        overshoot = np.maximum(overshoot, (position - step) * np.sign(step))
+
+    cost += overshoot * duration
+    cost[~np.isfinite(cost)] = np.inf
+    best = int(np.argmin(cost))
+    return float(kp[best]), float(kd[best]), cost.reshape(len(kp_values), len(kd_values))
+
+
+def sweep_velocity_gains(fit, kp_values, step=10.0, duration=1.0, dt=0.002, max_voltage=12.0):
+    """
+    Simulates a velocity step on the fitted plant for every kp at once, with
+    the fitted feedforward plus kp * error (the Talon's VelocityVoltage), and
+    scores by integrated time-weighted absolute error.
+
+    Returns (best kp, cost per kp).
+    """
+    kp = np.asarray(kp_values, float)
+    velocity = np.zeros_like(kp)
+    cost = np.zeros_like(kp)
+    feedforward = fit.ks * np.sign(step) + fit.kv * step
+
+    for i in range(int(duration / dt)):
+        error = step - velocity
+        voltage = np.clip(feedforward + kp * error, -max_voltage, max_voltage)
+        velocity = _step_plant(velocity, voltage, fit, dt)
+        cost += (i * dt) * np.abs(error) * dt
+
+    cost[~np.isfinite(cost)] = np.inf
+    return float(kp[int(np.argmin(cost))]), cost
@@ -0,0 +1,105 @@
+import logging
+log = logging.Logger('P212-robot')
+import math
+import os
+import struct
+
+import numpy as np
+from wpimath.geometry import Pose2d, Rotation2d
+
+# Binary layout: a 24-byte header followed by COLUMNS contiguous float64
+# arrays of `samples` values each (column-major), so every column can be
+# memory-mapped straight into a NumPy array.
+MAGIC = b"TRAJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIdI")  # magic, version, columns, samples, dt, reserved
+COLUMNS = ("t", "x", "y", "heading", "vx", "vy", "omega")
+FILE_EXTENSION = ".traj"
+
+
+class HolonomicTrajectory:
+    """
+    Holonomic trajectory, stored as one float64 array per column.
+
+    Positions are field-relative meters, heading is the robot heading in
+    radians (independent of the direction of travel), and vx/vy/omega are
+    field-relative velocities. Samples are nominally dt seconds apart
+    starting at t=0, but sample() only relies on t increasing, so uneven
+    spacing (a shortened last step, joined segments) is fine.
+    """
+
+    def __init__(self, name, dt, data):
+        self.name = name
+        self.dt = dt
+        self.data = data  # shape (len(COLUMNS), samples)
+        for i, column in enumerate(COLUMNS):
+            setattr(self, column, data[i])
+        self.samples = data.shape[1]
+        self.duration = float(self.t[-1])
+
+    def sample(self, t):
+        """
+        (x, y, heading, vx, vy, omega) at time t, linearly interpolated
+        between the two neighbouring samples and held at either end.
+
+        The neighbours are found by binary search over the time column, so
+        the cost grows with log(samples) however long the path is.
+        """
+        times = self.t
+        i = int(np.searchsorted(times, t, side="right")) - 1
+        if i < 0:
+            return tuple(self.data[1:, 0].tolist())
+        if i >= self.samples - 1:
+            return tuple(self.data[1:, -1].tolist())
+
+        before = self.data[1:, i]
+        after = self.data[1:, i + 1]
+        t0 = float(times[i])
+        fraction = (t - t0) / (float(times[i + 1]) - t0)
+        x, y, heading, vx, vy, omega = (before + (after - before) * fraction).tolist()
+
+        # Headings interpolate the short way round
+        heading_before = float(before[2])
+        heading = heading_before + math.remainder(float(after[2]) - heading_before, math.tau) * fraction
+        return x, y, heading, vx, vy, omega
+
+    def initial_pose(self):
+        return Pose2d(float(self.x[0]), float(self.y[0]), Rotation2d(float(self.heading[0])))
+
+    def final_pose(self):
+        return Pose2d(float(self.x[-1]), float(self.y[-1]), Rotation2d(float(self.heading[-1])))
+
+
+def save(path, trajectory):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS), trajectory.samples, trajectory.dt, 0))
+        f.write(np.ascontiguousarray(trajectory.data, dtype="<f8").tobytes())
+
+
+def load(path):
+    """Memory-maps one .traj file."""
+    with open(path, "rb") as f:
+        magic, version, columns, samples, dt, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or columns != len(COLUMNS):
+        raise ValueError(f"{path} is not a version {VERSION} trajectory file")
+    data = np.memmap(path, dtype="<f8", mode="r", offset=HEADER.size, shape=(columns, samples))
+    name = os.path.splitext(os.path.basename(path))[0]
+    return HolonomicTrajectory(name, dt, data)
+
+
+def load_all(directory):
+    """Loads every .traj file in a directory into a name -> trajectory dict."""
+    trajectories = {}
+    if not os.path.isdir(directory):
+        log.error(f"trajectory directory {directory} not found")
+        return trajectories
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(FILE_EXTENSION):
+            continue
+        try:
+            trajectory = load(os.path.join(directory, filename))
+        except (OSError, ValueError) as e:
+            log.error(f"could not load trajectory {filename}: {e}")
+            continue
+        trajectories[trajectory.name] = trajectory
+    return trajectories